@@ -42,7 +42,10 @@ class ExtensionAdminForm(forms.ModelForm):
 class ExtensionAdmin(admin.ModelAdmin):
 
     form = ExtensionAdminForm
-    list_display = ('name', 'active', 'is_map_extension', 'updated_at')
-    list_filter = ('active', 'is_map_extension')
+    list_display = ('name', 'active', 'is_map_extension', 'status', 'published', 'updated_at')
+    list_filter = ('active', 'is_map_extension', 'status', 'published')
     search_fields = ('name',)
-    readonly_fields = ('name', 'created_at', 'updated_at')
+    readonly_fields = (
+        'name', 'status', 'published', 'processing_duration', 'extracted_bytes', 'processing_error', 'created_at',
+        'updated_at',
+    )
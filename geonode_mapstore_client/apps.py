@@ -76,9 +76,22 @@ def run_setup_hooks(*args, **kwargs):
     except Exception:
         pass
 
+    if getattr(settings, "MAPSTORE_ASYNC_VIEWS", False):
+        # native async views, for deployments running under ASGI
+        from . import async_views
+
+        extensions_view = async_views.extensions
+        plugins_config_view = async_views.plugins_config
+        request_rules_view = async_views.request_rules
+    else:
+        extensions_view = views.ExtensionsView.as_view()
+        plugins_config_view = views.PluginsConfigView.as_view()
+        request_rules_view = views.RequestConfigurationView.as_view()
+
     urlpatterns += [
-        re_path("/client/extensions", views.ExtensionsView.as_view(), name="mapstore-extension"),
-        re_path("/client/pluginsconfig", views.PluginsConfigView.as_view(), name="mapstore-pluginsconfig"),
+        re_path("/client/extensions", extensions_view, name="mapstore-extension"),
+        re_path("/client/pluginsconfig", plugins_config_view, name="mapstore-pluginsconfig"),
+        re_path(r"^client/localconfig$", views.LocalConfigView.as_view(), name="mapstore-localconfig"),
 
         re_path(
             r"^catalogue/",
@@ -86,9 +99,15 @@ def run_setup_hooks(*args, **kwargs):
                 template_name="geonode-mapstore-client/catalogue.html"
             ),
         ),
+        re_path(r"^metadata/export$", views.metadata_export, name='metadata_export'),
         re_path(r"^metadata/(?P<pk>[^/]*)$", views.metadata, name='metadata'),
         re_path(r"^metadata/(?P<pk>[^/]*)/embed$", views.metadata_embed, name='metadata_embed'),
-        re_path(r"^api/v2/reqrules$", views.RequestConfigurationView.as_view(), name="request-rules"),
+        re_path(r"^api/v2/reqrules$", request_rules_view, name="request-rules"),
+        re_path(
+            r"^api/v2/searchservices/(?P<pk>\d+)/search$",
+            views.SearchServiceSearchView.as_view(),
+            name="search-service-search",
+        ),
         # required, otherwise will raise no-lookup errors to be analysed
         re_path(r"^api/v2/", include(router.urls)),
         
@@ -111,11 +130,12 @@ def run_setup_hooks(*args, **kwargs):
         },
     }
 
-    settings.CACHES["search_services"] = {
-        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
-        "TIMEOUT": 300,
-        "OPTIONS": {"MAX_ENTRIES": 10000},
-    }
+    # search services are shared between the processes through the project cache,
+    # a different backend can be set with MAPSTORE_SEARCH_SERVICES_CACHE or by defining the alias in CACHES
+    if "search_services" not in settings.CACHES:
+        settings.CACHES["search_services"] = getattr(
+            settings, "MAPSTORE_SEARCH_SERVICES_CACHE", settings.CACHES["default"]
+        )
     settings.REST_API_PRESETS["catalog_list"] = {
         "exclude[]": ["*"],
         "include[]": [
@@ -318,6 +338,9 @@ class AppConfig(BaseAppConfig):
         if not apps.ready:
             run_setup_hooks()
             connect_geoserver_style_visual_mode_signal()
+
+            from geonode_mapstore_client.models import connect_metadata_cache_signals
+            connect_metadata_cache_signals()
             
             from geonode_mapstore_client.registry import request_configuration_rules_registry
             request_configuration_rules_registry.init_registry()
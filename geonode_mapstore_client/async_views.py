@@ -0,0 +1,101 @@
+"""
+Native async versions of the json endpoints of the client, for deployments running under ASGI.
+
+They return the same payloads and headers of ExtensionsView, PluginsConfigView and
+RequestConfigurationView, using the async cache and ORM APIs and reading the
+configuration files in a thread, so a request waiting for them does not hold a worker thread.
+They are used instead of the sync views with MAPSTORE_ASYNC_VIEWS = True.
+"""
+import asyncio
+
+from asgiref.sync import sync_to_async
+from django.core.cache import cache
+from django.http import HttpResponseNotAllowed, JsonResponse
+from rest_framework.exceptions import APIException
+from rest_framework.request import Request
+
+from geonode_mapstore_client.config_loader import get_static_config_path, load_json_config
+from geonode_mapstore_client.views import (
+    RequestConfigurationView,
+    _build_cached_response,
+    _build_request_rules_cache,
+    _compose_extensions,
+    _compose_plugins_config,
+    _get_conditional_response,
+    _get_request_rules_cache_key,
+    _get_request_rules_cache_timeout,
+    _get_request_rules_response,
+)
+
+
+async def _abuild_extensions_response():
+    from geonode_mapstore_client.models import Extension
+
+    index = await asyncio.to_thread(load_json_config, get_static_config_path("extensions", "index.json"), {})
+    extensions = Extension.objects.filter(active=True, published=True)
+    extensions = [ext async for ext in extensions]
+    return _build_cached_response(_compose_extensions(index, extensions))
+
+
+async def _abuild_plugins_config_response():
+    from geonode_mapstore_client.models import Extension
+
+    config_data = await asyncio.to_thread(
+        load_json_config, get_static_config_path("configs", "pluginsConfig.json"), {"plugins": []}
+    )
+    map_extensions = Extension.objects.filter(active=True, is_map_extension=True, published=True)
+    map_extensions = [ext async for ext in map_extensions]
+    return _build_cached_response(_compose_plugins_config(config_data, map_extensions))
+
+
+def _authenticate(request):
+    """
+    Returns the user of the request authenticated as in RequestConfigurationView, with its DRF authenticators:
+    the django session and the access tokens or the other credentials accepted by the API.
+    """
+    return Request(request, authenticators=RequestConfigurationView().get_authenticators()).user
+
+
+async def extensions(request):
+    from geonode_mapstore_client.utils import MAPSTORE_EXTENSIONS_CACHE_KEY, aget_extension_cache
+
+    if request.method not in ("GET", "HEAD"):
+        return HttpResponseNotAllowed(["GET", "HEAD"])
+    cached_response = await aget_extension_cache(MAPSTORE_EXTENSIONS_CACHE_KEY, _abuild_extensions_response)
+    return _get_conditional_response(request, cached_response)
+
+
+async def plugins_config(request):
+    from geonode_mapstore_client.utils import MAPSTORE_PLUGINS_CACHE_KEY, aget_extension_cache
+
+    if request.method not in ("GET", "HEAD"):
+        return HttpResponseNotAllowed(["GET", "HEAD"])
+    cached_response = await aget_extension_cache(MAPSTORE_PLUGINS_CACHE_KEY, _abuild_plugins_config_response)
+    return _get_conditional_response(request, cached_response)
+
+
+async def request_rules(request):
+    """
+    Async version of RequestConfigurationView, with the same authentication.
+    """
+    from geonode_mapstore_client.handlers import aget_user_access_token
+    from geonode_mapstore_client.registry import RequestConfigurationRulesRegistry
+
+    if request.method not in ("GET", "HEAD"):
+        return HttpResponseNotAllowed(["GET", "HEAD"])
+    # resolved once, handlers read request.user
+    try:
+        request.user = await sync_to_async(_authenticate)(request)
+    except APIException as e:
+        return JsonResponse({"detail": e.detail}, status=e.status_code)
+
+    registry = RequestConfigurationRulesRegistry()
+    token = await aget_user_access_token(request) if request.user.is_authenticated else None
+    cache_key, max_age = _get_request_rules_cache_key(request, registry, token)
+    cached_rules = await cache.aget(cache_key)
+    if cached_rules is None:
+        cached_rules = _build_request_rules_cache(await registry.aget_rules(request))
+        timeout = _get_request_rules_cache_timeout(registry, max_age)
+        if timeout:
+            await cache.aset(cache_key, cached_rules, timeout=timeout)
+    return _get_request_rules_response(request, registry, cached_rules, max_age, JsonResponse)
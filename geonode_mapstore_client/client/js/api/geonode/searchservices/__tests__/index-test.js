@@ -0,0 +1,54 @@
+/*
+ * Copyright 2026, GeoSolutions Sas.
+ * All rights reserved.
+ *
+ * This source code is licensed under the BSD-style license found in the
+ * LICENSE file in the root directory of this source tree.
+ */
+
+import expect from 'expect';
+import MockAdapter from 'axios-mock-adapter';
+import axios from '@mapstore/framework/libs/ajax';
+import { API } from '@mapstore/framework/api/searchText';
+import {
+    GEONODE_SEARCH_SERVICE_TYPE,
+    searchGeoNodeService,
+    registerGeoNodeSearchServices
+} from '@js/api/geonode/searchservices';
+
+let mockAxios;
+
+describe('GeoNode search services api', () => {
+    beforeEach(done => {
+        mockAxios = new MockAdapter(axios);
+        setTimeout(done);
+    });
+
+    afterEach(done => {
+        mockAxios.restore();
+        setTimeout(done);
+    });
+    it('should return the features of the search endpoint', (done) => {
+        const features = [{ type: 'Feature', properties: { name: 'Rome' } }];
+        mockAxios.onGet(/\/api\/v2\/searchservices\/1\/search/)
+            .reply((config) => {
+                try {
+                    expect(config.params).toEqual({ q: 'rom' });
+                    expect(config.withCredentials).toBe(true);
+                } catch (e) {
+                    done(e);
+                }
+                return [200, { type: 'FeatureCollection', features }];
+            });
+        searchGeoNodeService('rom', { url: '/api/v2/searchservices/1/search' })
+            .then((response) => {
+                expect(response).toEqual(features);
+                done();
+            })
+            .catch(done);
+    });
+    it('should register the search service type', () => {
+        registerGeoNodeSearchServices();
+        expect(API.Utils.getService(GEONODE_SEARCH_SERVICE_TYPE)).toBe(searchGeoNodeService);
+    });
+});
@@ -0,0 +1,46 @@
+/*
+ * Copyright 2026, GeoSolutions Sas.
+ * All rights reserved.
+ *
+ * This source code is licensed under the BSD-style license found in the
+ * LICENSE file in the root directory of this source tree.
+ */
+
+import axios from '@mapstore/framework/libs/ajax';
+import { API } from '@mapstore/framework/api/searchText';
+
+/**
+ * Search services of the GeoNode search services queried through the server
+ * @module api/geonode/searchservices
+ */
+
+/**
+ * type of the services emitted by the server for the search services answered by the search-service-search endpoint
+ */
+export const GEONODE_SEARCH_SERVICE_TYPE = 'geonode';
+
+/**
+ * Search service querying a GeoNode search service through the server, with the session of the user
+ * @param {string} searchText text to search
+ * @param {object} options options of the service, `url` is the search endpoint of the service
+ * @return {Promise} promise resolved with the GeoJSON features, like the wfs search service
+ */
+export const searchGeoNodeService = (searchText, { url } = {}) => {
+    return axios.get(url, {
+        params: { q: searchText },
+        withCredentials: true
+    })
+        .then(({ data }) => data?.features || []);
+};
+
+/**
+ * Registers the search services of GeoNode in the search text API used by the Search plugin
+ */
+export const registerGeoNodeSearchServices = () => {
+    API.Utils.setService(GEONODE_SEARCH_SERVICE_TYPE, searchGeoNodeService);
+};
+
+export default {
+    searchGeoNodeService,
+    registerGeoNodeSearchServices
+};
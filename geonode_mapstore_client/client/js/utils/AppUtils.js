@@ -36,6 +36,7 @@ import { setViewer } from '@mapstore/framework/utils/MapInfoUtils';
 import { setObservableConfig } from 'recompose';
 import rxjsConfig from 'recompose/rxjsObservableConfig';
 import { getGeoNodeConfig, getGeoNodeLocalConfig } from "@js/utils/APIUtils";
+import { registerGeoNodeSearchServices } from '@js/api/geonode/searchservices';
 setObservableConfig(rxjsConfig);
 
 let actionListeners = {};
@@ -168,6 +169,8 @@ export function setupConfiguration({
     // set the extensions path before get the localConfig
     // so it's possible to override in a custom project
     setConfigProp('extensionsRegistry', '/client/extensions');
+    // search services of GeoNode queried through the server
+    registerGeoNodeSearchServices();
     const {
         supportedLocales: defaultSupportedLocales,
         ...config
@@ -0,0 +1,82 @@
+import os
+import json
+import threading
+from collections.abc import Mapping
+from types import MappingProxyType
+
+from django.conf import settings
+
+# parsed files by path, with the (mtime, size) signature of the file read
+_json_configs = {}
+_json_configs_lock = threading.Lock()
+
+
+def freeze(value):
+    """
+    Returns a read only version of a parsed json value,
+    objects become mapping proxies and arrays become tuples.
+    """
+    if isinstance(value, dict):
+        return MappingProxyType({key: freeze(item) for key, item in value.items()})
+    if isinstance(value, list):
+        return tuple(freeze(item) for item in value)
+    return value
+
+
+def thaw(value):
+    """Returns a mutable deep copy of a value returned by load_json_config."""
+    if isinstance(value, Mapping):
+        return {key: thaw(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [thaw(item) for item in value]
+    return value
+
+
+def json_default(value):
+    """`default` argument of json.dumps to serialize values returned by load_json_config."""
+    if isinstance(value, Mapping):
+        return dict(value)
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def get_static_config_path(*paths):
+    return os.path.join(settings.STATIC_ROOT, "mapstore", *paths)
+
+
+def get_file_signature(path):
+    """Returns the (mtime, size) of a file, or None if missing."""
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return (stat.st_mtime_ns, stat.st_size)
+
+
+def load_json_config(path, default=None):
+    """
+    Returns the parsed content of a json file, memoized per process.
+    The file is parsed again only when its mtime or size change, so every call costs a single stat.
+    The returned value is read only and shared between callers, use thaw to get a mutable copy.
+    """
+    signature = get_file_signature(path)
+    if signature is None:
+        return default
+
+    cached = _json_configs.get(path)
+    if cached and cached[0] == signature:
+        return cached[1]
+
+    try:
+        with open(path, "r") as f:
+            data = freeze(json.load(f))
+    except (FileNotFoundError, json.JSONDecodeError):
+        return default
+
+    with _json_configs_lock:
+        _json_configs[path] = (signature, data)
+    return data
+
+
+def clear_json_configs():
+    with _json_configs_lock:
+        _json_configs.clear()
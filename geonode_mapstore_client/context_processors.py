@@ -10,13 +10,60 @@
 #########################################################################
 
 from django.conf import settings
+from django.core.cache import cache
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+from django.templatetags.static import static
+from django.urls import reverse
 
 from geonode.upload.utils import get_max_upload_size, get_max_upload_parallelism_limit
 from geonode.utils import get_supported_datasets_file_types
+from geonode_mapstore_client.static_manifest import get_hashed_path
+from geonode_mapstore_client.templatetags.client_version import get_client_version
+from geonode_mapstore_client.translations import get_translations_slice_path
+from geonode_mapstore_client.utils import (
+    MAPSTORE_UPLOAD_LIMITS_CACHE_KEY,
+    MAPSTORE_UPLOAD_LIMITS_CACHE_TIMEOUT,
+)
 
+# settings based values, computed once per process and reset when the settings change
+_static_geonode_settings = None
+
+
+@receiver(setting_changed)
+def reset_static_geonode_settings(**kwargs):
+    global _static_geonode_settings
+    _static_geonode_settings = None
+
+
+def get_upload_limits():
+    """
+    Returns the upload limits stored in the database,
+    cached until an upload size or parallelism limit changes
+    """
+    upload_limits = cache.get(MAPSTORE_UPLOAD_LIMITS_CACHE_KEY)
+    if upload_limits is None:
+        upload_limits = {
+            "DATASET_MAX_UPLOAD_SIZE": get_max_upload_size("dataset_upload_size"),
+            "DOCUMENT_MAX_UPLOAD_SIZE": get_max_upload_size("document_upload_size"),
+            "MAX_PARALLEL_UPLOADS": get_max_upload_parallelism_limit(
+                "default_max_parallel_uploads"
+            ),
+        }
+        cache.set(
+            MAPSTORE_UPLOAD_LIMITS_CACHE_KEY,
+            upload_limits,
+            timeout=MAPSTORE_UPLOAD_LIMITS_CACHE_TIMEOUT,
+        )
+    return upload_limits
+
+
+def get_static_geonode_settings():
+    """Settings based values, they don't change for the life of the process"""
+    global _static_geonode_settings
+    if _static_geonode_settings is not None:
+        return _static_geonode_settings
 
-def resource_urls(request):
-    """Global values to pass to templates"""
     SITE_URL = (getattr(settings, "SITEURL", "") or "").rstrip("/")
     default_catalogue_selected_service = "GeoNode"
     default_catalogue_services = {
@@ -27,8 +74,7 @@ def resource_urls(request):
             "title": "GeoNode"
         }
     }
-    defaults = dict(GEOAPPS=["GeoStory", "GeoDashboard", "MapViewer"])
-    defaults["GEONODE_SETTINGS"] = {
+    _static_geonode_settings = {
         "MAP_BASELAYERS": getattr(settings, "MAPSTORE_BASELAYERS", []),
         "MAP_BASELAYERS_SOURCES": getattr(settings, "MAPSTORE_BASELAYERS_SOURCES", {}),
         "CATALOGUE_SERVICES": getattr(settings, "MAPSTORE_CATALOGUE_SERVICES", default_catalogue_services),
@@ -45,22 +91,20 @@ def resource_urls(request):
         "DEFAULT_MAP_CRS": getattr(settings, "DEFAULT_MAP_CRS", "EPSG:3857"),
         "DEFAULT_MAP_ZOOM": getattr(settings, "DEFAULT_MAP_ZOOM", 0),
         "DEFAULT_TILE_SIZE": getattr(settings, "DEFAULT_TILE_SIZE", 512),
-        "DATASET_MAX_UPLOAD_SIZE": get_max_upload_size("dataset_upload_size"),
-        "DOCUMENT_MAX_UPLOAD_SIZE": get_max_upload_size("document_upload_size"),
         "DEFAULT_LAYER_FORMAT": getattr(settings, "DEFAULT_LAYER_FORMAT", "image/png"),
         "DEFAULT_THUMBNAIL_SIZE": getattr(
             settings, "THUMBNAIL_SIZE", {"width": 500, "height": 200}
         ),
-        "MAX_PARALLEL_UPLOADS": get_max_upload_parallelism_limit(
-            "default_max_parallel_uploads"
-        ),
         "ALLOWED_DOCUMENT_TYPES": getattr(settings, "ALLOWED_DOCUMENT_TYPES", []),
         "LANGUAGES": getattr(settings, "LANGUAGES", []),
         "WMS_MAX_URL_LENGTH": getattr(settings, "WMS_MAX_URL_LENGTH", None),
         "TRANSLATIONS_PATH": getattr(
             settings,
             "MAPSTORE_TRANSLATIONS_PATH",
-            ["/static/mapstore/ms-translations", "/static/mapstore/gn-translations"],
+            [
+                static(get_hashed_path(path) or path)
+                for path in ["mapstore/ms-translations", "mapstore/gn-translations"]
+            ],
         ),
         "PROJECTION_DEFS": getattr(settings, "MAPSTORE_PROJECTION_DEFS", []),
         "PROJECTION_DEFS_ENDPOINT": getattr(
@@ -71,6 +115,10 @@ def resource_urls(request):
         "PLUGINS_CONFIG_PATCH_RULES": getattr(
             settings, "MAPSTORE_PLUGINS_CONFIG_PATCH_RULES", []
         ),
+        # patch rules are applied by the server when the client loads the pre-merged localConfig.json
+        "LOCAL_CONFIG_URL": reverse("mapstore-localconfig")
+        if getattr(settings, "MAPSTORE_SERVER_SIDE_LOCAL_CONFIG", False)
+        else None,
         "EXTENSIONS_FOLDER_PATH": settings.STATIC_URL + getattr(
             settings, "MAPSTORE_EXTENSIONS_FOLDER_PATH", "mapstore/extensions/"
         ),
@@ -88,4 +136,19 @@ def resource_urls(request):
         "USE_CORS": getattr(settings, "MAPSTORE_USE_CORS", []),
         "CHECK_SESSION_INTERVAL": getattr(settings, "CHECK_SESSION_INTERVAL", 15 * 60 * 1000),  # 15 minutes
     }
+    return _static_geonode_settings
+
+
+def resource_urls(request):
+    """Global values to pass to templates"""
+    defaults = dict(GEOAPPS=["GeoStory", "GeoDashboard", "MapViewer"])
+    defaults["CLIENT_VERSION"] = get_client_version()
+    defaults["GEONODE_SETTINGS"] = {
+        **get_static_geonode_settings(),
+        **get_upload_limits(),
+    }
+    if not hasattr(settings, "MAPSTORE_TRANSLATIONS_PATH"):
+        translations_path = get_translations_slice_path(request)
+        if translations_path:
+            defaults["GEONODE_SETTINGS"]["TRANSLATIONS_PATH"] = translations_path
     return defaults
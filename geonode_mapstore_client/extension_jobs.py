@@ -0,0 +1,152 @@
+"""
+Background jobs installing and removing the MapStore extensions.
+
+Saving a new file only records the extension as pending, the file is extracted by a job
+running after the transaction is committed, which records the outcome on the extension.
+The views serve the published extensions: a new extension is published once its first file
+is extracted, a published one keeps serving its previous version until a new file is extracted,
+also when the extraction of the new file fails.
+Jobs lost with the process running them, e.g. on a restart, are scheduled again by
+requeue_extension_jobs, for the extensions pending since MAPSTORE_EXTENSION_JOBS_STALE_AFTER seconds.
+Jobs run on the executor set by MAPSTORE_EXTENSION_JOBS_EXECUTOR:
+- "celery": a task of the GeoNode celery workers, the default with ASYNC_SIGNALS
+- "thread": a local thread pool of MAPSTORE_EXTENSION_JOBS_WORKERS threads, the default otherwise
+- "sync": in the request, useful for tests
+"""
+import os
+import time
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connections, transaction
+from django.utils import timezone
+
+from geonode_mapstore_client.extensions import extract_extension, remove_extension
+from geonode_mapstore_client.utils import clear_extension_caches
+
+logger = logging.getLogger(__name__)
+
+EXECUTOR_CELERY = "celery"
+EXECUTOR_THREAD = "thread"
+EXECUTOR_SYNC = "sync"
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def install_extension(pk):
+    """Extracts the uploaded file of a pending extension and records the outcome."""
+    from geonode_mapstore_client.models import Extension
+
+    extension = Extension.objects.filter(pk=pk).first()
+    # deleted, or processed by a previous job
+    if extension is None or extension.status != Extension.STATUS_PENDING:
+        return
+
+    start = time.perf_counter()
+    try:
+        extracted_bytes = extract_extension(extension.uploaded_file.path, extension.name)
+        result = {
+            "status": Extension.STATUS_READY,
+            "published": True,
+            "extracted_bytes": extracted_bytes,
+            "processing_error": "",
+        }
+    except Exception as e:
+        logger.error(f"Extension {extension.name} not extracted: {e}")
+        # the files of the previous version are still in place and published
+        result = {"status": Extension.STATUS_FAILED, "extracted_bytes": None, "processing_error": str(e)}
+    # a file uploaded in the meantime keeps the extension pending, for the job scheduled by its upload
+    Extension.objects.filter(pk=pk, uploaded_file=extension.uploaded_file.name).update(
+        processing_duration=time.perf_counter() - start, updated_at=timezone.now(), **result
+    )
+    clear_extension_caches()
+
+
+def uninstall_extension(name, uploaded_file_path):
+    """Removes the files of a deleted extension."""
+    from geonode_mapstore_client.models import Extension
+
+    # an extension with the same name uploaded in the meantime
+    if name and not Extension.objects.filter(name=name).exists():
+        remove_extension(name)
+    if uploaded_file_path and os.path.exists(uploaded_file_path):
+        os.remove(uploaded_file_path)
+    clear_extension_caches()
+
+
+JOBS = {job.__name__: job for job in (install_extension, uninstall_extension)}
+
+
+def run_extension_job(job_name, *args):
+    JOBS[job_name](*args)
+
+
+def get_jobs_executor():
+    default = EXECUTOR_CELERY if getattr(settings, "ASYNC_SIGNALS", False) else EXECUTOR_THREAD
+    return getattr(settings, "MAPSTORE_EXTENSION_JOBS_EXECUTOR", default)
+
+
+def _get_executor():
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                # a single worker by default, jobs of the same extension run in order
+                _executor = ThreadPoolExecutor(
+                    max_workers=getattr(settings, "MAPSTORE_EXTENSION_JOBS_WORKERS", 1),
+                    thread_name_prefix="extension-jobs",
+                )
+    return _executor
+
+
+def _run_in_thread(job_name, args):
+    try:
+        run_extension_job(job_name, *args)
+    except Exception as e:
+        logger.exception(f"Extension job {job_name}{args} failed: {e}")
+    finally:
+        # connections opened by the job belong to the pool thread
+        connections.close_all()
+
+
+def _dispatch(executor, job_name, args):
+    if executor == EXECUTOR_CELERY:
+        from geonode_mapstore_client.tasks import run_extension_job_task
+
+        run_extension_job_task.delay(job_name, *args)
+    else:
+        _get_executor().submit(_run_in_thread, job_name, args)
+
+
+def submit_extension_job(job, *args):
+    """Runs a job on the configured executor, once the current transaction is committed."""
+    executor = get_jobs_executor()
+    if executor == EXECUTOR_SYNC:
+        run_extension_job(job.__name__, *args)
+    else:
+        transaction.on_commit(lambda: _dispatch(executor, job.__name__, args))
+
+
+def requeue_extension_jobs(stale_after=None):
+    """
+    Schedules again the extraction of the extensions pending for more than stale_after seconds,
+    their job was lost. Returns the extensions scheduled.
+    """
+    from geonode_mapstore_client.models import Extension
+
+    if stale_after is None:
+        stale_after = getattr(settings, "MAPSTORE_EXTENSION_JOBS_STALE_AFTER", 60 * 10)  # seconds
+    extensions = list(
+        Extension.objects.filter(
+            status=Extension.STATUS_PENDING, updated_at__lt=timezone.now() - timedelta(seconds=stale_after)
+        )
+    )
+    for extension in extensions:
+        # install_extension skips the extensions already processed, a job running twice is harmless
+        submit_extension_job(install_extension, extension.pk)
+    return extensions
@@ -0,0 +1,139 @@
+"""
+Installation of the MapStore extensions uploaded as zip files.
+
+The files of an extension are served from a folder of STATIC_ROOT named as the extension.
+A new upload is extracted, streaming each entry, in a new folder next to it and the folder
+of the extension becomes a symbolic link to it, replaced atomically: clients see either
+all the files of the previous version or all the files of the new one. Archives bigger
+than the size, entries or compression ratio limits are rejected before anything is written.
+"""
+import os
+import shutil
+import zipfile
+import tempfile
+import posixpath
+
+from django.conf import settings
+
+from geonode_mapstore_client import GeoNodeMapstore2Exception
+
+EXTRACT_CHUNK_SIZE = 1024 * 1024
+# folders are readable by the web server serving the static files
+FOLDER_MODE = 0o755
+
+
+class ExtensionExtractionError(GeoNodeMapstore2Exception):
+    pass
+
+
+def get_extension_limits():
+    return {
+        "max_size": getattr(settings, "MAPSTORE_EXTENSION_MAX_SIZE", 250 * 1024 * 1024),  # bytes, uncompressed
+        "max_entries": getattr(settings, "MAPSTORE_EXTENSION_MAX_ENTRIES", 10000),
+        "max_ratio": getattr(settings, "MAPSTORE_EXTENSION_MAX_RATIO", 200),
+    }
+
+
+def get_extension_path(name):
+    return os.path.join(settings.STATIC_ROOT, settings.MAPSTORE_EXTENSIONS_FOLDER_PATH, name)
+
+
+def _get_entry_path(name):
+    # entries outside of the extension folder are rejected, as done by extractall
+    path = posixpath.normpath(name.replace("\\", "/"))
+    if path.startswith(("/", "../")) or path == ".." or ":" in path.split("/")[0]:
+        raise ExtensionExtractionError(f"Invalid path in the zip file: {name}")
+    return path
+
+
+def check_zip_limits(zip_ref):
+    """Checks the sizes declared by the zip entries, returns their total uncompressed size."""
+    limits = get_extension_limits()
+    entries = zip_ref.infolist()
+    if len(entries) > limits["max_entries"]:
+        raise ExtensionExtractionError(
+            f"The zip file contains {len(entries)} entries, the maximum is {limits['max_entries']}."
+        )
+    size = sum(entry.file_size for entry in entries)
+    if size > limits["max_size"]:
+        raise ExtensionExtractionError(
+            f"The zip file expands to {size} bytes, the maximum is {limits['max_size']}."
+        )
+    compressed_size = sum(entry.compress_size for entry in entries)
+    if size > limits["max_ratio"] * max(compressed_size, 1):
+        raise ExtensionExtractionError(
+            f"The compression ratio of the zip file exceeds the maximum of {limits['max_ratio']}."
+        )
+    for entry in entries:
+        _get_entry_path(entry.filename)
+    return size
+
+
+def _extract(zip_ref, folder_path, max_size):
+    written = 0
+    for entry in zip_ref.infolist():
+        path = os.path.join(folder_path, *_get_entry_path(entry.filename).split("/"))
+        if entry.is_dir():
+            os.makedirs(path, exist_ok=True)
+            continue
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # the declared sizes are checked, the bytes written are counted too
+        with zip_ref.open(entry) as source, open(path, "wb") as target:
+            for chunk in iter(lambda: source.read(EXTRACT_CHUNK_SIZE), b""):
+                written += len(chunk)
+                if written > max_size:
+                    raise ExtensionExtractionError(f"The zip file expands to more than {max_size} bytes.")
+                target.write(chunk)
+    return written
+
+
+def _remove_version(path):
+    if path and os.path.isdir(path) and not os.path.islink(path):
+        shutil.rmtree(path, ignore_errors=True)
+
+
+def _get_current_version(target_path):
+    if os.path.islink(target_path):
+        return os.path.join(os.path.dirname(target_path), os.readlink(target_path))
+    return None
+
+
+def extract_extension(zip_path, name):
+    """
+    Extracts the zip file of an extension and publishes its folder atomically, returns the bytes written.
+    The previous version is served until the new one is complete and it is kept when the extraction fails.
+    """
+    target_path = get_extension_path(name)
+    parent_path = os.path.dirname(target_path)
+    os.makedirs(parent_path, exist_ok=True)
+    with zipfile.ZipFile(zip_path, "r") as zip_ref:
+        check_zip_limits(zip_ref)
+        version_path = tempfile.mkdtemp(prefix=f".{name}.", dir=parent_path)
+        try:
+            written = _extract(zip_ref, version_path, get_extension_limits()["max_size"])
+            os.chmod(version_path, FOLDER_MODE)
+        except BaseException:
+            shutil.rmtree(version_path, ignore_errors=True)
+            raise
+
+    previous_path = _get_current_version(target_path)
+    if os.path.isdir(target_path) and not os.path.islink(target_path):
+        # folder extracted in place by previous versions of the app, it becomes a link from now on
+        previous_path = f"{version_path}.previous"
+        os.replace(target_path, previous_path)
+    link_path = f"{version_path}.link"
+    os.symlink(os.path.basename(version_path), link_path)
+    os.replace(link_path, target_path)
+    _remove_version(previous_path)
+    return written
+
+
+def remove_extension(name):
+    """Removes the published folder of an extension and its files."""
+    target_path = get_extension_path(name)
+    version_path = _get_current_version(target_path)
+    if os.path.islink(target_path):
+        os.remove(target_path)
+    elif os.path.isdir(target_path):
+        shutil.rmtree(target_path)
+    _remove_version(version_path)
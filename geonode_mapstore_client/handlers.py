@@ -1,7 +1,52 @@
+from asgiref.sync import sync_to_async
 from django.conf import settings
+from django.utils import timezone
+from oauth2_provider.models import AccessToken
 from geonode.base.auth import get_or_create_token
 from .registry import BaseRequestConfigurationRuleHandler
 
+ACCESS_TOKEN_ATTR = "_mapstore_access_token"
+
+
+def get_user_access_token(request):
+    """
+    Returns the access token of the authenticated user of the request, looked up once per request.
+    The lookup is read only, a token is created or refreshed only when the user has no valid one.
+    """
+    token = getattr(request, ACCESS_TOKEN_ATTR, None)
+    if token is None:
+        token = (
+            AccessToken.objects.filter(
+                user=request.user,
+                application__name="GeoServer",
+                expires__gt=timezone.now(),
+            )
+            .order_by("-expires")
+            .first()
+        )
+        if token is None:
+            token = get_or_create_token(request.user)
+        setattr(request, ACCESS_TOKEN_ATTR, token)
+    return token
+
+
+async def aget_user_access_token(request):
+    """Async version of get_user_access_token."""
+    token = getattr(request, ACCESS_TOKEN_ATTR, None)
+    if token is None:
+        token = await (
+            AccessToken.objects.filter(
+                user=request.user,
+                application__name="GeoServer",
+                expires__gt=timezone.now(),
+            )
+            .order_by("-expires")
+            .afirst()
+        )
+        if token is None:
+            token = await sync_to_async(get_or_create_token)(request.user)
+        setattr(request, ACCESS_TOKEN_ATTR, token)
+    return token
 
 
 class BaseConfigurationRuleHandler(BaseRequestConfigurationRuleHandler):
@@ -14,7 +59,7 @@ class BaseConfigurationRuleHandler(BaseRequestConfigurationRuleHandler):
         if not user.is_authenticated:
             return []
         rules = []
-        token_obj = get_or_create_token(user)
+        token_obj = get_user_access_token(request)
         access_token = token_obj.token
 
         rules.extend(
@@ -0,0 +1,35 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from geonode_mapstore_client.models import SearchService
+from geonode_mapstore_client.search_index import build_search_index
+from geonode_mapstore_client.search_proxy import SearchProxyError
+
+
+class Command(BaseCommand):
+    help = "Builds the local index of the search services in indexed mode"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "ids",
+            nargs="*",
+            type=int,
+            help="Ids of the search services to index, all the indexed ones if omitted",
+        )
+
+    def handle(self, *args, **options):
+        services = SearchService.objects.filter(indexed=True)
+        if options["ids"]:
+            services = services.filter(pk__in=options["ids"])
+
+        failed = []
+        for service in services:
+            try:
+                count = build_search_index(service)
+            except SearchProxyError as e:
+                failed.append(service)
+                self.stderr.write(f"{service}: {e}")
+                continue
+            self.stdout.write(f"{service}: {count} features indexed")
+
+        if failed:
+            raise CommandError(f"{len(failed)} search indexes not built")
@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+
+from geonode_mapstore_client.static_manifest import build_static_manifest
+
+
+class Command(BaseCommand):
+    help = (
+        "Writes the content hashed copies of the MapStore bundles and translations and their manifest, "
+        "to run after collectstatic"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--static-root", help="Folder of the collected static files, STATIC_ROOT by default")
+
+    def handle(self, *args, **options):
+        paths = build_static_manifest(options["static_root"])
+        self.stdout.write(f"{len(paths)} static paths hashed")
@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+
+from geonode_mapstore_client.translations import build_translation_slices
+
+
+class Command(BaseCommand):
+    help = "Writes the merged MapStore and GeoNode translations of each client app, to run after collectstatic"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--static-root", help="Folder of the collected static files, STATIC_ROOT by default")
+
+    def handle(self, *args, **options):
+        for app, sizes in build_translation_slices(options["static_root"]).items():
+            self.stdout.write(
+                f"{app}: {sizes['size']} bytes ({sizes['compressed_size']} with gzip), "
+                f"the source files are {sizes['source_size']} bytes ({sizes['source_compressed_size']} with gzip)"
+            )
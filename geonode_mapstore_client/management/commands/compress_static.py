@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+
+from geonode_mapstore_client.static_compression import compress_static_files
+
+
+class Command(BaseCommand):
+    help = "Writes the gzip and brotli compressed copies of the MapStore static files, to run after collectstatic"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--static-root", help="Folder of the collected static files, STATIC_ROOT by default")
+        parser.add_argument("--workers", type=int, help="Number of processes compressing the files")
+        parser.add_argument("--force", action="store_true", help="Compress also the files not changed")
+
+    def handle(self, *args, **options):
+        report = compress_static_files(options["static_root"], workers=options["workers"], force=options["force"])
+        self.stdout.write(
+            f"{report['compressed']} files compressed, {report['skipped']} not changed, "
+            f"{report['original']} bytes compressed"
+        )
+        for encoding, saved in report["saved"].items():
+            self.stdout.write(f"{encoding}: {saved} bytes saved")
@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+
+from geonode_mapstore_client.extension_jobs import requeue_extension_jobs
+
+
+class Command(BaseCommand):
+    help = "Schedules again the extraction of the extensions pending for too long, e.g. after a restart of the workers"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--stale-after",
+            type=int,
+            default=None,
+            help="Seconds after which a pending extension is scheduled again, "
+            "MAPSTORE_EXTENSION_JOBS_STALE_AFTER by default",
+        )
+
+    def handle(self, *args, **options):
+        for extension in requeue_extension_jobs(options["stale_after"]):
+            self.stdout.write(f"{extension}: extraction scheduled again")
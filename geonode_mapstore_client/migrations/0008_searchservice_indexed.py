@@ -0,0 +1,33 @@
+# Generated by Django 5.2.7 on 2026-10-17 10:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("geonode_mapstore_client", "0007_searchservice_sub_title_and_more"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="searchservice",
+            name="indexed",
+            field=models.BooleanField(
+                default=False,
+                help_text="Answer the searches from a local index of the layer features, only for small layers",
+                verbose_name="Indexed",
+            ),
+        ),
+        migrations.AddField(
+            model_name="searchservice",
+            name="index_refresh_interval",
+            field=models.PositiveIntegerField(
+                blank=True,
+                help_text="Seconds after which the local index is built again, "
+                "leave empty to refresh it only with the build_search_indexes command",
+                null=True,
+                verbose_name="Index refresh interval",
+            ),
+        ),
+    ]
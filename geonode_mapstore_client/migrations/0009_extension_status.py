@@ -0,0 +1,60 @@
+# Generated by Django 5.2.7 on 2026-10-17 12:00
+
+from django.db import migrations, models
+
+
+def publish_extensions(apps, schema_editor):
+    # the extensions served until now
+    Extension = apps.get_model("geonode_mapstore_client", "Extension")
+    Extension.objects.update(published=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("geonode_mapstore_client", "0008_searchservice_indexed"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="extension",
+            name="status",
+            field=models.CharField(
+                choices=[("pending", "Pending"), ("ready", "Ready"), ("failed", "Failed")],
+                default="ready",
+                editable=False,
+                help_text="Extensions are published once the uploaded file is extracted.",
+                max_length=16,
+            ),
+        ),
+        migrations.AddField(
+            model_name="extension",
+            name="processing_duration",
+            field=models.FloatField(
+                blank=True, editable=False, help_text="Seconds spent extracting the uploaded file.", null=True
+            ),
+        ),
+        migrations.AddField(
+            model_name="extension",
+            name="extracted_bytes",
+            field=models.BigIntegerField(
+                blank=True, editable=False, help_text="Size of the extracted files in bytes.", null=True
+            ),
+        ),
+        migrations.AddField(
+            model_name="extension",
+            name="processing_error",
+            field=models.TextField(blank=True, default="", editable=False),
+        ),
+        migrations.AddField(
+            model_name="extension",
+            name="published",
+            field=models.BooleanField(
+                default=False,
+                editable=False,
+                help_text="Whether a version of the extension is extracted and served, "
+                "the previous version is served until a new file is extracted.",
+            ),
+        ),
+        migrations.RunPython(publish_extensions, migrations.RunPython.noop),
+    ]
@@ -1,18 +1,30 @@
 import os
-import shutil
-import zipfile
 from django.db import models
 from django.utils.translation import gettext_lazy as _
 from django.contrib.postgres.fields import ArrayField
 from django.dispatch import receiver
 from django.db.models import signals
-from django.core.cache import caches
 from django.db import models
-from geonode_mapstore_client.utils import validate_zip_file, clear_extension_caches
+from geonode.base.models import Configuration, ResourceBase, Link, Menu, MenuItem, MenuPlaceholder
+from geonode.upload.models import UploadParallelismLimit, UploadSizeLimit
+from geonode_mapstore_client.utils import (
+    validate_zip_file,
+    clear_extension_caches,
+    clear_local_config_cache,
+    clear_all_metadata_cache,
+    clear_metadata_cache,
+    clear_upload_limits_cache,
+)
 from geonode_mapstore_client.templatetags.get_search_services import (
-    populate_search_service_options,
+    clear_search_services_cache,
 )
-from django.conf import settings
+from geonode_mapstore_client.templatetags.get_menu_json import clear_navigation_cache
+from geonode_mapstore_client.search_proxy import clear_search_results
+from geonode_mapstore_client.search_index import clear_search_index
+from geonode_mapstore_client.extension_jobs import install_extension, submit_extension_job, uninstall_extension
+
+# fields of the owner shown by the metadata pages
+OWNER_METADATA_FIELDS = {"first_name", "last_name", "email", "position", "organization", "location", "voice", "fax"}
 
 
 class SearchService(models.Model):
@@ -80,18 +92,93 @@ class SearchService(models.Model):
         default=20,
         help_text="Max number of feature returned by the search",
     )
+    indexed = models.BooleanField(
+        default=False,
+        verbose_name="Indexed",
+        help_text="Answer the searches from a local index of the layer features, only for small layers",
+    )
+    index_refresh_interval = models.PositiveIntegerField(
+        null=True,
+        blank=True,
+        verbose_name="Index refresh interval",
+        help_text="Seconds after which the local index is built again, "
+        "leave empty to refresh it only with the build_search_indexes command",
+    )
 
 
 @receiver(signals.post_save, sender=SearchService)
-def post_save_search_service(instance, sender, created, **kwargs):
-    # reset subsite object cache
-    services_cache = caches["search_services"]
-    services = services_cache.get("search_services")
-    if services:
-        services_cache.delete("search_services")
+@receiver(signals.post_delete, sender=SearchService)
+def post_save_search_service(instance, sender, **kwargs):
+    # stamp a new version of the services shared by all the processes
+    clear_search_services_cache()
+    clear_search_results(instance.pk)
+    clear_local_config_cache()
+    if not instance.indexed or kwargs.get("signal") is signals.post_delete:
+        clear_search_index(instance.pk)
+
+
+def invalidate_resource_metadata_cache(sender, instance, **kwargs):
+    """
+    Drops the cached metadata page of a resource when it changes.
+    Connected to every ResourceBase subclass by connect_metadata_cache_signals.
+    """
+    clear_metadata_cache(instance.pk)
+
+
+def invalidate_link_metadata_cache(sender, instance, **kwargs):
+    if instance.resource_id:
+        clear_metadata_cache(instance.resource_id)
+
+
+def invalidate_owner_metadata_cache(sender, instance, **kwargs):
+    """Drops the cached metadata pages of the resources of a user, the pages show the owner profile."""
+    update_fields = kwargs.get("update_fields")
+    # e.g. last_login, updated at every login
+    if update_fields and not set(update_fields) & OWNER_METADATA_FIELDS:
+        return
+    clear_metadata_cache(*ResourceBase.objects.filter(owner=instance).values_list("pk", flat=True))
+
+
+def invalidate_all_metadata_cache(sender, instance, **kwargs):
+    """Drops all the cached metadata pages when the thesauri used by the metadata schema change."""
+    clear_all_metadata_cache()
 
-    services_cache.set("search_services", populate_search_service_options(), 300)
 
+def connect_metadata_cache_signals():
+    from django.apps import apps
+    from django.contrib.auth import get_user_model
+    from geonode.base.models import Thesaurus, ThesaurusKeyword, ThesaurusKeywordLabel, ThesaurusLabel
+
+    receivers = [
+        (model, invalidate_resource_metadata_cache) for model in apps.get_models() if issubclass(model, ResourceBase)
+    ]
+    receivers += [(Link, invalidate_link_metadata_cache), (get_user_model(), invalidate_owner_metadata_cache)]
+    receivers += [
+        (model, invalidate_all_metadata_cache)
+        for model in (Thesaurus, ThesaurusKeyword, ThesaurusKeywordLabel, ThesaurusLabel)
+    ]
+    for model, handler in receivers:
+        for signal in (signals.post_save, signals.post_delete):
+            signal.connect(handler, sender=model, dispatch_uid=f"mapstore_metadata_cache_{model._meta.label}")
+
+
+@receiver(signals.post_save, sender=UploadSizeLimit)
+@receiver(signals.post_delete, sender=UploadSizeLimit)
+@receiver(signals.post_save, sender=UploadParallelismLimit)
+@receiver(signals.post_delete, sender=UploadParallelismLimit)
+def invalidate_upload_limits_cache(sender, instance, **kwargs):
+    clear_upload_limits_cache()
+
+
+@receiver(signals.post_save, sender=Menu)
+@receiver(signals.post_delete, sender=Menu)
+@receiver(signals.post_save, sender=MenuItem)
+@receiver(signals.post_delete, sender=MenuItem)
+@receiver(signals.post_save, sender=MenuPlaceholder)
+@receiver(signals.post_delete, sender=MenuPlaceholder)
+@receiver(signals.post_save, sender=Configuration)
+def invalidate_navigation_cache(sender, instance, **kwargs):
+    clear_navigation_cache()
 
 
 def extension_upload_path(instance, filename):
@@ -99,6 +186,15 @@ def extension_upload_path(instance, filename):
 
 
 class Extension(models.Model):
+    STATUS_PENDING = "pending"
+    STATUS_READY = "ready"
+    STATUS_FAILED = "failed"
+    STATUS_CHOICES = (
+        (STATUS_PENDING, _("Pending")),
+        (STATUS_READY, _("Ready")),
+        (STATUS_FAILED, _("Failed")),
+    )
+
     name = models.CharField(
         max_length=255,
         unique=True,
@@ -118,6 +214,26 @@ class Extension(models.Model):
         default=False,
         help_text="Check if this extension is a map-specific plugin for Map Viewers.",
     )
+    status = models.CharField(
+        max_length=16,
+        choices=STATUS_CHOICES,
+        default=STATUS_READY,
+        editable=False,
+        help_text="Extensions are published once the uploaded file is extracted.",
+    )
+    processing_duration = models.FloatField(
+        null=True, blank=True, editable=False, help_text="Seconds spent extracting the uploaded file."
+    )
+    extracted_bytes = models.BigIntegerField(
+        null=True, blank=True, editable=False, help_text="Size of the extracted files in bytes."
+    )
+    processing_error = models.TextField(blank=True, default="", editable=False)
+    published = models.BooleanField(
+        default=False,
+        editable=False,
+        help_text="Whether a version of the extension is extracted and served, "
+        "the previous version is served until a new file is extracted.",
+    )
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
@@ -127,6 +243,13 @@ class Extension(models.Model):
     def save(self, *args, **kwargs):
         if not self.name and self.uploaded_file:
             self.name = os.path.splitext(os.path.basename(self.uploaded_file.name))[0]
+        # a new file is extracted in background, the same check of FileField.pre_save
+        new_upload = bool(self.uploaded_file) and not self.uploaded_file._committed
+        if new_upload:
+            self.status = self.STATUS_PENDING
+            self.processing_error = ""
+        # read by the post_save handler, other saves of a pending extension do not schedule a job
+        self._new_upload = new_upload
         super().save(*args, **kwargs)
 
     class Meta:
@@ -138,20 +261,10 @@ class Extension(models.Model):
 @receiver(signals.post_save, sender=Extension)
 def handle_extension_upload(sender, instance, **kwargs):
     """
-    Unzips the extension file and clears the API cache after saving.
+    Schedules the extraction of a new extension file and clears the API cache after saving.
     """
-    target_path = os.path.join(
-        settings.STATIC_ROOT, settings.MAPSTORE_EXTENSIONS_FOLDER_PATH, instance.name
-    )
-
-    if os.path.exists(target_path):
-        shutil.rmtree(target_path)
-
-    try:
-        with zipfile.ZipFile(instance.uploaded_file.path, "r") as zip_ref:
-            zip_ref.extractall(target_path)
-    except FileNotFoundError:
-        pass
+    if instance.__dict__.pop("_new_upload", False):
+        submit_extension_job(install_extension, instance.pk)
 
     clear_extension_caches()
 
@@ -159,16 +272,9 @@ def handle_extension_upload(sender, instance, **kwargs):
 @receiver(signals.post_delete, sender=Extension)
 def handle_extension_delete(sender, instance, **kwargs):
     """
-    Removes the extension's files and clears the API cache on deletion.
+    Schedules the removal of the extension's files and clears the API cache on deletion.
     """
-    if instance.name:
-        extension_path = os.path.join(
-            settings.STATIC_ROOT, settings.MAPSTORE_EXTENSIONS_FOLDER_PATH, instance.name
-        )
-        if os.path.exists(extension_path):
-            shutil.rmtree(extension_path)
-
-    if instance.uploaded_file and os.path.exists(instance.uploaded_file.path):
-        os.remove(instance.uploaded_file.path)
+    uploaded_file_path = instance.uploaded_file.path if instance.uploaded_file else None
+    submit_extension_job(uninstall_extension, instance.name, uploaded_file_path)
 
     clear_extension_caches()
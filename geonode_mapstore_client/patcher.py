@@ -0,0 +1,255 @@
+"""
+Server side version of the MapStore config patcher (@mapstore/patcher).
+
+Rules have the same format used by MAPSTORE_PLUGINS_CONFIG_PATCH_RULES:
+an `op` (add, replace or remove), a `value` and the target, either as a
+`jsonpath` expression or as a json pointer in `path`.
+Only the JSONPath subset used by the patch rules is supported:
+child names, `..`, `*`, array indexes, quoted names and filters
+comparing a property with a literal, e.g. `$.map_viewer..[?(@.name == 'Search')].cfg`.
+"""
+import re
+import copy
+import json
+from collections.abc import Mapping
+
+from geonode_mapstore_client import GeoNodeMapstore2Exception
+
+
+class PatchRuleError(GeoNodeMapstore2Exception):
+    """Raised for patch rules that cannot be applied on the server."""
+
+    pass
+
+
+_NAME_RE = re.compile(r"[A-Za-z_$][\w$-]*")
+_FILTER_RE = re.compile(
+    r"^\?\(\s*@((?:\.[A-Za-z_$][\w$-]*)+)\s*(?:(===|==|!==|!=)\s*(.+?))?\s*\)$"
+)
+_MISSING = object()
+
+
+class _Step:
+    __slots__ = ("recursive", "kind", "value")
+
+    def __init__(self, recursive, kind, value=None):
+        self.recursive = recursive
+        self.kind = kind
+        self.value = value
+
+
+def _parse_literal(literal):
+    if literal[0] in "'\"":
+        if len(literal) < 2 or literal[-1] != literal[0]:
+            raise PatchRuleError(f"Invalid literal {literal}")
+        return literal[1:-1]
+    try:
+        return json.loads(literal)
+    except ValueError:
+        raise PatchRuleError(f"Invalid literal {literal}")
+
+
+def _parse_bracket(content):
+    content = content.strip()
+    if content == "*":
+        return "wildcard", None
+    if re.fullmatch(r"-?\d+", content):
+        return "index", int(content)
+    if content and content[0] in "'\"" and content[-1] == content[0]:
+        return "name", content[1:-1]
+    match = _FILTER_RE.match(content)
+    if match:
+        properties, operator, literal = match.groups()
+        value = _parse_literal(literal) if operator else None
+        return "filter", (properties[1:].split("."), operator, value)
+    raise PatchRuleError(f"Unsupported expression [{content}]")
+
+
+def parse_jsonpath(jsonpath):
+    """Converts a JSONPath expression into a list of selection steps."""
+    if not jsonpath.startswith("$"):
+        raise PatchRuleError(f"JSONPath must start with $: {jsonpath}")
+    steps = []
+    position = 1
+    while position < len(jsonpath):
+        recursive = False
+        if jsonpath.startswith("..", position):
+            recursive = True
+            position += 2
+        elif jsonpath[position] == ".":
+            position += 1
+        elif jsonpath[position] != "[":
+            raise PatchRuleError(f"Invalid JSONPath {jsonpath}")
+
+        if position < len(jsonpath) and jsonpath[position] == "[":
+            end = _find_bracket_end(jsonpath, position)
+            kind, value = _parse_bracket(jsonpath[position + 1:end])
+            position = end + 1
+        elif jsonpath.startswith("*", position):
+            kind, value = "wildcard", None
+            position += 1
+        else:
+            match = _NAME_RE.match(jsonpath, position)
+            if not match:
+                raise PatchRuleError(f"Invalid JSONPath {jsonpath}")
+            kind, value = "name", match.group()
+            position = match.end()
+        steps.append(_Step(recursive, kind, value))
+    return steps
+
+
+def _find_bracket_end(jsonpath, start):
+    depth = 0
+    quote = None
+    for position in range(start, len(jsonpath)):
+        char = jsonpath[position]
+        if quote:
+            if char == quote:
+                quote = None
+        elif char in "'\"":
+            quote = char
+        elif char in "[(":
+            depth += 1
+        elif char in ")]":
+            depth -= 1
+            if depth == 0:
+                return position
+    raise PatchRuleError(f"Unbalanced brackets in {jsonpath}")
+
+
+def _get(document, path):
+    for key in path:
+        document = document[key]
+    return document
+
+
+def _items(value):
+    if isinstance(value, Mapping):
+        return list(value.items())
+    if isinstance(value, list):
+        return list(enumerate(value))
+    return []
+
+
+def _descendants(document, path):
+    paths = []
+    stack = [path]
+    while stack:
+        current = stack.pop()
+        paths.append(current)
+        children = [current + (key,) for key, _value in _items(_get(document, current))]
+        stack.extend(reversed(children))
+    return paths
+
+
+def _matches_filter(value, properties, operator, literal):
+    for key in properties:
+        if not isinstance(value, Mapping) or key not in value:
+            return False
+        value = value[key]
+    if operator is None:
+        return bool(value)
+    if operator in ("==", "==="):
+        return value == literal
+    return value != literal
+
+
+def _select_children(value, step):
+    if step.kind == "name":
+        if isinstance(value, Mapping) and step.value in value:
+            return [step.value]
+        return []
+    if step.kind == "index":
+        if isinstance(value, list) and -len(value) <= step.value < len(value):
+            return [step.value % len(value)]
+        return []
+    if step.kind == "wildcard":
+        return [key for key, _value in _items(value)]
+    return [key for key, item in _items(value) if _matches_filter(item, *step.value)]
+
+
+def select(document, steps):
+    """Returns the paths, as tuples of keys, of the values selected by the steps."""
+    paths = [()]
+    for step in steps:
+        selected = []
+        for path in paths:
+            candidates = _descendants(document, path) if step.recursive else [path]
+            for candidate in candidates:
+                value = _get(document, candidate)
+                selected.extend(candidate + (key,) for key in _select_children(value, step))
+        paths = list(dict.fromkeys(selected))
+    return paths
+
+
+def _parse_pointer(pointer):
+    if pointer == "":
+        return ()
+    if not pointer.startswith("/"):
+        raise PatchRuleError(f"Invalid json pointer {pointer}")
+    return tuple(
+        part.replace("~1", "/").replace("~0", "~") for part in pointer[1:].split("/")
+    )
+
+
+def _resolve_key(parent, key, op):
+    if isinstance(parent, list):
+        if key == "-" and op == "add":
+            return len(parent)
+        try:
+            return int(key)
+        except ValueError:
+            raise PatchRuleError(f"Invalid array index {key}")
+    return key
+
+
+def _apply_operation(document, path, op, value):
+    if not path:
+        if op in ("add", "replace"):
+            return copy.deepcopy(value)
+        raise PatchRuleError("The document root cannot be removed")
+    parent = _get(document, path[:-1])
+    key = _resolve_key(parent, path[-1], op)
+    if op == "add":
+        if isinstance(parent, list):
+            parent.insert(key, copy.deepcopy(value))
+        else:
+            parent[key] = copy.deepcopy(value)
+    elif op == "replace":
+        parent[key]
+        parent[key] = copy.deepcopy(value)
+    elif op == "remove":
+        del parent[key]
+    else:
+        raise PatchRuleError(f"Unsupported operation {op}")
+    return document
+
+
+def apply_patch_rules(document, rules):
+    """
+    Returns a patched copy of the document, the original document is not changed.
+    Rules are applied in order, each one on the result of the previous.
+    """
+    document = copy.deepcopy(document)
+    for rule in rules:
+        op = rule.get("op")
+        value = rule.get("value")
+        if "jsonpath" in rule:
+            paths = select(document, parse_jsonpath(rule["jsonpath"]))
+        elif "path" in rule:
+            paths = [_parse_pointer(rule["path"])]
+        else:
+            raise PatchRuleError(f"Missing jsonpath or path in rule {rule}")
+        # removing from the end keeps the indexes of the other matches valid
+        if op == "remove":
+            paths = sorted(paths, key=_path_sort_key, reverse=True)
+        for path in paths:
+            try:
+                document = _apply_operation(document, path, op, value)
+            except (KeyError, IndexError, TypeError):
+                raise PatchRuleError(f"Cannot apply {op} at {path}")
+    return document
+
+
+def _path_sort_key(path):
+    return [(0, key) if isinstance(key, int) else (1, str(key)) for key in path]
@@ -1,6 +1,51 @@
+import time
+import asyncio
+import hashlib
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+
+from asgiref.sync import sync_to_async
 from django.conf import settings
+from django.db import connections
 from django.utils.module_loading import import_string
 
+logger = logging.getLogger(__name__)
+
+_executor = None
+# one slot for each worker, held by a handler until get_rules returns, also after the timeout
+_slots = None
+_executor_lock = threading.Lock()
+
+
+def _get_workers():
+    return getattr(settings, "REQUEST_CONFIGURATION_RULES_WORKERS", 8)
+
+
+def _get_executor():
+    global _executor, _slots
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _slots = threading.BoundedSemaphore(_get_workers())
+                _executor = ThreadPoolExecutor(max_workers=_get_workers(), thread_name_prefix="request-rules")
+    return _executor
+
+
+def _acquire_slot():
+    _get_executor()
+    return _slots.acquire(blocking=False)
+
+
+def _run_in_thread(handler, request):
+    start = time.perf_counter()
+    try:
+        return handler.get_rules(request), time.perf_counter() - start
+    finally:
+        # connections opened by the handler belong to the pool thread
+        connections.close_all()
+        _slots.release()
+
 
 class BaseRequestConfigurationRuleHandler:
     """
@@ -10,6 +55,10 @@ class BaseRequestConfigurationRuleHandler:
     def get_rules(self, request):
         return []
 
+    def get_fallback_rules(self, request):
+        """Rules used when get_rules fails or does not complete within the timeout of the concurrent mode."""
+        return []
+
 
 class RequestConfigurationRulesRegistry:
     """
@@ -41,17 +90,148 @@ class RequestConfigurationRulesRegistry:
     def get_registry(cls):
         return cls.REGISTRY
 
+    def get_generation(self):
+        """
+        Returns a key identifying the registered handlers, the same in every process
+        with the same handlers, to invalidate the rules cached with other handlers.
+        """
+        handlers = "\n".join(f"{item.__module__}.{item.__qualname__}" for item in self.REGISTRY)
+        return hashlib.sha1(handlers.encode("utf-8")).hexdigest()[:12]
+
     def sanity_checks(self):
         for item in self.REGISTRY:
             self.__check_item(item)
 
     def get_rules(self, request):
+        """
+        Returns the rules of all the handlers, in registry order.
+        With REQUEST_CONFIGURATION_RULES_CONCURRENT the handlers run concurrently on a pool of
+        REQUEST_CONFIGURATION_RULES_WORKERS threads and the request waits for them at most
+        REQUEST_CONFIGURATION_RULES_TIMEOUT seconds, using the fallback rules of the late ones.
+        A running handler cannot be stopped: after the timeout it keeps its thread until get_rules returns,
+        handlers calling remote services should set their own timeouts. Handlers never wait for a thread,
+        when all of them are busy they are not run and their fallback rules are used, with the "busy" status,
+        so every request has its own time budget whatever the handlers of the previous ones are doing.
+        The time spent by each handler is kept in `timings`.
+        """
+        if getattr(settings, "REQUEST_CONFIGURATION_RULES_CONCURRENT", False) and len(self.REGISTRY) > 1:
+            return self._get_rules_concurrently(request)
         rules = []
+        self.timings = []
         for HandlerClass in self.REGISTRY:
             handler = HandlerClass()
+            start = time.perf_counter()
             rules.extend(handler.get_rules(request))
+            self.timings.append((HandlerClass.__name__, time.perf_counter() - start, "ok"))
+        return {"rules": rules}
+
+    def _get_timeout(self):
+        return getattr(settings, "REQUEST_CONFIGURATION_RULES_TIMEOUT", 2)  # seconds
+
+    def _get_fallback_rules(self, handler, request, status, error=None):
+        logger.warning(f"Request configuration rules handler {type(handler).__name__} {status}: {error or ''}")
+        try:
+            return handler.get_fallback_rules(request)
+        except Exception as e:
+            logger.error(f"Fallback rules of {type(handler).__name__} failed: {e}")
+            return []
+
+    def _get_rules_concurrently(self, request):
+        executor = _get_executor()
+        # the user is resolved before sharing the request with the pool threads
+        getattr(request, "user", None)
+        start = time.perf_counter()
+        deadline = start + self._get_timeout()
+        handlers = [HandlerClass() for HandlerClass in self.REGISTRY]
+        futures = [
+            executor.submit(_run_in_thread, handler, request) if _acquire_slot() else None for handler in handlers
+        ]
+        rules = []
+        self.timings = []
+        # results are collected in registry order, the deadline is shared so the total wait is bounded
+        for handler, future in zip(handlers, futures):
+            try:
+                if future is None:
+                    status = "busy"
+                    duration = 0
+                    handler_rules = self._get_fallback_rules(handler, request, status)
+                else:
+                    handler_rules, duration = future.result(timeout=max(0, deadline - time.perf_counter()))
+                    status = "ok"
+            except FutureTimeoutError:
+                status = "timeout"
+                duration = time.perf_counter() - start
+                handler_rules = self._get_fallback_rules(handler, request, status)
+            except Exception as e:
+                status = "error"
+                duration = time.perf_counter() - start
+                handler_rules = self._get_fallback_rules(handler, request, status, e)
+            rules.extend(handler_rules)
+            self.timings.append((type(handler).__name__, duration, status))
+        return {"rules": rules}
+
+    async def aget_rules(self, request):
+        """
+        Async version of get_rules, handlers can implement `aget_rules` as a native coroutine,
+        get_rules runs in a thread otherwise.
+        With REQUEST_CONFIGURATION_RULES_CONCURRENT the handlers run concurrently as coroutines,
+        each one within REQUEST_CONFIGURATION_RULES_TIMEOUT seconds: native coroutines are cancelled
+        after the timeout, get_rules uses the same slots and "busy" status of get_rules.
+        """
+        if not (getattr(settings, "REQUEST_CONFIGURATION_RULES_CONCURRENT", False) and len(self.REGISTRY) > 1):
+            return await self._aget_rules_in_order(request)
+        handlers = [HandlerClass() for HandlerClass in self.REGISTRY]
+        timeout = self._get_timeout()
+
+        async def run(handler):
+            start = time.perf_counter()
+            status = "ok"
+            try:
+                if hasattr(handler, "aget_rules"):
+                    handler_rules = await asyncio.wait_for(handler.aget_rules(request), timeout)
+                elif _acquire_slot():
+                    handler_rules, _duration = await asyncio.wait_for(
+                        sync_to_async(_run_in_thread, thread_sensitive=False)(handler, request), timeout
+                    )
+                else:
+                    status = "busy"
+                    handler_rules = await sync_to_async(self._get_fallback_rules)(handler, request, status)
+            except asyncio.TimeoutError:
+                status = "timeout"
+                handler_rules = await sync_to_async(self._get_fallback_rules)(handler, request, status)
+            except Exception as e:
+                status = "error"
+                handler_rules = await sync_to_async(self._get_fallback_rules)(handler, request, status, e)
+            return handler_rules, (type(handler).__name__, time.perf_counter() - start, status)
+
+        results = await asyncio.gather(*(run(handler) for handler in handlers))
+        self.timings = [timing for _rules, timing in results]
+        return {"rules": [rule for handler_rules, _timing in results for rule in handler_rules]}
+
+    async def _aget_rules_in_order(self, request):
+        rules = []
+        self.timings = []
+        for HandlerClass in self.REGISTRY:
+            handler = HandlerClass()
+            start = time.perf_counter()
+            if hasattr(handler, "aget_rules"):
+                rules.extend(await handler.aget_rules(request))
+            else:
+                rules.extend(await sync_to_async(handler.get_rules)(request))
+            self.timings.append((HandlerClass.__name__, time.perf_counter() - start, "ok"))
         return {"rules": rules}
 
+    def is_complete(self):
+        """Returns whether the last get_rules got the rules of every handler, without fallback rules."""
+        return all(status == "ok" for _name, _duration, status in getattr(self, "timings", []))
+
+    def get_server_timing(self):
+        """Returns the timings of the last get_rules as a Server-Timing header value."""
+        return ", ".join(
+            f'{name};dur={duration * 1000:.1f};desc="{status}"'
+            for name, duration, status in getattr(self, "timings", [])
+        )
+
     def __check_item(self, item):
         """
         Ensure that the handler is a subclass of BaseRequestConfigurationRuleHandler
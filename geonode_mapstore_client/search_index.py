@@ -0,0 +1,222 @@
+"""
+Local index of the features of the search services in indexed mode.
+
+The features of the layer are downloaded once, keeping only the geometry and the
+properties used by the search, and stored as a json file shared by the processes.
+Every process loads the file in a trigram index, answering the searches with the
+same matches of the WFS query (the text contained in one of the attributes)
+without contacting the service.
+Indexes are built by the build_search_indexes command or, with ASYNC_SIGNALS,
+by a task of the GeoNode celery workers scheduled when an index is missing or old.
+The web processes never download the features.
+"""
+import os
+import re
+import json
+import time
+import threading
+import logging
+
+from django.conf import settings
+from django.core.cache import cache
+
+from geonode_mapstore_client.config_loader import get_file_signature
+from geonode_mapstore_client.search_proxy import SearchProxyError, get_session, normalize_query
+
+logger = logging.getLogger(__name__)
+
+_TEMPLATE_PROPERTY_RE = re.compile(r"\$\{\s*properties\.([\w-]+)\s*\}")
+SEARCH_INDEX_BUILD_CACHE_KEY = "mapstore_search_index_build"
+
+# loaded indexes by search service, with the signature of the file read
+_indexes = {}
+_indexes_lock = threading.Lock()
+
+
+def get_index_root():
+    """
+    Returns the folder of the indexes, they contain the features of the layers so it must not be served:
+    by default it is next to MEDIA_ROOT, not inside it
+    """
+    default = os.path.join(os.path.dirname(os.path.normpath(settings.MEDIA_ROOT)), "search_indexes")
+    return getattr(settings, "MAPSTORE_SEARCH_INDEX_ROOT", default)
+
+
+def get_index_path(service_pk):
+    return os.path.join(get_index_root(), f"{service_pk}.json")
+
+
+def _trigrams(text):
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+class SearchIndex:
+    """Trigram index of the searchable values of the features."""
+
+    def __init__(self, data):
+        self.built_at = data["built_at"]
+        self.srs_name = data["srsName"]
+        self.attributes = data["attributes"]
+        self.properties = data["properties"]
+        self.features = data["features"]
+        self.values = []
+        self.trigrams = {}
+        for position, feature in enumerate(self.features):
+            properties = feature.get("properties") or {}
+            # normalized as the searched text
+            values = [
+                normalize_query(str(properties[attribute]))
+                for attribute in self.attributes
+                if properties.get(attribute) is not None
+            ]
+            self.values.append(values)
+            for value in values:
+                for trigram in _trigrams(value):
+                    self.trigrams.setdefault(trigram, set()).add(position)
+
+    def _candidates(self, text):
+        trigrams = _trigrams(text)
+        if not trigrams:
+            return range(len(self.features))
+        postings = sorted((self.trigrams.get(trigram, set()) for trigram in trigrams), key=len)
+        return sorted(set.intersection(*postings))
+
+    def search(self, text, max_features):
+        """Returns the features with the text in one of the attributes, in the order of the layer."""
+        text = normalize_query(text)
+        features = []
+        for position in self._candidates(text):
+            if any(text in value for value in self.values[position]):
+                features.append(self.features[position])
+                if len(features) >= max_features:
+                    break
+        return {
+            "type": "FeatureCollection",
+            "features": features,
+            "numberReturned": len(features),
+        }
+
+
+def get_index_properties(service):
+    """Returns the properties kept in the index: the attributes, sortby and the ones used by the templates."""
+    properties = dict.fromkeys(service.attributes)
+    if service.sortby:
+        properties[service.sortby] = None
+    for template in (service.display_name, service.sub_title):
+        properties.update(dict.fromkeys(_TEMPLATE_PROPERTY_RE.findall(template or "")))
+    return list(properties)
+
+
+def _fetch_features(service):
+    params = {
+        "service": "WFS",
+        "version": "1.1.0",
+        "request": "GetFeature",
+        "typeName": service.typename,
+        "outputFormat": "application/json",
+        "srsName": service.srsName,
+    }
+    if service.sortby:
+        params["sortBy"] = service.sortby
+    timeout = getattr(settings, "MAPSTORE_SEARCH_INDEX_TIMEOUT", 60)  # seconds
+    try:
+        response = get_session().get(service.url, params=params, timeout=timeout)
+        response.raise_for_status()
+        result = response.json()
+    except Exception as e:
+        raise SearchProxyError(f"Cannot download the features of {service.typename} from {service.url}: {e}")
+    if not isinstance(result, dict) or not isinstance(result.get("features"), list):
+        raise SearchProxyError(f"{service.url} did not return a feature collection")
+    return result["features"]
+
+
+def build_search_index(service):
+    """Downloads the features of a search service and stores its index, returns the number of features."""
+    properties = get_index_properties(service)
+    features = [
+        {
+            "type": "Feature",
+            "id": feature.get("id"),
+            "geometry": feature.get("geometry"),
+            "properties": {key: (feature.get("properties") or {}).get(key) for key in properties},
+        }
+        for feature in _fetch_features(service)
+    ]
+    data = {
+        "built_at": time.time(),
+        "srsName": service.srsName,
+        "attributes": list(service.attributes),
+        "properties": properties,
+        "features": features,
+    }
+    path = get_index_path(service.pk)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(data, f, separators=(",", ":"))
+    # readers see either the previous or the new file
+    os.replace(tmp_path, path)
+    return len(features)
+
+
+def clear_search_index(service_pk):
+    """Removes the index of a search service."""
+    with _indexes_lock:
+        _indexes.pop(service_pk, None)
+    try:
+        os.remove(get_index_path(service_pk))
+    except FileNotFoundError:
+        pass
+
+
+def _load_index(service_pk):
+    path = get_index_path(service_pk)
+    signature = get_file_signature(path)
+    if signature is None:
+        return None
+    cached = _indexes.get(service_pk)
+    if cached and cached[0] == signature:
+        return cached[1]
+    try:
+        with open(path, "r") as f:
+            index = SearchIndex(json.load(f))
+    except (FileNotFoundError, ValueError, KeyError):
+        return None
+    with _indexes_lock:
+        _indexes[service_pk] = (signature, index)
+    return index
+
+
+def schedule_search_index_build(service):
+    """
+    Schedules the build of the index of a search service on the celery workers, at most once
+    every MAPSTORE_SEARCH_INDEX_RETRY_INTERVAL seconds across all the processes.
+    Without ASYNC_SIGNALS the indexes are built only by the build_search_indexes command.
+    """
+    if not getattr(settings, "ASYNC_SIGNALS", False):
+        return
+    retry_interval = getattr(settings, "MAPSTORE_SEARCH_INDEX_RETRY_INTERVAL", 60)  # seconds
+    if cache.add(f"{SEARCH_INDEX_BUILD_CACHE_KEY}_{service.pk}", True, timeout=retry_interval):
+        from geonode_mapstore_client.tasks import build_search_index_task
+
+        build_search_index_task.delay(service.pk)
+
+
+def get_search_index(service):
+    """
+    Returns the index of a search service, None until it is available.
+    Missing indexes and the ones built with another configuration are scheduled for a build,
+    indexes older than index_refresh_interval seconds are used while they are built again.
+    """
+    index = _load_index(service.pk)
+    if (
+        index is None
+        or index.srs_name != service.srsName
+        or index.attributes != list(service.attributes)
+        or index.properties != get_index_properties(service)
+    ):
+        schedule_search_index_build(service)
+        return None
+    if service.index_refresh_interval and time.time() - index.built_at > service.index_refresh_interval:
+        schedule_search_index_build(service)
+    return index
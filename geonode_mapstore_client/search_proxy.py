@@ -0,0 +1,221 @@
+"""
+Server side proxy for the WFS queries of the search services.
+
+The query is the same sent by the MapStore wfs search service: a GetFeature request
+with a cql_filter matching the search text, with ILIKE, on every queriable attribute.
+Results are kept in a per process LRU cache with a time to live and concurrent
+requests for the same query wait for the one already sent to the service.
+Queries sent to the GeoServer of GeoNode carry the access token of the user,
+so they return the features the user can read, and are cached per token.
+A complete result, with less features than maxFeatures, also answers the longer
+queries starting with the same text, filtering its features locally.
+"""
+import re
+import time
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future
+
+import requests
+from requests.adapters import HTTPAdapter
+from django.conf import settings
+
+from geonode_mapstore_client import GeoNodeMapstore2Exception
+
+
+class SearchProxyError(GeoNodeMapstore2Exception):
+    """Raised when the WFS service of a search service cannot be queried."""
+
+    pass
+
+
+_WHITESPACE_RE = re.compile(r"\s+")
+# characters with a special meaning in ILIKE patterns or in cql strings
+_PATTERN_CHARS = ("%", "_", "'", "\\")
+
+_session = None
+_session_lock = threading.Lock()
+
+# futures of the queries sent to the services, by cache key
+_in_flight = {}
+_in_flight_lock = threading.Lock()
+
+
+class _ResultsCache:
+    """LRU cache where every entry expires after a timeout."""
+
+    def __init__(self):
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at <= time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        max_entries = getattr(settings, "MAPSTORE_SEARCH_PROXY_CACHE_MAX_ENTRIES", 1000)
+        timeout = getattr(settings, "MAPSTORE_SEARCH_PROXY_CACHE_TIMEOUT", 300)  # seconds
+        with self._lock:
+            self._entries[key] = (time.monotonic() + timeout, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self, service_pk=None):
+        with self._lock:
+            if service_pk is None:
+                self._entries.clear()
+            else:
+                for key in [key for key in self._entries if key[0] == service_pk]:
+                    del self._entries[key]
+
+
+_results = _ResultsCache()
+
+
+def clear_search_results(service_pk=None):
+    """Drops the cached results of a search service, or of all of them."""
+    _results.clear(service_pk)
+
+
+def normalize_query(text):
+    return _WHITESPACE_RE.sub(" ", text).strip().lower()
+
+
+def get_session():
+    """Returns the http session shared by the search requests, with a pool of connections for each host."""
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                pool_size = getattr(settings, "MAPSTORE_SEARCH_PROXY_POOL_SIZE", 10)
+                session = requests.Session()
+                adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+                session.mount("http://", adapter)
+                session.mount("https://", adapter)
+                _session = session
+    return _session
+
+
+def forwards_credentials(service):
+    """Whether the url of a search service is on the GeoServer of GeoNode, which accepts the user access token."""
+    locations = [
+        getattr(settings, "GEOSERVER_LOCATION", None),
+        getattr(settings, "GEOSERVER_PUBLIC_LOCATION", None),
+        f"{settings.SITEURL.rstrip('/')}/gs/" if getattr(settings, "SITEURL", None) else None,
+    ]
+    return any(location and service.url.startswith(location) for location in locations)
+
+
+def build_search_params(service, text, access_token=None):
+    """Returns the GetFeature parameters sent by the MapStore wfs search service."""
+    escaped_text = text.replace("'", "''")
+    cql_filter = " or ".join(f"{attribute} ILIKE '%{escaped_text}%'" for attribute in service.attributes)
+    params = {
+        "service": "WFS",
+        "version": "1.1.0",
+        "request": "GetFeature",
+        "typeName": service.typename,
+        "outputFormat": "application/json",
+        "maxFeatures": service.maxFeatures,
+        "srsName": service.srsName,
+        "cql_filter": f"({cql_filter})",
+    }
+    if service.sortby:
+        params["sortBy"] = service.sortby
+    if access_token:
+        params["access_token"] = access_token
+    return params
+
+
+def _fetch(service, text, access_token):
+    timeout = getattr(settings, "MAPSTORE_SEARCH_PROXY_TIMEOUT", 10)  # seconds
+    params = build_search_params(service, text, access_token)
+    try:
+        response = get_session().get(service.url, params=params, timeout=timeout)
+        response.raise_for_status()
+        result = response.json()
+    except (requests.RequestException, ValueError) as e:
+        raise SearchProxyError(f"Search on {service.url} failed: {e}")
+    if not isinstance(result, dict) or not isinstance(result.get("features"), list):
+        raise SearchProxyError(f"Search on {service.url} did not return a feature collection")
+    return result
+
+
+def _filter_result(service, result, text):
+    features = [
+        feature
+        for feature in result["features"]
+        if any(
+            text in str(value).lower()
+            for value in (
+                (feature.get("properties") or {}).get(attribute) for attribute in service.attributes
+            )
+            if value is not None
+        )
+    ]
+    filtered = {**result, "features": features}
+    for count in ("totalFeatures", "numberMatched", "numberReturned"):
+        if count in filtered:
+            filtered[count] = len(features)
+    return filtered
+
+
+def _get_from_shorter_query(service, text, access_token):
+    if any(char in text for char in _PATTERN_CHARS):
+        return None
+    for end in range(len(text) - 1, 0, -1):
+        result = _results.get((service.pk, access_token, text[:end]))
+        if result is not None:
+            if len(result["features"]) < service.maxFeatures:
+                return _filter_result(service, result, text)
+            # a shorter query would have been truncated too
+            return None
+    return None
+
+
+def search(service, text, access_token=None):
+    """
+    Returns the GeoJSON features of a search service matching the text,
+    the access token is sent only to the services on the GeoServer of GeoNode.
+    """
+    text = normalize_query(text)
+    if not forwards_credentials(service):
+        access_token = None
+    key = (service.pk, access_token, text)
+    result = _results.get(key)
+    if result is not None:
+        return result
+
+    result = _get_from_shorter_query(service, text, access_token)
+    if result is not None:
+        _results.set(key, result)
+        return result
+
+    with _in_flight_lock:
+        future = _in_flight.get(key)
+        sender = future is None
+        if sender:
+            future = _in_flight[key] = Future()
+    if not sender:
+        return future.result()
+
+    try:
+        result = _fetch(service, text, access_token)
+        _results.set(key, result)
+        future.set_result(result)
+        return result
+    except Exception as e:
+        future.set_exception(e)
+        raise
+    finally:
+        with _in_flight_lock:
+            del _in_flight[key]
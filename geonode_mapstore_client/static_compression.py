@@ -0,0 +1,216 @@
+"""
+Pre-compressed gzip and brotli copies of the MapStore static files.
+
+The compressed copies are written next to each file (geonode.css.gz, geonode.css.br),
+so the web server can send them without compressing on the fly, e.g. with nginx:
+
+    gzip_static on;
+    brotli_static on;  # ngx_brotli module
+
+They are written by the compress_static command, or after collectstatic by
+MapStoreStaticFilesStorage (STORAGES["staticfiles"]["BACKEND"] =
+"geonode_mapstore_client.static_compression.MapStoreStaticFilesStorage"),
+which also builds the static manifest and the translation slices. serve_static is a view doing the same
+choice of the web server, for deployments serving static files from django.
+"""
+import os
+import gzip
+import json
+import shutil
+import hashlib
+import mimetypes
+from concurrent.futures import ProcessPoolExecutor
+
+from django.conf import settings
+from django.core.exceptions import SuspiciousFileOperation
+from django.contrib.staticfiles.storage import StaticFilesStorage
+from django.http import FileResponse, Http404
+from django.utils._os import safe_join
+from django.utils.cache import patch_cache_control, patch_vary_headers
+
+from geonode_mapstore_client.static_manifest import build_static_manifest, get_manifest_path
+from geonode_mapstore_client.config_loader import load_json_config
+from geonode_mapstore_client.translations import build_translation_slices
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+COMPRESSED_PATHS = ["mapstore/dist", "mapstore/ms-translations", "mapstore/gn-translations", "mapstore/translations"]
+COMPRESSIBLE_EXTENSIONS = (".js", ".css", ".json", ".svg", ".html", ".txt", ".xml", ".map", ".ttf", ".eot")
+# hashes of the files compressed, to skip them when they do not change
+COMPRESSED_HASHES_NAME = "compressed.json"
+# preferred encodings first
+ENCODINGS = {"br": ".br", "gzip": ".gz"}
+IMMUTABLE_MAX_AGE = 60 * 60 * 24 * 365  # 1 year
+
+
+def get_accepted_encodings(request):
+    encodings = set()
+    for part in request.META.get("HTTP_ACCEPT_ENCODING", "").split(","):
+        coding, _separator, params = part.partition(";")
+        quality = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0
+        if coding.strip() and quality > 0:
+            encodings.add(coding.strip().lower())
+    return encodings
+
+
+def choose_encoding(request, available_encodings):
+    """Returns the preferred encoding accepted by the request among the available ones, None for identity."""
+    accepted_encodings = get_accepted_encodings(request)
+    return next(
+        (
+            encoding
+            for encoding in ENCODINGS
+            if encoding in available_encodings and encoding in accepted_encodings
+        ),
+        None,
+    )
+
+
+def _get_compressed_folders(static_root):
+    # the content hashed copies of the folders are next to them, e.g. mapstore/ms-translations.<hash>
+    mapstore_root = os.path.join(static_root, "mapstore")
+    if not os.path.isdir(mapstore_root):
+        return []
+    return [
+        os.path.join(mapstore_root, name)
+        for name in sorted(os.listdir(mapstore_root))
+        if any(f"mapstore/{name}" == path or f"mapstore/{name}".startswith(f"{path}.") for path in COMPRESSED_PATHS)
+    ]
+
+
+def _get_compressible_files(static_root):
+    min_size = getattr(settings, "MAPSTORE_STATIC_COMPRESS_MIN_SIZE", 1024)  # bytes
+    for folder_path in _get_compressed_folders(static_root):
+        for root, dirs, files in os.walk(folder_path):
+            for name in files:
+                file_path = os.path.join(root, name)
+                if name.endswith(COMPRESSIBLE_EXTENSIONS) and os.path.getsize(file_path) >= min_size:
+                    yield file_path
+
+
+def _hash_file(file_path):
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _write_variant(file_path, suffix, content, size):
+    variant_path = f"{file_path}{suffix}"
+    # variants bigger than the original are useless
+    if len(content) >= size:
+        if os.path.exists(variant_path):
+            os.remove(variant_path)
+        return size
+    tmp_path = f"{variant_path}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(content)
+    shutil.copystat(file_path, tmp_path)
+    os.replace(tmp_path, variant_path)
+    return len(content)
+
+
+def compress_file(file_path):
+    """Writes the compressed copies of a file, returns the sizes of the original and of each encoding."""
+    with open(file_path, "rb") as f:
+        content = f.read()
+    sizes = {None: len(content)}
+    sizes["gzip"] = _write_variant(file_path, ENCODINGS["gzip"], gzip.compress(content, compresslevel=9), len(content))
+    if brotli is not None:
+        sizes["br"] = _write_variant(file_path, ENCODINGS["br"], brotli.compress(content), len(content))
+    return sizes
+
+
+def compress_static_files(static_root=None, workers=None, force=False):
+    """
+    Compresses the MapStore static files in parallel, on a pool of processes.
+    Files already compressed with the same content are skipped, unless force is set.
+    Returns a report with the number of files compressed and skipped and the bytes saved by each encoding.
+    """
+    static_root = static_root or settings.STATIC_ROOT
+    hashes_path = os.path.join(static_root, "mapstore", COMPRESSED_HASHES_NAME)
+    try:
+        with open(hashes_path, "r") as f:
+            previous_hashes = json.load(f)
+    except (FileNotFoundError, ValueError):
+        previous_hashes = {}
+
+    hashes = {}
+    changed = []
+    for file_path in _get_compressible_files(static_root):
+        path = os.path.relpath(file_path, static_root)
+        hashes[path] = _hash_file(file_path)
+        if force or previous_hashes.get(path) != hashes[path]:
+            changed.append(file_path)
+
+    report = {"compressed": len(changed), "skipped": len(hashes) - len(changed), "original": 0, "saved": {}}
+    if changed:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            for sizes in executor.map(compress_file, changed, chunksize=8):
+                original = sizes.pop(None)
+                report["original"] += original
+                for encoding, size in sizes.items():
+                    report["saved"][encoding] = report["saved"].get(encoding, 0) + original - size
+
+    os.makedirs(os.path.dirname(hashes_path), exist_ok=True)
+    with open(hashes_path, "w") as f:
+        json.dump(hashes, f)
+    return report
+
+
+class MapStoreStaticFilesStorage(StaticFilesStorage):
+    """Static files storage writing the manifest and the compressed copies of the MapStore files after collectstatic."""
+
+    def post_process(self, paths, dry_run=False, **options):
+        if not dry_run:
+            build_static_manifest(self.location)
+            build_translation_slices(self.location)
+            compress_static_files(self.location)
+        return iter(())
+
+
+def _is_hashed(path):
+    manifest = load_json_config(get_manifest_path(), {})
+    return path in manifest.get("paths", {}).values() or any(
+        path.startswith(f"{hashed_path}/") for hashed_path in manifest.get("paths", {}).values()
+    )
+
+
+def serve_static(request, path):
+    """
+    Serves a file of STATIC_ROOT with its pre-compressed copy accepted by the request, if any.
+    Content hashed files of the manifest are cached as immutable.
+    """
+    try:
+        file_path = safe_join(settings.STATIC_ROOT, path)
+    except SuspiciousFileOperation:
+        raise Http404()
+    if not os.path.isfile(file_path):
+        raise Http404()
+
+    available_encodings = [
+        encoding for encoding, suffix in ENCODINGS.items() if os.path.isfile(f"{file_path}{suffix}")
+    ]
+    encoding = choose_encoding(request, available_encodings)
+    content_type, _encoding = mimetypes.guess_type(file_path)
+    response = FileResponse(
+        open(f"{file_path}{ENCODINGS[encoding]}" if encoding else file_path, "rb"),
+        content_type=content_type or "application/octet-stream",
+        filename=os.path.basename(file_path),
+    )
+    if encoding:
+        response["Content-Encoding"] = encoding
+    patch_vary_headers(response, ["Accept-Encoding"])
+    if _is_hashed(path):
+        patch_cache_control(response, public=True, max_age=IMMUTABLE_MAX_AGE, immutable=True)
+    return response
@@ -0,0 +1,151 @@
+"""
+Content hashed names of the MapStore static files.
+
+The manifest is built after collectstatic (build_static_manifest command) and maps:
+- the js bundles and the css themes of mapstore/dist to a copy with the hash of their content
+  in the name, in the same folder so the relative urls of chunks, fonts and images keep working
+- the translations folders to a copy with the hash of all their files in the name,
+  the client builds the name of the file of each language from the folder
+Hashed files never change and can be served with long lived, immutable caching.
+"""
+import os
+import json
+import shutil
+import hashlib
+
+from django.conf import settings
+
+from geonode_mapstore_client.config_loader import get_static_config_path, load_json_config
+
+MANIFEST_NAME = "manifest.json"
+HASHED_FILES_PATHS = ["mapstore/dist/js", "mapstore/dist/themes"]
+HASHED_FILES_EXTENSIONS = (".js", ".css")
+HASHED_FOLDERS_PATHS = ["mapstore/ms-translations", "mapstore/gn-translations"]
+HASH_LENGTH = 12
+# suffixes of the compressed copies written by static_compression
+COMPRESSED_EXTENSIONS = (".gz", ".br")
+
+
+def get_manifest_path():
+    return get_static_config_path(MANIFEST_NAME)
+
+
+def _file_hash(path, digest=None):
+    digest = digest or hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(chunk)
+    return digest
+
+
+def _hashed_name(name, file_hash):
+    root, ext = os.path.splitext(name)
+    return f"{root}.{file_hash}{ext}"
+
+
+def _is_hash(value):
+    return len(value) == HASH_LENGTH and all(c in "0123456789abcdef" for c in value)
+
+
+def _is_hashed_copy(name):
+    # names written by _hashed_name, e.g. gn-map.0123456789ab.js
+    parts = name.rsplit(".", 2)
+    return len(parts) == 3 and _is_hash(parts[1])
+
+
+def _hash_files(static_root, path, paths):
+    folder_path = os.path.join(static_root, path)
+    if not os.path.isdir(folder_path):
+        return
+    for name in sorted(os.listdir(folder_path)):
+        file_path = os.path.join(folder_path, name)
+        # webpack chunks have already a content hash in the name
+        if (
+            not os.path.isfile(file_path)
+            or not name.endswith(HASHED_FILES_EXTENSIONS)
+            or ".chunk." in name
+            or _is_hashed_copy(name)
+        ):
+            continue
+        file_hash = _file_hash(file_path).hexdigest()[:HASH_LENGTH]
+        hashed_path = os.path.join(folder_path, _hashed_name(name, file_hash))
+        if not os.path.exists(hashed_path):
+            shutil.copy2(file_path, hashed_path)
+        paths[_to_logical(static_root, file_path)] = _to_logical(static_root, hashed_path)
+
+
+def _is_compressed_copy(name):
+    # they change with the compression settings, not with the content of the folder
+    return name.endswith(COMPRESSED_EXTENSIONS)
+
+
+def _folder_hash(folder_path, digest=None):
+    """Hashes the path and the content of the files of a folder and of its subfolders, e.g. the html fragments."""
+    digest = digest or hashlib.sha256()
+    for root, dirs, names in os.walk(folder_path):
+        # walked in the same order on every build
+        dirs.sort()
+        for name in sorted(names):
+            if _is_compressed_copy(name):
+                continue
+            file_path = os.path.join(root, name)
+            digest.update(_to_logical(folder_path, file_path).encode("utf-8") + b"\0")
+            _file_hash(file_path, digest)
+    return digest
+
+
+def _remove_stale_folders(folder_path, hashed_path):
+    # copies of the previous versions of the folder and the ones left by interrupted builds
+    parent_path, name = os.path.split(folder_path)
+    for sibling in os.listdir(parent_path):
+        if not sibling.startswith(f"{name}."):
+            continue
+        suffix = sibling[len(name) + 1:]
+        sibling_path = os.path.join(parent_path, sibling)
+        if (
+            _is_hash(suffix[:-len(".tmp")] if suffix.endswith(".tmp") else suffix)
+            and sibling_path != hashed_path
+            and os.path.isdir(sibling_path)
+        ):
+            shutil.rmtree(sibling_path, ignore_errors=True)
+
+
+def _hash_folder(static_root, path, paths):
+    folder_path = os.path.join(static_root, path)
+    if not os.path.isdir(folder_path):
+        return
+    hashed_path = f"{folder_path}.{_folder_hash(folder_path).hexdigest()[:HASH_LENGTH]}"
+    if not os.path.exists(hashed_path):
+        tmp_path = f"{hashed_path}.tmp"
+        shutil.rmtree(tmp_path, ignore_errors=True)
+        shutil.copytree(folder_path, tmp_path)
+        os.replace(tmp_path, hashed_path)
+    _remove_stale_folders(folder_path, hashed_path)
+    paths[path] = _to_logical(static_root, hashed_path)
+
+
+def _to_logical(static_root, path):
+    return os.path.relpath(path, static_root).replace(os.sep, "/")
+
+
+def build_static_manifest(static_root=None):
+    """Writes the hashed copies of the MapStore static files and their manifest, returns the manifest paths."""
+    static_root = static_root or settings.STATIC_ROOT
+    paths = {}
+    for path in HASHED_FILES_PATHS:
+        _hash_files(static_root, path, paths)
+    for path in HASHED_FOLDERS_PATHS:
+        _hash_folder(static_root, path, paths)
+
+    manifest_path = os.path.join(static_root, "mapstore", MANIFEST_NAME)
+    tmp_path = f"{manifest_path}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump({"paths": dict(sorted(paths.items()))}, f, indent=2)
+    os.replace(tmp_path, manifest_path)
+    return paths
+
+
+def get_hashed_path(path):
+    """Returns the content hashed name of a static path, None if not in the manifest."""
+    manifest = load_json_config(get_manifest_path(), {})
+    return manifest.get("paths", {}).get(path)
@@ -0,0 +1,27 @@
+import logging
+
+from geonode.celery_app import app
+
+from geonode_mapstore_client.extension_jobs import run_extension_job
+from geonode_mapstore_client.search_index import build_search_index
+from geonode_mapstore_client.search_proxy import SearchProxyError
+
+logger = logging.getLogger(__name__)
+
+
+@app.task(name="geonode_mapstore_client.tasks.run_extension_job", ignore_result=True)
+def run_extension_job_task(job_name, *args):
+    run_extension_job(job_name, *args)
+
+
+@app.task(name="geonode_mapstore_client.tasks.build_search_index", ignore_result=True)
+def build_search_index_task(service_pk):
+    from geonode_mapstore_client.models import SearchService
+
+    service = SearchService.objects.filter(pk=service_pk, indexed=True).first()
+    if service is None:
+        return
+    try:
+        build_search_index(service)
+    except SearchProxyError as e:
+        logger.error(f"Search index of {service} not built: {e}")
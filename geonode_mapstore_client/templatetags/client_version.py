@@ -1,25 +1,94 @@
 import os
+import hashlib
 import logging
 
 from django import template
 from django.conf import settings
 from django.contrib.staticfiles.finders import find
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+from django.templatetags.static import static
+
+from geonode_mapstore_client.config_loader import get_file_signature
+from geonode_mapstore_client.static_manifest import get_hashed_path
 
 logger = logging.getLogger(__name__)
 register = template.Library()
 
+VERSION_PATH = "mapstore/version.txt"
+DIST_PATH = "mapstore/dist"
 
-@register.simple_tag
-def client_version():
-    version_path = "mapstore/version.txt"
+# version resolved once per process, as (signature of version.txt, version)
+_client_version = None
+
+
+@receiver(setting_changed)
+def reset_client_version(**kwargs):
+    global _client_version
+    _client_version = None
+
+
+def _get_static_path(path):
     if settings.DEBUG:
-        file_path = find(version_path)
-    else:
-        file_path = os.path.join(settings.STATIC_ROOT, version_path)
+        return find(path)
+    return os.path.join(settings.STATIC_ROOT, path)
+
+
+def _get_dist_hash():
+    """Returns a short hash of the names, sizes and modification times of the dist bundle files."""
+    dist_path = _get_static_path(DIST_PATH)
+    if not dist_path or not os.path.isdir(dist_path):
+        return ""
+    digest = hashlib.sha1()
+    for root, dirs, files in os.walk(dist_path):
+        dirs.sort()
+        for name in sorted(files):
+            file_path = os.path.join(root, name)
+            signature = get_file_signature(file_path)
+            digest.update(f"{os.path.relpath(file_path, dist_path)}:{signature}\n".encode("utf-8"))
+    return digest.hexdigest()[:12]
+
+
+def _read_client_version(file_path):
     try:
         with open(file_path, "r") as f:
-            version = f.read()
-        return version
+            return f.read().strip()
     except Exception as e:
         logger.error(e)
-        return ""
+        return _get_dist_hash()
+
+
+def get_client_version():
+    """
+    Returns the client version from mapstore/version.txt, read once per process.
+    With MAPSTORE_CLIENT_VERSION_CHECK_MTIME the file is read again when it changes, useful in development.
+    A hash of the dist bundle is used when the file is missing.
+    """
+    global _client_version
+    check_mtime = getattr(settings, "MAPSTORE_CLIENT_VERSION_CHECK_MTIME", False)
+    if _client_version is not None and not check_mtime:
+        return _client_version[1]
+
+    file_path = _get_static_path(VERSION_PATH)
+    signature = get_file_signature(file_path) if file_path else None
+    if _client_version is None or _client_version[0] != signature:
+        version = _read_client_version(file_path) if signature else _get_dist_hash()
+        _client_version = (signature, version)
+    return _client_version[1]
+
+
+@register.simple_tag
+def client_version():
+    return get_client_version()
+
+
+@register.simple_tag
+def versioned_static(path):
+    """
+    Returns the url of the content hashed copy of a static file listed in the manifest,
+    otherwise the url of the file with the client version in the query string
+    """
+    hashed_path = get_hashed_path(path)
+    if hashed_path:
+        return static(hashed_path)
+    return f"{static(path)}?{get_client_version()}"
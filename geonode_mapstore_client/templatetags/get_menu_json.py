@@ -1,9 +1,18 @@
+import time
+
 from django import template
 from django.conf import settings
+from django.core.cache import cache
 from geonode.base.models import Configuration, Menu, MenuItem
 
+from geonode_mapstore_client.utils import render_json_script, to_json_script
+
 register = template.Library()
 
+MAPSTORE_NAVIGATION_CACHE_KEY = "mapstore_navigation"
+MAPSTORE_NAVIGATION_CACHE_TIMEOUT = 60 * 60 * 24 * 1  # 1 day
+DEFAULT_NAVIGATION_PLACEHOLDERS = ["CARDS_MENU", "TOPBAR_MENU", "TOPBAR_MENU_LEFT", "TOPBAR_MENU_RIGHT"]
+
 def _handle_single_item(menu_item):
     m_item = {}
     m_item["type"] = "link"
@@ -13,33 +22,106 @@ def _handle_single_item(menu_item):
         m_item["target"] = "_blank"
     return m_item
 
+def _get_menu_ordering():
+    # menus follow the default ordering of the Menu model
+    return [
+        f"-menu__{field[1:]}" if field.startswith("-") else f"menu__{field}"
+        for field in Menu._meta.ordering or []
+    ]
+
+def build_menus_json(placeholder_names):
+    """
+    Returns the menus of many placeholders, loading the items of all the menus with a single query
+    """
+    menu_items = (
+        MenuItem.objects.filter(menu__placeholder__name__in=placeholder_names)
+        .select_related("menu__placeholder")
+        .order_by(*_get_menu_ordering(), "menu_id", "order")
+    )
+    placeholders = {placeholder_name: {} for placeholder_name in placeholder_names}
+    for menu_item in menu_items:
+        menus = placeholders[menu_item.menu.placeholder.name]
+        menus.setdefault(menu_item.menu, []).append(menu_item)
+    menus_json = {}
+    for placeholder_name, menus in placeholders.items():
+        ms = []
+        for menu, menu_items in menus.items():
+            if len(menu_items) > 1:
+                m = {}
+                m["label"] = menu.title
+                m["type"] = "dropdown"
+                m["items"] = []
+                for menu_item in menu_items:
+                    m_item = _handle_single_item(menu_item)
+                    m["items"].append(m_item)
+
+                ms.append(m)
+            if len(menu_items) == 1:
+                m = _handle_single_item(menu_items[0])
+                ms.append(m)
+        menus_json[placeholder_name] = ms
+    return menus_json
+
+def build_menu_json(placeholder_name):
+    return build_menus_json([placeholder_name])[placeholder_name]
+
+def build_navigation_payload():
+    """
+    Returns the menus of the navigation placeholders and the settings used by the page chrome,
+    with the menus already serialized for json script elements
+    """
+    placeholder_names = getattr(settings, "MAPSTORE_NAVIGATION_PLACEHOLDERS", DEFAULT_NAVIGATION_PLACEHOLDERS)
+    menus = build_menus_json(placeholder_names)
+    return {
+        # identifies the payload in the keys of the other placeholders
+        "version": time.time_ns(),
+        "menus": menus,
+        "menus_json": {placeholder_name: to_json_script(ms) for placeholder_name, ms in menus.items()},
+        "settings": {
+            'ACCOUNT_OPEN_SIGNUP': settings.ACCOUNT_OPEN_SIGNUP,
+            'READ_ONLY': Configuration.load().read_only,
+            'GEOSERVER_WEB_UI_LOCATION': settings.GEOSERVER_WEB_UI_LOCATION
+        },
+    }
+
+def get_navigation_payload():
+    payload = cache.get(MAPSTORE_NAVIGATION_CACHE_KEY)
+    if payload is None:
+        payload = build_navigation_payload()
+        cache.set(MAPSTORE_NAVIGATION_CACHE_KEY, payload, timeout=MAPSTORE_NAVIGATION_CACHE_TIMEOUT)
+    return payload
+
+def clear_navigation_cache():
+    cache.delete(MAPSTORE_NAVIGATION_CACHE_KEY)
+
+def _get_placeholder_menus(placeholder_name):
+    """
+    Returns the menus of a placeholder and their json, placeholders outside the navigation ones
+    are cached in their own entry, bound to the version of the navigation payload
+    """
+    payload = get_navigation_payload()
+    if placeholder_name in payload["menus"]:
+        return payload["menus"][placeholder_name], payload["menus_json"][placeholder_name]
+    cache_key = f"{MAPSTORE_NAVIGATION_CACHE_KEY}_{payload['version']}_{placeholder_name}"
+    placeholder_menus = cache.get(cache_key)
+    if placeholder_menus is None:
+        ms = build_menu_json(placeholder_name)
+        placeholder_menus = (ms, to_json_script(ms))
+        cache.set(cache_key, placeholder_menus, timeout=MAPSTORE_NAVIGATION_CACHE_TIMEOUT)
+    return placeholder_menus
+
 @register.simple_tag
 def get_menu_json(placeholder_name):
-    menus = {
-        m: MenuItem.objects.filter(menu=m).order_by("order")
-        for m in Menu.objects.filter(placeholder__name=placeholder_name)
-    }
-    ms = []
-    for menu, menu_items in menus.items():
-        if len(menu_items) > 1:
-            m = {}
-            m["label"] = menu.title
-            m["type"] = "dropdown"
-            m["items"] = []
-            for menu_item in menu_items:
-                m_item = _handle_single_item(menu_item)
-                m["items"].append(m_item)
-
-            ms.append(m)
-        if len(menu_items) == 1:
-            m = _handle_single_item(menu_items.first())
-            ms.append(m)
-    return ms
+    return _get_placeholder_menus(placeholder_name)[0]
+
+@register.simple_tag
+def menu_json_script(placeholder_name, element_id):
+    """
+    Outputs the menus of a placeholder in a json script element, like the json_script filter,
+    without serializing them on every render
+    """
+    return render_json_script(_get_placeholder_menus(placeholder_name)[1], element_id)
 
 @register.simple_tag
 def get_settings():
-    return {
-        'ACCOUNT_OPEN_SIGNUP': settings.ACCOUNT_OPEN_SIGNUP,
-        'READ_ONLY': Configuration.load().read_only,
-        'GEOSERVER_WEB_UI_LOCATION': settings.GEOSERVER_WEB_UI_LOCATION
-    }
\ No newline at end of file
+    return get_navigation_payload()["settings"]
@@ -1,24 +1,117 @@
+import time
+
 from django import template
 from django.core.cache import caches
 from django.conf import settings
-from django.utils.translation import gettext_lazy as _
+from django.urls import reverse
+from django.utils.translation import get_language, gettext
+
+from geonode_mapstore_client.utils import render_json_script, to_json_script
 
 register = template.Library()
 
+SEARCH_SERVICES_CACHE_KEY = "search_services"
+SEARCH_SERVICES_VERSION_CACHE_KEY = "search_services_version"
+SEARCH_SERVICES_CACHE_TIMEOUT = 60 * 60 * 24 * 1  # 1 day
+# type of the search service of the client querying the search-service-search endpoint
+SEARCH_SERVICE_PROXY_TYPE = "geonode"
+
+# in process copy of the services, as (version, payloads by language, time of the last version check)
+_local_services = (None, {}, 0)
+
+
+def _get_version_check_interval():
+    return getattr(settings, "MAPSTORE_SEARCH_SERVICES_VERSION_CHECK_INTERVAL", 5)  # seconds
+
+
+def _get_services_version(services_cache):
+    version = services_cache.get(SEARCH_SERVICES_VERSION_CACHE_KEY)
+    if version is None:
+        services_cache.add(SEARCH_SERVICES_VERSION_CACHE_KEY, time.time_ns(), timeout=None)
+        version = services_cache.get(SEARCH_SERVICES_VERSION_CACHE_KEY)
+    return version
+
+
+def get_search_services_version():
+    """Returns the version stamp of the search services, it changes when they are edited."""
+    return _get_services_version(caches["search_services"])
+
+
+def clear_search_services_cache():
+    """
+    Stamps a new version of the search services, the shared entries of the
+    previous version are not read anymore and every process reloads its copy
+    """
+    global _local_services
+    services_cache = caches["search_services"]
+    services_cache.set(SEARCH_SERVICES_VERSION_CACHE_KEY, time.time_ns(), timeout=None)
+    _local_services = (None, {}, 0)
+
+
+def build_search_services_payload():
+    """
+    Returns the search services translated in the active language,
+    both as a list and serialized for json script elements
+    """
+    services = populate_search_service_options()
+    return {
+        "services": services,
+        "json": to_json_script(services),
+    }
+
+
+def get_search_services_payload():
+    """
+    Returns the search services payload of the active language, the version stamp in the shared
+    cache is checked at most once every MAPSTORE_SEARCH_SERVICES_VERSION_CHECK_INTERVAL seconds
+    """
+    global _local_services
+    language = get_language()
+    local_version, local_payloads, checked_at = _local_services
+    now = time.monotonic()
+    if now - checked_at >= _get_version_check_interval():
+        services_cache = caches["search_services"]
+        version = _get_services_version(services_cache)
+        if version != local_version:
+            local_payloads = {}
+        _local_services = (version, local_payloads, now)
+    else:
+        version = local_version
+
+    payload = local_payloads.get(language)
+    if payload is None:
+        services_cache = caches["search_services"]
+        cache_key = f"{SEARCH_SERVICES_CACHE_KEY}_{version}_{language}"
+        payload = services_cache.get(cache_key)
+        if payload is None:
+            payload = build_search_services_payload()
+            services_cache.set(cache_key, payload, timeout=SEARCH_SERVICES_CACHE_TIMEOUT)
+        local_payloads[language] = payload
+    return payload
+
 
 @register.simple_tag()
 def get_services_dict():
-    services_cache = caches["search_services"]
+    return get_search_services_payload()["services"]
 
-    data = services_cache.get("search_services")
-    if data and data is not None:
-        return data
 
-    return_val = populate_search_service_options()
+@register.simple_tag()
+def search_services_json_script(element_id):
+    """
+    Outputs the search services in a json script element, like the json_script filter,
+    without translating and serializing them on every render
+    """
+    return render_json_script(get_search_services_payload()["json"], element_id)
 
-    services_cache.set("search_services", return_val)
 
-    return return_val
+def _get_service_type(item):
+    """
+    Returns the type of the client search service and its url, services queried through the server
+    use the geonode search service of the client, the other ones are queried by the browser
+    """
+    if item.indexed or getattr(settings, "MAPSTORE_SEARCH_SERVICES_PROXY", False):
+        return SEARCH_SERVICE_PROXY_TYPE, reverse("search-service-search", args=[item.pk])
+    return "wfs", f"{item.url}"
 
 
 def populate_search_service_options():
@@ -30,15 +123,16 @@ def populate_search_service_options():
         return_val.append({"type": "nominatim", "priority": 5})
 
     for item in SearchService.objects.iterator():
+        service_type, url = _get_service_type(item)
         return_val.append(
             {
-                "type": "wfs",
-                "name": _(f"{item.name}"),
+                "type": service_type,
+                "name": gettext(f"{item.name}"),
                 "priority": item.priority,
-                "displayName": _(f"{item.display_name}"),
-                "subTitle": _(f"{item.sub_title}"),
+                "displayName": gettext(f"{item.display_name}"),
+                "subTitle": gettext(f"{item.sub_title}"),
                 "options": {
-                    "url": f"{item.url}",
+                    "url": url,
                     "typeName": f"{item.typename}",
                     "queriableAttributes": item.attributes,
                     "sortBy": f"{item.sortby}",
@@ -1,11 +1,16 @@
 import os
+import json
+import time
 import shutil
 import zipfile
-from io import BytesIO
+import threading
+from io import BytesIO, StringIO
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
 
 from django.conf import settings
 from django.contrib.auth.models import AnonymousUser
-from django.core.cache import cache
+from django.core.cache import cache, caches
 from django.core.exceptions import PermissionDenied, ValidationError
 from django.core.files.uploadedfile import SimpleUploadedFile
 from django.http import Http404
@@ -25,6 +30,11 @@ from unittest import mock
 # Define temporary directories for testing to avoid affecting the real media/static roots
 TEST_MEDIA_ROOT = os.path.join(settings.PROJECT_ROOT, "test_media")
 TEST_STATIC_ROOT = os.path.join(settings.PROJECT_ROOT, "test_static")
+# caching tests need a real backend, the default one can be a dummy cache
+TEST_CACHES = {
+    "default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"},
+    "search_services": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"},
+}
 
 
 class MetadataViewPermissionsTestCase(TestCase):
@@ -55,9 +65,321 @@ class MetadataViewPermissionsTestCase(TestCase):
             views.metadata(request, 99999)
 
 
+@override_settings(CACHES=TEST_CACHES)
+class MetadataViewCacheTestCase(TestCase):
+    def setUp(self):
+        from .utils import reset_metadata_cache_stats
+
+        self.factory = RequestFactory()
+        self.resource = mock.Mock(pk=1, last_updated="2024-01-01T00:00:00")
+        cache.clear()
+        reset_metadata_cache_stats()
+
+    def _get(self):
+        request = self.factory.get("/metadata/1")
+        request.user = AnonymousUser()
+        return views.metadata(request, 1)
+
+    @mock.patch("geonode_mapstore_client.views.render")
+    @mock.patch("geonode_mapstore_client.views._build_metadata_groups")
+    @mock.patch("geonode.utils.resolve_object")
+    def test_metadata_groups_are_cached_per_resource(self, mocked_resolve_object, mocked_build, mocked_render):
+        from .utils import get_metadata_cache_stats
+
+        mocked_resolve_object.return_value = self.resource
+        mocked_build.return_value = {"General": {}}
+
+        self._get()
+        self._get()
+
+        mocked_build.assert_called_once()
+        self.assertEqual(mocked_render.call_args.kwargs["context"]["metadata_groups"], {"General": {}})
+        self.assertEqual(get_metadata_cache_stats(), {"hits": 1, "misses": 1})
+
+    @mock.patch("geonode_mapstore_client.views.render")
+    @mock.patch("geonode_mapstore_client.views._build_metadata_groups")
+    @mock.patch("geonode.utils.resolve_object")
+    def test_metadata_cache_is_invalidated(self, mocked_resolve_object, mocked_build, mocked_render):
+        from .utils import clear_all_metadata_cache, clear_metadata_cache
+
+        mocked_resolve_object.return_value = self.resource
+        mocked_build.return_value = {"General": {}}
+
+        self._get()
+        self.resource.last_updated = "2024-01-02T00:00:00"
+        self._get()
+        self.assertEqual(mocked_build.call_count, 2)
+
+        clear_metadata_cache(self.resource.pk)
+        self._get()
+        self.assertEqual(mocked_build.call_count, 3)
+
+        # thesauri changes invalidate the pages of every resource
+        clear_all_metadata_cache()
+        self._get()
+        self.assertEqual(mocked_build.call_count, 4)
+
+    @mock.patch("geonode_mapstore_client.views.render")
+    @mock.patch("geonode_mapstore_client.views._build_metadata_groups")
+    @mock.patch("geonode.utils.resolve_object")
+    def test_only_the_rendered_schema_is_cached(self, mocked_resolve_object, mocked_build, mocked_render):
+        mocked_resolve_object.return_value = self.resource
+        schema = {"type": "string", "title": "Title", "maxLength": 10, "geonode:handler": "base"}
+        mocked_build.return_value = {"General": {"title": {"schema": schema, "value": "A title"}}}
+
+        self._get()
+        self._get()
+        self.assertEqual(
+            mocked_render.call_args.kwargs["context"]["metadata_groups"],
+            {"General": {"title": {"schema": {"type": "string", "title": "Title"}, "value": "A title"}}},
+        )
+
+
+class MetadataViewQueriesTestCase(GeoNodeBaseTestSupport):
+    def setUp(self):
+        from geonode.base.models import Link
+        from geonode.base.populate_test_data import create_single_dataset
+
+        self.dataset = create_single_dataset("metadata_queries_dataset")
+        Link.objects.create(
+            resource=self.dataset, name="Zipped", url="http://example.com/zip", extension="zip", link_type="data"
+        )
+        Link.objects.create(
+            resource=self.dataset, name="Page", url="http://example.com/page", extension="html", link_type="html"
+        )
+
+    def _get_resource(self):
+        from django.shortcuts import get_object_or_404
+
+        return get_object_or_404(views._get_metadata_queryset(), pk=self.dataset.pk)
+
+    @override_settings(CACHES=TEST_CACHES)
+    def test_cache_is_invalidated_by_links_and_owner_changes(self):
+        from geonode.base.models import Link
+        from .utils import get_cached_metadata_groups, set_cached_metadata_groups
+
+        resource = self._get_resource()
+        for change in (
+            lambda: Link.objects.create(
+                resource=self.dataset, name="New", url="http://example.com", extension="csv", link_type="data"
+            ),
+            lambda: self.dataset.owner.save(update_fields=["email"]),
+        ):
+            set_cached_metadata_groups(resource, "en", {"General": {}})
+            change()
+            self.assertIsNone(get_cached_metadata_groups(resource, "en"))
+
+        # logins do not change the page
+        set_cached_metadata_groups(resource, "en", {"General": {}})
+        self.dataset.owner.save(update_fields=["last_login"])
+        self.assertIsNotNone(get_cached_metadata_groups(resource, "en"))
+
+    @mock.patch("geonode.metadata.manager.metadata_manager")
+    def test_metadata_groups_queries(self, mocked_metadata_manager):
+        from geonode.base.models import Link
+
+        mocked_metadata_manager.get_schema.return_value = {"type": "object", "properties": {}}
+        mocked_metadata_manager.build_schema_instance.return_value = {}
+
+        # resource with owner, plus the prefetched links
+        with self.assertNumQueries(2):
+            resource = self._get_resource()
+        with self.assertNumQueries(0):
+            metadata_groups = views._build_metadata_groups(resource, "en")
+
+        self.assertEqual(metadata_groups["Responsible"]["Email"], self.dataset.owner.email)
+        self.assertIn("Zipped", metadata_groups["References"])
+        self.assertNotIn("Page", metadata_groups["References"])
+
+        for index in range(5):
+            Link.objects.create(
+                resource=self.dataset, name=f"Link {index}", url="http://example.com", extension="csv", link_type="data"
+            )
+        with self.assertNumQueries(2):
+            resource = self._get_resource()
+        with self.assertNumQueries(0):
+            metadata_groups = views._build_metadata_groups(resource, "en")
+        self.assertIn("Link 4", metadata_groups["References"])
+
+
+class MetadataExportViewTestCase(TestCase):
+    def setUp(self):
+        self.factory = RequestFactory()
+        self.resources = [
+            mock.Mock(pk=1, uuid="uuid-1", title="First"),
+            mock.Mock(pk=2, uuid="uuid-2", title="Second"),
+        ]
+
+    def _get(self, **params):
+        request = self.factory.get("/metadata/export", params)
+        request.user = AnonymousUser()
+        return views.metadata_export(request)
+
+    def _mock_visible_resources(self, mocked_get_visible_resources):
+        queryset = mocked_get_visible_resources.return_value.select_related.return_value.prefetch_related.return_value
+        queryset = queryset.order_by.return_value
+        queryset.iterator.return_value = iter(self.resources)
+
+    @mock.patch("geonode_mapstore_client.views._get_metadata_groups")
+    @mock.patch("geonode.security.utils.get_visible_resources")
+    def test_export_streams_ndjson(self, mocked_get_visible_resources, mocked_get_metadata_groups):
+        import json
+
+        self._mock_visible_resources(mocked_get_visible_resources)
+        mocked_get_metadata_groups.return_value = {
+            "General": {"title": {"schema": {"type": "string"}, "value": "Title"}},
+            "Responsible": {"Name": "admin"},
+        }
+
+        response = self._get(pk="1,2")
+
+        self.assertEqual(response["Content-Type"], "application/x-ndjson")
+        lines = b"".join(response.streaming_content).decode().splitlines()
+        self.assertEqual(len(lines), 2)
+        record = json.loads(lines[0])
+        self.assertEqual(record["pk"], 1)
+        self.assertEqual(
+            record["metadata"], {"General": {"title": "Title"}, "Responsible": {"Name": "admin"}}
+        )
+        queryset = mocked_get_visible_resources.call_args.args[0]
+        self.assertIn("IN (1, 2)", str(queryset.query))
+
+    @mock.patch("geonode_mapstore_client.views._get_metadata_groups")
+    @mock.patch("geonode.security.utils.get_visible_resources")
+    def test_export_streams_json(self, mocked_get_visible_resources, mocked_get_metadata_groups):
+        import json
+
+        self._mock_visible_resources(mocked_get_visible_resources)
+        mocked_get_metadata_groups.return_value = {}
+
+        response = self._get(format="json")
+
+        self.assertEqual(response["Content-Type"], "application/json")
+        data = json.loads(b"".join(response.streaming_content))
+        self.assertEqual([record["pk"] for record in data["resources"]], [1, 2])
+
+    @mock.patch("geonode_mapstore_client.utils.set_cached_metadata_groups")
+    @mock.patch("geonode_mapstore_client.views._build_metadata_groups")
+    @mock.patch("geonode.metadata.manager.metadata_manager")
+    @mock.patch("geonode.security.utils.get_visible_resources")
+    def test_export_compiles_the_schema_once(
+        self, mocked_get_visible_resources, mocked_metadata_manager, mocked_build_metadata_groups, _mocked_set
+    ):
+        def build_metadata_groups(resource, lang, get_schema):
+            _schema, compiled_schema = get_schema(lang)
+            self.assertEqual(compiled_schema.kind, "object")
+            return {}
+
+        self._mock_visible_resources(mocked_get_visible_resources)
+        mocked_metadata_manager.get_schema.return_value = {"type": "object", "properties": {}}
+        mocked_build_metadata_groups.side_effect = build_metadata_groups
+
+        with mock.patch("geonode_mapstore_client.views._compile_schema", wraps=views._compile_schema) as compile_schema:
+            b"".join(self._get().streaming_content)
+        self.assertEqual(mocked_build_metadata_groups.call_count, 2)
+        mocked_metadata_manager.get_schema.assert_called_once_with("en")
+        compile_schema.assert_called_once()
+
+    def test_export_rejects_invalid_parameters(self):
+        self.assertEqual(self._get(format="xml").status_code, 400)
+        self.assertEqual(self._get(pk="1,abc").status_code, 400)
+
+
+class MetadataSchemaParserTestCase(TestCase):
+    schema = {
+        "type": "object",
+        "properties": {
+            "title": {"type": "string"},
+            "date": {"type": "string", "format": "date-time"},
+            "category": {
+                "type": "string",
+                "oneOf": [
+                    {"const": "farming", "title": "Farming"},
+                    {"const": "biota", "title": "Biota"},
+                    {"const": "farming", "title": "Duplicated"},
+                ],
+            },
+            "keywords": {"type": "array", "items": {"type": "string"}},
+            "empty": {},
+        },
+    }
+
+    def test_parse_schema_instance(self):
+        from datetime import datetime
+        from dateutil import tz
+
+        instance = {
+            "title": "Title",
+            "date": "2024-03-01T10:20:30.5+02:00",
+            "category": "farming",
+            "keywords": ["a", "b"],
+            "empty": "value",
+            "unknown": "value",
+            "extraErrors": {},
+        }
+        properties = self.schema["properties"]
+        self.assertEqual(
+            views._parse_schema_instance(instance, self.schema, "en"),
+            {
+                "schema": self.schema,
+                "value": {
+                    "title": {"schema": properties["title"], "value": "Title"},
+                    "date": {
+                        "schema": properties["date"],
+                        "value": datetime(2024, 3, 1, 10, 20, 30, 500000, tzinfo=tz.tzoffset(None, 7200)),
+                    },
+                    "category": {"schema": properties["category"], "value": "Farming"},
+                    "keywords": {
+                        "schema": properties["keywords"],
+                        "value": [
+                            {"schema": properties["keywords"]["items"], "value": "a"},
+                            {"schema": properties["keywords"]["items"], "value": "b"},
+                        ],
+                    },
+                },
+            },
+        )
+
+    def test_parse_date_time_matches_dateutil(self):
+        from dateutil import parser
+
+        for value in [
+            "2024-03-01",
+            "2024-03-01T10:20",
+            "2024-03-01T10:20:30.1234567",
+            "2024-03-01T10:20:30-05:30",
+            "2024-03-01T10:20:30Z",
+            "March 1 2024",
+        ]:
+            self.assertEqual(repr(views._parse_date_time(value)), repr(parser.parse(value)))
+
+    def test_compiled_schema_is_reused_per_language(self):
+        compiled = views._get_compiled_schema(self.schema, "en")
+        self.assertIs(views._get_compiled_schema(self.schema, "en"), compiled)
+        self.assertIsNot(views._get_compiled_schema(self.schema, None), compiled)
+        # schemas are identified by the object, not hashed
+        self.assertIsNot(views._get_compiled_schema(dict(self.schema), "en"), compiled)
+        self.assertIs(views._get_compiled_schema(self.schema, None), views._get_compiled_schema(self.schema, None))
+
+    def test_compiled_schema_is_invalidated_with_the_metadata_cache(self):
+        from .utils import clear_all_metadata_cache
+
+        schema = {"type": "object", "properties": {"category": {"type": "string", "oneOf": []}}}
+        compiled = views._get_compiled_schema(schema, "en")
+        # e.g. a new thesaurus keyword, the schema handlers update the options in place
+        schema["properties"]["category"]["oneOf"].append({"const": "farming", "title": "Farming"})
+        clear_all_metadata_cache()
+        self.assertIsNot(views._get_compiled_schema(schema, "en"), compiled)
+        self.assertEqual(
+            views._parse_schema_instance({"category": "farming"}, schema, "en")["value"]["category"]["value"],
+            "Farming",
+        )
+
+
 @override_settings(
     MEDIA_ROOT=TEST_MEDIA_ROOT,
     STATIC_ROOT=TEST_STATIC_ROOT,
+    MAPSTORE_EXTENSION_JOBS_EXECUTOR="sync",
 )
 class ExtensionFeatureTestCase(TestCase):
     """
@@ -213,6 +535,411 @@ class ExtensionFeatureTestCase(TestCase):
         self.assertTrue(map_plugin_data["bundle"].endswith("MapPlugin/index.js"))
 
 
+    def test_extensions_view_conditional_get(self):
+        """Test that the extensions index is served with validators and answers 304."""
+        Extension.objects.create(
+            name="ActiveExt", active=True, uploaded_file=self._create_mock_zip_file()
+        )
+        url = reverse("mapstore-extension")
+
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        etag = response["ETag"]
+        self.assertTrue(etag.startswith('"'))
+        self.assertNotIn("Last-Modified", response)
+        self.assertIn("max-age", response["Cache-Control"])
+
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response["ETag"], etag)
+
+        Extension.objects.create(
+            name="OtherExt", active=True, uploaded_file=self._create_mock_zip_file()
+        )
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response["ETag"], etag)
+
+    def test_plugins_config_view_conditional_get(self):
+        """Test that the plugins config answers 304 to a matching If-None-Match."""
+        url = reverse("mapstore-pluginsconfig")
+
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        etag = response["ETag"]
+
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+
+    def test_plugins_config_view_hit_and_miss_are_identical(self):
+        """Test that cached and uncached plugins config responses are byte-identical."""
+        Extension.objects.create(
+            name="MapPlugin",
+            active=True,
+            is_map_extension=True,
+            uploaded_file=self._create_mock_zip_file(),
+        )
+        mock_config_dir = os.path.join(settings.STATIC_ROOT, "mapstore", "configs")
+        os.makedirs(mock_config_dir, exist_ok=True)
+        with open(os.path.join(mock_config_dir, "pluginsConfig.json"), "w") as f:
+            f.write('{"plugins": [{"name": "BasePlugin"}], "other": true}')
+
+        url = reverse("mapstore-pluginsconfig")
+        miss = self.client.get(url)
+        hit = self.client.get(url)
+
+        self.assertEqual(miss["Content-Type"], "application/json")
+        self.assertEqual(miss.content, hit.content)
+        self.assertEqual(miss["ETag"], hit["ETag"])
+        self.assertEqual(
+            [p["name"] for p in hit.json()["plugins"]], ["BasePlugin", "MapPlugin"]
+        )
+        self.assertNotIn("other", hit.json())
+
+
+class ConfigLoaderTestCase(TestCase):
+    def setUp(self):
+        from .config_loader import clear_json_configs
+
+        clear_json_configs()
+        self.tearDown()
+        os.makedirs(TEST_STATIC_ROOT, exist_ok=True)
+        self.path = os.path.join(TEST_STATIC_ROOT, "config.json")
+        with open(self.path, "w") as f:
+            f.write('{"plugins": [{"name": "BasePlugin"}]}')
+
+    def tearDown(self):
+        if os.path.exists(TEST_STATIC_ROOT):
+            shutil.rmtree(TEST_STATIC_ROOT)
+
+    def test_load_json_config_is_memoized(self):
+        from .config_loader import load_json_config
+
+        with mock.patch("geonode_mapstore_client.config_loader.json.load", wraps=json.load) as mocked_load:
+            first = load_json_config(self.path)
+            second = load_json_config(self.path)
+        self.assertIs(first, second)
+        mocked_load.assert_called_once()
+
+    def test_load_json_config_reloads_changed_files(self):
+        from .config_loader import load_json_config
+
+        self.assertEqual(load_json_config(self.path)["plugins"][0]["name"], "BasePlugin")
+        with open(self.path, "w") as f:
+            f.write('{"plugins": [{"name": "ChangedPlugin"}]}')
+        stat = os.stat(self.path)
+        os.utime(self.path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1000000))
+        self.assertEqual(load_json_config(self.path)["plugins"][0]["name"], "ChangedPlugin")
+
+    def test_load_json_config_is_read_only(self):
+        from .config_loader import load_json_config, thaw
+
+        config = load_json_config(self.path)
+        with self.assertRaises(TypeError):
+            config["plugins"] = []
+        with self.assertRaises(AttributeError):
+            config["plugins"].append({})
+
+        copy = thaw(config)
+        copy["plugins"].append({"name": "Other"})
+        self.assertEqual(len(load_json_config(self.path)["plugins"]), 1)
+
+    def test_load_json_config_default(self):
+        from .config_loader import load_json_config
+
+        self.assertEqual(load_json_config(os.path.join(TEST_STATIC_ROOT, "missing.json"), {}), {})
+
+
+class PatcherTestCase(TestCase):
+    plugins = {
+        "map_viewer": [
+            {"name": "Search", "cfg": {"withToggle": True}},
+            {"name": "Measure"},
+            {"name": "Toolbar", "cfg": {"items": [{"name": "Measure"}]}},
+        ],
+        "dataset_viewer": [{"name": "Measure"}],
+    }
+
+    def test_jsonpath_filter_and_recursive_descent(self):
+        from .patcher import parse_jsonpath, select
+
+        self.assertEqual(
+            select(self.plugins, parse_jsonpath("$.map_viewer..[?(@.name == 'Measure')]")),
+            [("map_viewer", 1), ("map_viewer", 2, "cfg", "items", 0)],
+        )
+        self.assertEqual(
+            select(self.plugins, parse_jsonpath("$.*[0].name")),
+            [("map_viewer", 0, "name"), ("dataset_viewer", 0, "name")],
+        )
+
+    def test_apply_patch_rules(self):
+        from .patcher import apply_patch_rules
+
+        patched = apply_patch_rules(
+            self.plugins,
+            [
+                {"op": "replace", "jsonpath": "$.map_viewer..[?(@.name === 'Search')].cfg", "value": {"a": 1}},
+                {"op": "remove", "jsonpath": "$..[?(@.name == 'Measure')]"},
+                {"op": "add", "path": "/dataset_viewer/-", "value": {"name": "Print"}},
+            ],
+        )
+        self.assertEqual(
+            patched,
+            {
+                "map_viewer": [
+                    {"name": "Search", "cfg": {"a": 1}},
+                    {"name": "Toolbar", "cfg": {"items": []}},
+                ],
+                "dataset_viewer": [{"name": "Print"}],
+            },
+        )
+        self.assertEqual(len(self.plugins["map_viewer"]), 3)
+
+    def test_unsupported_rules_raise(self):
+        from .patcher import PatchRuleError, apply_patch_rules
+
+        with self.assertRaises(PatchRuleError):
+            apply_patch_rules(self.plugins, [{"op": "add", "jsonpath": "$.map_viewer[?(@.name.length > 2)]"}])
+
+
+@override_settings(
+    CACHES=TEST_CACHES,
+    STATIC_ROOT=TEST_STATIC_ROOT,
+    MAPSTORE_INCLUDE_NOMINATIM_IN_CUSTOM_SEARCH_SERVICES=True,
+    MAPSTORE_PLUGINS_CONFIG_PATCH_RULES=[
+        {"op": "remove", "jsonpath": "$.map_viewer..[?(@.name == 'Measure')]"}
+    ],
+)
+class LocalConfigViewTestCase(TestCase):
+    def setUp(self):
+        from .config_loader import clear_json_configs
+        from .templatetags.get_search_services import clear_search_services_cache
+
+        clear_json_configs()
+        cache.clear()
+        caches["search_services"].clear()
+        clear_search_services_cache()
+        os.makedirs(os.path.join(TEST_STATIC_ROOT, "mapstore", "configs"), exist_ok=True)
+        with open(os.path.join(TEST_STATIC_ROOT, "mapstore", "configs", "localConfig.json"), "w") as f:
+            json.dump({"proxyUrl": "/proxy/", "plugins": {"map_viewer": [{"name": "Search"}, {"name": "Measure"}]}}, f)
+        self.client = APIClient()
+
+    def tearDown(self):
+        if os.path.exists(TEST_STATIC_ROOT):
+            shutil.rmtree(TEST_STATIC_ROOT)
+
+    def test_local_config_is_patched_and_compressed(self):
+        import gzip
+
+        url = reverse("mapstore-localconfig")
+        response = self.client.get(url, HTTP_ACCEPT_ENCODING="gzip, deflate")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["Content-Encoding"], "gzip")
+        self.assertIn("Accept-Encoding", response["Vary"])
+        data = json.loads(gzip.decompress(response.content))
+        self.assertEqual(data["proxyUrl"], "/proxy/")
+        self.assertEqual(
+            data["plugins"]["map_viewer"],
+            [{"name": "Search", "cfg": {"searchOptions": {"services": [{"type": "nominatim", "priority": 5}]}}}],
+        )
+
+        response = self.client.get(url, HTTP_ACCEPT_ENCODING="gzip", HTTP_IF_NONE_MATCH=response["ETag"])
+        self.assertEqual(response.status_code, 304)
+
+        response = self.client.get(url, HTTP_ACCEPT_ENCODING="identity")
+        self.assertNotIn("Content-Encoding", response)
+        self.assertEqual(response.json()["proxyUrl"], "/proxy/")
+
+    def test_local_config_follows_the_patch_rules_and_search_services(self):
+        from .templatetags.get_search_services import clear_search_services_cache
+
+        url = reverse("mapstore-localconfig")
+        response = self.client.get(url, HTTP_ACCEPT_ENCODING="identity")
+        self.assertEqual([p["name"] for p in response.json()["plugins"]["map_viewer"]], ["Search"])
+
+        with override_settings(MAPSTORE_PLUGINS_CONFIG_PATCH_RULES=[]):
+            response = self.client.get(url, HTTP_ACCEPT_ENCODING="identity")
+            self.assertEqual([p["name"] for p in response.json()["plugins"]["map_viewer"]], ["Search", "Measure"])
+
+        with override_settings(MAPSTORE_INCLUDE_NOMINATIM_IN_CUSTOM_SEARCH_SERVICES=False):
+            clear_search_services_cache()
+            response = self.client.get(url, HTTP_ACCEPT_ENCODING="identity")
+            self.assertEqual(response.json()["plugins"]["map_viewer"], [{"name": "Search"}])
+
+    def test_local_config_is_cached_by_full_language_code(self):
+        from .utils import get_local_config_cache_key
+
+        self.assertNotEqual(get_local_config_cache_key("pt"), get_local_config_cache_key("pt-br"))
+        self.assertNotEqual(get_local_config_cache_key("zh-hans"), get_local_config_cache_key("zh-hant"))
+
+
+@override_settings(CACHES=TEST_CACHES)
+class ResourceUrlsContextProcessorTestCase(TestCase):
+    def setUp(self):
+        from .context_processors import reset_static_geonode_settings
+
+        cache.clear()
+        reset_static_geonode_settings()
+        self.request = RequestFactory().get("/")
+
+    @mock.patch("geonode_mapstore_client.context_processors.get_max_upload_parallelism_limit", return_value=5)
+    @mock.patch("geonode_mapstore_client.context_processors.get_max_upload_size", return_value=100)
+    @mock.patch("geonode_mapstore_client.context_processors.get_supported_datasets_file_types", return_value=[])
+    def test_resource_urls_is_cached(self, mocked_file_types, mocked_upload_size, mocked_parallelism):
+        from geonode.upload.models import UploadSizeLimit
+        from .context_processors import resource_urls
+
+        first = resource_urls(self.request)
+        second = resource_urls(self.request)
+
+        self.assertEqual(first, second)
+        self.assertEqual(second["GEONODE_SETTINGS"]["DATASET_MAX_UPLOAD_SIZE"], 100)
+        self.assertEqual(second["GEONODE_SETTINGS"]["MAX_PARALLEL_UPLOADS"], 5)
+        mocked_file_types.assert_called_once()
+        self.assertEqual(mocked_upload_size.call_count, 2)
+
+        UploadSizeLimit.objects.update_or_create(slug="test_upload_size", defaults={"max_size": 10})
+        resource_urls(self.request)
+        self.assertEqual(mocked_upload_size.call_count, 4)
+        mocked_file_types.assert_called_once()
+
+    @mock.patch("geonode_mapstore_client.context_processors.get_supported_datasets_file_types", return_value=[])
+    def test_resource_urls_follows_settings_changes(self, mocked_file_types):
+        from .context_processors import resource_urls
+
+        with override_settings(DEFAULT_MAP_ZOOM=7):
+            self.assertEqual(resource_urls(self.request)["GEONODE_SETTINGS"]["DEFAULT_MAP_ZOOM"], 7)
+        with override_settings(DEFAULT_MAP_ZOOM=3):
+            self.assertEqual(resource_urls(self.request)["GEONODE_SETTINGS"]["DEFAULT_MAP_ZOOM"], 3)
+
+
+@override_settings(CACHES=TEST_CACHES, MAPSTORE_NAVIGATION_PLACEHOLDERS=["TEST_MENU"])
+class MenuJsonTestCase(TestCase):
+    def setUp(self):
+        from geonode.base.models import Configuration, MenuPlaceholder
+
+        self.placeholder = MenuPlaceholder.objects.create(name="TEST_MENU")
+        Configuration.load()
+        cache.clear()
+
+    def _create_menu(self, order, items):
+        from geonode.base.models import Menu, MenuItem
+
+        menu = Menu.objects.create(title=f"Menu {order}", placeholder=self.placeholder, order=order)
+        for index in range(items):
+            MenuItem.objects.create(
+                title=f"Item {order}.{index}", menu=menu, order=index, url=f"/item/{order}/{index}", blank_target=False
+            )
+        return menu
+
+    def test_get_menu_json_structure(self):
+        from .templatetags.get_menu_json import get_menu_json
+
+        self._create_menu(1, 2)
+        self._create_menu(2, 1)
+        self._create_menu(3, 0)
+
+        self.assertEqual(
+            get_menu_json("TEST_MENU"),
+            [
+                {
+                    "label": "Menu 1",
+                    "type": "dropdown",
+                    "items": [
+                        {"type": "link", "href": "/item/1/0", "label": "Item 1.0"},
+                        {"type": "link", "href": "/item/1/1", "label": "Item 1.1"},
+                    ],
+                },
+                {"type": "link", "href": "/item/2/0", "label": "Item 2.0"},
+            ],
+        )
+
+    def test_navigation_payload(self):
+        from .templatetags.get_menu_json import get_navigation_payload, get_settings, menu_json_script
+
+        from geonode.base.models import MenuItem
+
+        self._create_menu(1, 1)
+        MenuItem.objects.filter(title="Item 1.0").update(title="<Item>")
+
+        with override_settings(MAPSTORE_NAVIGATION_PLACEHOLDERS=["TEST_MENU", "EMPTY_MENU"]):
+            # menus of all the placeholders and the configuration
+            with self.assertNumQueries(2):
+                payload = get_navigation_payload()
+            with self.assertNumQueries(0):
+                settings_payload = get_settings()
+                script = menu_json_script("TEST_MENU", "menu-TEST_MENU")
+
+        self.assertEqual(payload["menus"]["EMPTY_MENU"], [])
+        self.assertIn("READ_ONLY", settings_payload)
+        self.assertEqual(
+            script,
+            '<script id="menu-TEST_MENU" type="application/json">'
+            '[{"type": "link", "href": "/item/1/0", "label": "\\u003CItem\\u003E"}]</script>',
+        )
+
+    def test_get_menu_json_queries(self):
+        from .templatetags.get_menu_json import clear_navigation_cache, get_menu_json, get_navigation_payload
+
+        self._create_menu(1, 2)
+        # menus and configuration
+        with self.assertNumQueries(2):
+            self.assertEqual(len(get_menu_json("TEST_MENU")), 1)
+        with self.assertNumQueries(0):
+            get_menu_json("TEST_MENU")
+
+        # saving menus invalidates the cache, the number of queries does not depend on the menu size
+        for order in range(2, 6):
+            self._create_menu(order, 5)
+        with self.assertNumQueries(2):
+            self.assertEqual(len(get_menu_json("TEST_MENU")), 5)
+
+        # placeholders outside the navigation ones are cached in their own entries
+        with self.assertNumQueries(1):
+            self.assertEqual(get_menu_json("OTHER_MENU"), [])
+        with self.assertNumQueries(0):
+            get_menu_json("OTHER_MENU")
+        self.assertEqual(get_navigation_payload()["menus"].keys(), {"TEST_MENU"})
+
+        # and rebuilt with the navigation payload
+        clear_navigation_cache()
+        with self.assertNumQueries(3):
+            get_menu_json("OTHER_MENU")
+
+
+@override_settings(CACHES=TEST_CACHES)
+class ExtensionCacheGenerationTestCase(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_clear_extension_caches_bumps_generation(self):
+        from .utils import clear_extension_caches, get_extension_cache, get_extensions_generation
+
+        build = mock.Mock(side_effect=["first", "second"])
+        generation = get_extensions_generation()
+        self.assertEqual(get_extension_cache("test_key", build), "first")
+        self.assertEqual(get_extension_cache("test_key", build), "first")
+
+        clear_extension_caches()
+        self.assertNotEqual(get_extensions_generation(), generation)
+        self.assertEqual(get_extension_cache("test_key", build), "second")
+        self.assertEqual(build.call_count, 2)
+
+    def test_rebuild_in_progress_serves_previous_generation(self):
+        from .utils import clear_extension_caches, get_extension_cache, get_extensions_generation
+
+        get_extension_cache("test_key", lambda: "previous")
+        clear_extension_caches()
+        # another worker is rebuilding the current generation
+        cache.add(f"test_key_{get_extensions_generation()}_lock", True)
+
+        build = mock.Mock(return_value="current")
+        self.assertEqual(get_extension_cache("test_key", build), "previous")
+        build.assert_not_called()
+
+
 class RequestConfigurationViewTestCase(GeoNodeBaseTestSupport):
     """
     Test cases for RequestConfigurationView.
@@ -523,3 +1250,1034 @@ class BaseConfigurationRuleHandlerTestCase(GeoNodeBaseTestSupport):
         
         self.assertTrue(token1_found, "User1's token should be in their rules")
         self.assertTrue(token2_found, "User2's token should be in their rules")
+
+
+@override_settings(CACHES=TEST_CACHES, MAPSTORE_INCLUDE_NOMINATIM_IN_CUSTOM_SEARCH_SERVICES=False)
+class SearchServicesCacheTestCase(TestCase):
+    def setUp(self):
+        from .templatetags.get_search_services import clear_search_services_cache
+
+        caches["search_services"].clear()
+        clear_search_services_cache()
+
+    def _create_service(self, name):
+        from .models import SearchService
+
+        return SearchService.objects.create(
+            name=name, display_name="${properties.name}", url="http://localhost/wfs", typename="geonode:places"
+        )
+
+    def test_services_are_served_from_the_process_copy(self):
+        from .templatetags.get_search_services import get_services_dict
+
+        self._create_service("places")
+        with self.assertNumQueries(1):
+            services = get_services_dict()
+        with self.assertNumQueries(0):
+            self.assertIs(get_services_dict(), services)
+        self.assertEqual([str(service["name"]) for service in services], ["places"])
+
+    def test_save_and_delete_stamp_a_new_version(self):
+        from .templatetags.get_search_services import get_services_dict, SEARCH_SERVICES_VERSION_CACHE_KEY
+
+        self.assertEqual(get_services_dict(), [])
+        version = caches["search_services"].get(SEARCH_SERVICES_VERSION_CACHE_KEY)
+
+        service = self._create_service("places")
+        self.assertNotEqual(caches["search_services"].get(SEARCH_SERVICES_VERSION_CACHE_KEY), version)
+        self.assertEqual([str(service["name"]) for service in get_services_dict()], ["places"])
+
+        service.delete()
+        self.assertEqual(get_services_dict(), [])
+
+    @override_settings(MAPSTORE_SEARCH_SERVICES_VERSION_CHECK_INTERVAL=0)
+    def test_version_stamped_by_another_process_is_picked_up(self):
+        from .templatetags.get_search_services import get_services_dict, SEARCH_SERVICES_VERSION_CACHE_KEY
+        from .models import SearchService
+
+        self.assertEqual(get_services_dict(), [])
+        # simulates a change saved by another process, which only updates the shared cache
+        SearchService.objects.bulk_create(
+            [SearchService(name="places", display_name="${properties.name}", typename="geonode:places")]
+        )
+        caches["search_services"].set(SEARCH_SERVICES_VERSION_CACHE_KEY, "other", timeout=None)
+        self.assertEqual([str(service["name"]) for service in get_services_dict()], ["places"])
+
+    def test_json_script_is_serialized_once_per_language(self):
+        from django.utils import translation
+        from .templatetags.get_search_services import search_services_json_script, get_search_services_payload
+
+        self._create_service("<places>")
+        with translation.override("en"):
+            script = search_services_json_script("SEARCH_SERVICES")
+            with self.assertNumQueries(0):
+                self.assertEqual(search_services_json_script("SEARCH_SERVICES"), script)
+            payload = get_search_services_payload()
+        self.assertTrue(script.startswith('<script id="SEARCH_SERVICES" type="application/json">'))
+        self.assertNotIn("<places>", script)
+        self.assertIn("\\u003Cplaces\\u003E", script)
+        self.assertEqual(json.loads(payload["json"]), payload["services"])
+
+        with translation.override("it"), self.assertNumQueries(1):
+            self.assertIsNot(get_search_services_payload(), payload)
+
+
+class _StubWFSHandler(BaseHTTPRequestHandler):
+    features = [
+        {"type": "Feature", "properties": {"name": name, "population": 1}, "geometry": None}
+        for name in ("Rome", "Romania", "Paris")
+    ]
+    requests = []
+    delay = 0
+
+    def do_GET(self):
+        params = parse_qs(urlparse(self.path).query)
+        self.requests.append(params)
+        time.sleep(self.delay)
+        features = self.features
+        if "cql_filter" in params:
+            text = params["cql_filter"][0].split("'%")[1].split("%'")[0].lower()
+            features = [feature for feature in features if text in feature["properties"]["name"].lower()]
+        if "maxFeatures" in params:
+            features = features[: int(params["maxFeatures"][0])]
+        content = json.dumps({"type": "FeatureCollection", "features": features}).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(content)))
+        self.end_headers()
+        self.wfile.write(content)
+
+    def log_message(self, *args):
+        pass
+
+
+@override_settings(CACHES=TEST_CACHES)
+class SearchServiceProxyTestCase(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.server = ThreadingHTTPServer(("127.0.0.1", 0), _StubWFSHandler)
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+        super().tearDownClass()
+
+    def setUp(self):
+        from .models import SearchService
+        from .search_proxy import clear_search_results
+
+        clear_search_results()
+        _StubWFSHandler.requests = []
+        _StubWFSHandler.delay = 0
+        self.service = SearchService.objects.create(
+            name="places",
+            display_name="${properties.name}",
+            url=f"http://127.0.0.1:{self.server.server_port}/geoserver/wfs",
+            typename="geonode:places",
+            attributes=["name"],
+            sortby="name",
+            maxFeatures=10,
+        )
+        self.url = reverse("search-service-search", args=[self.service.pk])
+
+    def test_search_returns_geojson_and_caches_results(self):
+        response = self.client.get(self.url, {"q": " Rom "})
+        self.assertEqual(response.status_code, 200)
+        names = [feature["properties"]["name"] for feature in response.json()["features"]]
+        self.assertEqual(names, ["Rome", "Romania"])
+        params = _StubWFSHandler.requests[0]
+        self.assertEqual(params["typeName"], ["geonode:places"])
+        self.assertEqual(params["cql_filter"], ["(name ILIKE '%rom%')"])
+        self.assertEqual(params["sortBy"], ["name"])
+
+        self.assertEqual(self.client.get(self.url, {"q": "ROM"}).json(), response.json())
+        self.assertEqual(len(_StubWFSHandler.requests), 1)
+
+    def test_complete_results_answer_longer_queries(self):
+        self.client.get(self.url, {"q": "rom"})
+        response = self.client.get(self.url, {"q": "roman"})
+        self.assertEqual([feature["properties"]["name"] for feature in response.json()["features"]], ["Romania"])
+        self.assertEqual(len(_StubWFSHandler.requests), 1)
+
+        # truncated results cannot answer longer queries
+        self.service.maxFeatures = 2
+        self.service.save()
+        self.client.get(self.url, {"q": "rom"})
+        self.client.get(self.url, {"q": "roma"})
+        self.assertEqual(len(_StubWFSHandler.requests), 3)
+
+    def test_concurrent_identical_queries_are_coalesced(self):
+        from concurrent.futures import ThreadPoolExecutor
+        from .search_proxy import search
+
+        _StubWFSHandler.delay = 0.2
+        with ThreadPoolExecutor(max_workers=5) as executor:
+            results = list(executor.map(lambda text: search(self.service, text), ["paris"] * 5))
+        self.assertEqual(len(_StubWFSHandler.requests), 1)
+        self.assertTrue(all(result is results[0] for result in results))
+
+    def test_user_credentials_are_sent_to_geoserver_only(self):
+        from django.contrib.auth import get_user_model
+
+        user = get_user_model().objects.create_user("searcher", password="searcher")
+        self.client.force_login(user)
+        with mock.patch(
+            "geonode_mapstore_client.handlers.get_user_access_token", return_value=mock.Mock(token="secret")
+        ):
+            self.client.get(self.url, {"q": "rome"})
+            self.assertNotIn("access_token", _StubWFSHandler.requests[-1])
+
+            with override_settings(GEOSERVER_LOCATION=f"http://127.0.0.1:{self.server.server_port}/geoserver/"):
+                self.client.get(self.url, {"q": "rome"})
+                self.assertEqual(_StubWFSHandler.requests[-1]["access_token"], ["secret"])
+                # results are cached per token
+                self.client.logout()
+                self.client.get(self.url, {"q": "rome"})
+                self.client.get(self.url, {"q": "paris"})
+                self.assertNotIn("access_token", _StubWFSHandler.requests[-1])
+        self.assertEqual(len(_StubWFSHandler.requests), 3)
+
+    def test_proxied_services_use_the_geonode_client_service(self):
+        from .templatetags.get_search_services import SEARCH_SERVICE_PROXY_TYPE, populate_search_service_options
+
+        with override_settings(MAPSTORE_INCLUDE_NOMINATIM_IN_CUSTOM_SEARCH_SERVICES=False):
+            self.assertEqual(populate_search_service_options()[0]["type"], "wfs")
+            with override_settings(MAPSTORE_SEARCH_SERVICES_PROXY=True):
+                service = populate_search_service_options()[0]
+        self.assertEqual(service["type"], SEARCH_SERVICE_PROXY_TYPE)
+        self.assertEqual(service["options"]["url"], self.url)
+
+    def test_unavailable_service(self):
+        self.service.url = "http://127.0.0.1:1/geoserver/wfs"
+        self.service.save()
+        self.assertEqual(self.client.get(self.url, {"q": "rome"}).status_code, 502)
+        self.assertEqual(self.client.get(self.url).status_code, 400)
+
+
+@override_settings(CACHES=TEST_CACHES, MAPSTORE_SEARCH_INDEX_ROOT=os.path.join(TEST_MEDIA_ROOT, "search_indexes"))
+class SearchIndexTestCase(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.server = ThreadingHTTPServer(("127.0.0.1", 0), _StubWFSHandler)
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+        super().tearDownClass()
+
+    def setUp(self):
+        from .models import SearchService
+        from .search_proxy import clear_search_results
+
+        clear_search_results()
+        cache.clear()
+        _StubWFSHandler.requests = []
+        _StubWFSHandler.delay = 0
+        self.service = SearchService.objects.create(
+            name="places",
+            display_name="${properties.name}",
+            url=f"http://127.0.0.1:{self.server.server_port}/geoserver/wfs",
+            typename="geonode:places",
+            attributes=["name"],
+            sortby="name",
+            srsName="EPSG:3857",
+            maxFeatures=1,
+            indexed=True,
+        )
+        self.url = reverse("search-service-search", args=[self.service.pk])
+
+    def tearDown(self):
+        if os.path.exists(TEST_MEDIA_ROOT):
+            shutil.rmtree(TEST_MEDIA_ROOT)
+
+    def test_command_builds_the_index_used_by_the_search(self):
+        from django.core.management import call_command
+
+        call_command("build_search_indexes", stdout=StringIO())
+        self.assertEqual(len(_StubWFSHandler.requests), 1)
+        self.assertEqual(_StubWFSHandler.requests[0]["srsName"], ["EPSG:3857"])
+        self.assertNotIn("cql_filter", _StubWFSHandler.requests[0])
+
+        response = self.client.get(self.url, {"q": "ROM"})
+        self.assertEqual(response.status_code, 200)
+        # maxFeatures is honoured and only the searched properties are kept
+        self.assertEqual(
+            response.json()["features"],
+            [{"type": "Feature", "id": None, "geometry": None, "properties": {"name": "Rome"}}],
+        )
+        self.assertEqual(self.client.get(self.url, {"q": "is"}).json()["features"][0]["properties"]["name"], "Paris")
+        self.assertEqual(len(_StubWFSHandler.requests), 1)
+
+    def test_searches_use_the_wfs_until_the_index_is_built(self):
+        with mock.patch("geonode_mapstore_client.search_index.schedule_search_index_build") as schedule_build:
+            response = self.client.get(self.url, {"q": "rome"})
+        self.assertEqual(response.json()["features"][0]["properties"]["name"], "Rome")
+        self.assertIn("cql_filter", _StubWFSHandler.requests[0])
+        schedule_build.assert_called_once()
+
+    def test_old_indexes_are_refreshed(self):
+        from .search_index import build_search_index, get_search_index
+
+        build_search_index(self.service)
+        self.service.index_refresh_interval = 60
+        with mock.patch("geonode_mapstore_client.search_index.schedule_search_index_build") as schedule_build:
+            self.assertIsNotNone(get_search_index(self.service))
+            schedule_build.assert_not_called()
+            with mock.patch("geonode_mapstore_client.search_index.time.time", return_value=time.time() + 120):
+                self.assertIsNotNone(get_search_index(self.service))
+            schedule_build.assert_called_once()
+
+            # an index built for another srsName is not used
+            self.service.srsName = "EPSG:4326"
+            self.assertIsNone(get_search_index(self.service))
+
+    def test_builds_are_scheduled_on_the_workers(self):
+        from .search_index import schedule_search_index_build
+
+        with mock.patch("geonode_mapstore_client.tasks.build_search_index_task.delay") as delay:
+            with override_settings(ASYNC_SIGNALS=False):
+                schedule_search_index_build(self.service)
+            delay.assert_not_called()
+            with override_settings(ASYNC_SIGNALS=True):
+                schedule_search_index_build(self.service)
+                schedule_search_index_build(self.service)
+            delay.assert_called_once_with(self.service.pk)
+
+    def test_indexed_values_are_normalized_as_the_query(self):
+        from .search_index import SearchIndex
+
+        index = SearchIndex(
+            {
+                "built_at": time.time(),
+                "srsName": "EPSG:4326",
+                "attributes": ["name"],
+                "properties": ["name"],
+                "features": [{"type": "Feature", "properties": {"name": "New\t York "}}],
+            }
+        )
+        self.assertEqual(len(index.search("new york", 10)["features"]), 1)
+
+
+@override_settings(DEBUG=False, STATIC_ROOT=TEST_STATIC_ROOT)
+class ClientVersionTestCase(TestCase):
+    def setUp(self):
+        from .templatetags.client_version import reset_client_version
+
+        reset_client_version()
+        os.makedirs(os.path.join(TEST_STATIC_ROOT, "mapstore", "dist", "js"), exist_ok=True)
+        with open(os.path.join(TEST_STATIC_ROOT, "mapstore", "dist", "js", "gn-map.js"), "w") as f:
+            f.write("console.log('map');")
+        self.version_path = os.path.join(TEST_STATIC_ROOT, "mapstore", "version.txt")
+        with open(self.version_path, "w") as f:
+            f.write("v1\n")
+
+    def tearDown(self):
+        if os.path.exists(TEST_STATIC_ROOT):
+            shutil.rmtree(TEST_STATIC_ROOT)
+
+    def _write_version(self, version):
+        with open(self.version_path, "w") as f:
+            f.write(version)
+        # moves the mtime forward, writes within the filesystem timestamp resolution would not change it
+        os.utime(self.version_path, ns=(time.time_ns(), time.time_ns() + 10**9))
+
+    def test_version_is_read_once_per_process(self):
+        from .templatetags.client_version import get_client_version
+
+        self.assertEqual(get_client_version(), "v1")
+        self._write_version("v2.0")
+        with mock.patch("builtins.open") as mocked_open:
+            self.assertEqual(get_client_version(), "v1")
+        mocked_open.assert_not_called()
+
+    def test_version_is_read_again_when_changed_with_mtime_check(self):
+        from .templatetags.client_version import get_client_version
+
+        with self.settings(MAPSTORE_CLIENT_VERSION_CHECK_MTIME=True):
+            self.assertEqual(get_client_version(), "v1")
+            self._write_version("v2.0")
+            self.assertEqual(get_client_version(), "v2.0")
+
+    def test_dist_hash_is_used_without_version_file(self):
+        from .templatetags.client_version import get_client_version
+
+        os.remove(self.version_path)
+        version = get_client_version()
+        self.assertEqual(len(version), 12)
+
+    @mock.patch("geonode_mapstore_client.context_processors.get_supported_datasets_file_types", return_value=[])
+    def test_version_is_a_context_variable(self, *mocks):
+        from .context_processors import resource_urls
+
+        with mock.patch("geonode_mapstore_client.context_processors.get_upload_limits", return_value={}):
+            self.assertEqual(resource_urls(RequestFactory().get("/"))["CLIENT_VERSION"], "v1")
+
+
+@override_settings(DEBUG=False, STATIC_ROOT=TEST_STATIC_ROOT, STATIC_URL="/static/")
+class StaticManifestTestCase(TestCase):
+    def setUp(self):
+        from .config_loader import clear_json_configs
+
+        clear_json_configs()
+        self.files = {
+            "mapstore/dist/js/gn-map.js": "console.log('map');",
+            "mapstore/dist/js/10.9845598934f4600d.chunk.js": "console.log('chunk');",
+            "mapstore/dist/themes/geonode.css": "body {}",
+            "mapstore/ms-translations/data.en-US.json": "{}",
+            "mapstore/gn-translations/data.en-US.json": "{}",
+        }
+        for path, content in self.files.items():
+            self._write(path, content)
+
+    def tearDown(self):
+        if os.path.exists(TEST_STATIC_ROOT):
+            shutil.rmtree(TEST_STATIC_ROOT)
+
+    def _write(self, path, content):
+        file_path = os.path.join(TEST_STATIC_ROOT, path)
+        os.makedirs(os.path.dirname(file_path), exist_ok=True)
+        with open(file_path, "w") as f:
+            f.write(content)
+
+    def test_manifest_maps_files_to_content_hashed_copies(self):
+        from django.core.management import call_command
+        from .templatetags.client_version import versioned_static
+
+        call_command("build_static_manifest", stdout=StringIO())
+        with open(os.path.join(TEST_STATIC_ROOT, "mapstore", "manifest.json")) as f:
+            paths = json.load(f)["paths"]
+
+        self.assertEqual(
+            sorted(paths),
+            [
+                "mapstore/dist/js/gn-map.js",
+                "mapstore/dist/themes/geonode.css",
+                "mapstore/gn-translations",
+                "mapstore/ms-translations",
+            ],
+        )
+        hashed_path = paths["mapstore/dist/js/gn-map.js"]
+        self.assertRegex(hashed_path, r"^mapstore/dist/js/gn-map\.[0-9a-f]{12}\.js$")
+        with open(os.path.join(TEST_STATIC_ROOT, hashed_path)) as f:
+            self.assertEqual(f.read(), self.files["mapstore/dist/js/gn-map.js"])
+        translations_path = os.path.join(TEST_STATIC_ROOT, paths["mapstore/ms-translations"])
+        self.assertTrue(os.path.isfile(os.path.join(translations_path, "data.en-US.json")))
+        self.assertEqual(versioned_static("mapstore/dist/js/gn-map.js"), f"/static/{hashed_path}")
+
+    def test_only_changed_files_get_a_new_name(self):
+        from .static_manifest import build_static_manifest
+
+        paths = build_static_manifest()
+        self.assertEqual(build_static_manifest(), paths)
+
+        self._write("mapstore/dist/js/gn-map.js", "console.log('new map');")
+        new_paths = build_static_manifest()
+        self.assertNotEqual(new_paths["mapstore/dist/js/gn-map.js"], paths["mapstore/dist/js/gn-map.js"])
+        self.assertEqual(new_paths["mapstore/dist/themes/geonode.css"], paths["mapstore/dist/themes/geonode.css"])
+        self.assertEqual(new_paths["mapstore/ms-translations"], paths["mapstore/ms-translations"])
+
+    def test_translations_folders_ignore_compressed_copies_and_drop_old_versions(self):
+        from .static_manifest import build_static_manifest
+
+        paths = build_static_manifest()
+        self._write("mapstore/ms-translations/data.en-US.json.gz", "compressed")
+        self.assertEqual(build_static_manifest()["mapstore/ms-translations"], paths["mapstore/ms-translations"])
+
+        self._write("mapstore/ms-translations/data.en-US.json", '{"locale": "en-US", "messages": {"new": "New"}}')
+        new_paths = build_static_manifest()
+        self.assertNotEqual(new_paths["mapstore/ms-translations"], paths["mapstore/ms-translations"])
+        self.assertTrue(os.path.isdir(os.path.join(TEST_STATIC_ROOT, new_paths["mapstore/ms-translations"])))
+        self.assertFalse(os.path.exists(os.path.join(TEST_STATIC_ROOT, paths["mapstore/ms-translations"])))
+        self.assertTrue(os.path.isdir(os.path.join(TEST_STATIC_ROOT, "mapstore", "ms-translations")))
+
+    def test_translations_folders_hash_the_files_of_the_subfolders(self):
+        from .static_manifest import build_static_manifest
+
+        self._write("mapstore/ms-translations/fragments/cookie/cookieDetails-en-US.html", "<p>Cookies</p>")
+        paths = build_static_manifest()
+        self._write("mapstore/ms-translations/fragments/cookie/cookieDetails-en-US.html", "<p>New cookies</p>")
+        new_paths = build_static_manifest()
+        self.assertNotEqual(new_paths["mapstore/ms-translations"], paths["mapstore/ms-translations"])
+        fragment_path = os.path.join(
+            TEST_STATIC_ROOT, new_paths["mapstore/ms-translations"], "fragments", "cookie", "cookieDetails-en-US.html"
+        )
+        with open(fragment_path) as f:
+            self.assertEqual(f.read(), "<p>New cookies</p>")
+
+    def test_files_outside_the_manifest_use_the_client_version(self):
+        from .templatetags.client_version import reset_client_version, versioned_static
+
+        reset_client_version()
+        self._write("mapstore/version.txt", "v1")
+        self.assertEqual(versioned_static("lib/css/bootstrap-select.css"), "/static/lib/css/bootstrap-select.css?v1")
+
+
+@override_settings(DEBUG=False, STATIC_ROOT=TEST_STATIC_ROOT, MAPSTORE_STATIC_COMPRESS_MIN_SIZE=100)
+class StaticCompressionTestCase(TestCase):
+    def setUp(self):
+        self.bundle_path = os.path.join(TEST_STATIC_ROOT, "mapstore", "dist", "js", "gn-map.js")
+        os.makedirs(os.path.dirname(self.bundle_path), exist_ok=True)
+        with open(self.bundle_path, "w") as f:
+            f.write("console.log('map');\n" * 100)
+        with open(os.path.join(TEST_STATIC_ROOT, "mapstore", "dist", "js", "small.js"), "w") as f:
+            f.write("1;")
+
+    def tearDown(self):
+        if os.path.exists(TEST_STATIC_ROOT):
+            shutil.rmtree(TEST_STATIC_ROOT)
+
+    def test_unchanged_files_are_skipped(self):
+        import gzip
+        from .static_compression import compress_static_files
+
+        report = compress_static_files(workers=2)
+        self.assertEqual(report["compressed"], 1)
+        self.assertGreater(report["saved"]["gzip"], 0)
+        with open(f"{self.bundle_path}.gz", "rb") as f, open(self.bundle_path, "rb") as original:
+            self.assertEqual(gzip.decompress(f.read()), original.read())
+        self.assertFalse(os.path.exists(os.path.join(TEST_STATIC_ROOT, "mapstore", "dist", "js", "small.js.gz")))
+
+        self.assertEqual(compress_static_files(workers=2)["skipped"], 1)
+        with open(self.bundle_path, "a") as f:
+            f.write("console.log('changed');\n")
+        self.assertEqual(compress_static_files(workers=2)["compressed"], 1)
+
+    def test_serve_static_chooses_the_accepted_variant(self):
+        from .static_compression import compress_static_files, serve_static
+
+        compress_static_files(workers=1)
+        factory = RequestFactory()
+        request = factory.get("/", HTTP_ACCEPT_ENCODING="gzip;q=1.0, br;q=0")
+        response = serve_static(request, "mapstore/dist/js/gn-map.js")
+        self.assertEqual(response["Content-Encoding"], "gzip")
+        self.assertIn("Accept-Encoding", response["Vary"])
+        self.assertTrue(response["Content-Type"].endswith("javascript"))
+        response.close()
+
+        response = serve_static(factory.get("/"), "mapstore/dist/js/gn-map.js")
+        self.assertNotIn("Content-Encoding", response)
+        response.close()
+
+        with self.assertRaises(Http404):
+            serve_static(factory.get("/"), "../settings.py")
+
+
+@override_settings(DEBUG=False, STATIC_ROOT=TEST_STATIC_ROOT, STATIC_URL="/static/")
+class TranslationSlicesTestCase(TestCase):
+    def setUp(self):
+        from .config_loader import clear_json_configs
+
+        clear_json_configs()
+        self._write("mapstore/ms-translations/data.en-US.json", {
+            "locale": "en-US",
+            "messages": {"catalog": {"title": "Catalog"}, "styleeditor": {"title": "Style"}, "gnviewer": {"a": "MS"}},
+        })
+        self._write("mapstore/gn-translations/data.en-US.json", {
+            "locale": "en-US",
+            "messages": {"gnviewer": {"a": "GN", "b": "B"}, "gnhome": {"title": "Home"}},
+        })
+        self._write("mapstore/dist/js/gn-map.js", 'f("gnviewer.a"),g("catalog")')
+
+    def tearDown(self):
+        if os.path.exists(TEST_STATIC_ROOT):
+            shutil.rmtree(TEST_STATIC_ROOT)
+
+    def _write(self, path, content):
+        file_path = os.path.join(TEST_STATIC_ROOT, path)
+        os.makedirs(os.path.dirname(file_path), exist_ok=True)
+        with open(file_path, "w") as f:
+            f.write(content if isinstance(content, str) else json.dumps(content))
+
+    def _read_slice(self, app):
+        with open(os.path.join(TEST_STATIC_ROOT, "mapstore", "translations", "slices.json")) as f:
+            slice_path = json.load(f)[app]
+        self.assertRegex(slice_path, rf"^mapstore/translations/{app}\.[0-9a-f]{{12}}$")
+        with open(os.path.join(TEST_STATIC_ROOT, slice_path, "data.en-US.json")) as f:
+            return slice_path, json.load(f)
+
+    def test_slices_merge_the_messages_used_by_each_app(self):
+        from django.core.management import call_command
+
+        stdout = StringIO()
+        call_command("build_translation_slices", stdout=stdout)
+        self.assertRegex(stdout.getvalue(), r"gn-map: \d+ bytes \(\d+ with gzip\), the source files are \d+ bytes")
+
+        _slice_path, data = self._read_slice("gn-map")
+        self.assertEqual(data["locale"], "en-US")
+        # gnhome is referenced by the templates of the app
+        self.assertEqual(sorted(data["messages"]), ["catalog", "gnhome", "gnviewer"])
+        self.assertEqual(data["messages"]["gnviewer"], {"a": "GN", "b": "B"})
+
+        # apps without a bundle keep all the messages
+        _slice_path, data = self._read_slice("gn-catalogue")
+        self.assertEqual(sorted(data["messages"]), ["catalog", "gnhome", "gnviewer", "styleeditor"])
+
+    def test_slices_change_with_the_fragments(self):
+        from .translations import build_translation_slices
+
+        self._write("mapstore/gn-translations/fragments/cookie/cookieDetails-en-US.html", "<p>Cookies</p>")
+        build_translation_slices()
+        slice_path, _data = self._read_slice("gn-map")
+        self._write("mapstore/gn-translations/fragments/cookie/cookieDetails-en-US.html", "<p>New cookies</p>")
+        build_translation_slices()
+        new_slice_path, _data = self._read_slice("gn-map")
+        self.assertNotEqual(new_slice_path, slice_path)
+        fragment_path = os.path.join(
+            TEST_STATIC_ROOT, new_slice_path, "fragments", "cookie", "cookieDetails-en-US.html"
+        )
+        with open(fragment_path) as f:
+            self.assertEqual(f.read(), "<p>New cookies</p>")
+
+    def test_resource_urls_points_pages_at_their_slice(self):
+        from .translations import build_translation_slices, get_translations_app, get_translations_slice_path
+
+        self.assertIsNone(get_translations_slice_path(RequestFactory().get("/maps/1/embed")))
+        sizes = build_translation_slices()
+        self.assertLess(sizes["gn-map"]["size"], sizes["gn-catalogue"]["size"])
+        self.assertLess(sizes["gn-catalogue"]["size"], sizes["gn-catalogue"]["source_size"])
+
+        # deployments under a script prefix
+        request = RequestFactory().get("/maps/1/embed", SCRIPT_NAME="/geonode")
+        self.assertEqual(request.path, "/geonode/maps/1/embed")
+        self.assertEqual(get_translations_app(request), "gn-map")
+        slice_path, _data = self._read_slice("gn-map")
+        self.assertEqual(get_translations_slice_path(RequestFactory().get("/maps/1/embed")), [f"/static/{slice_path}"])
+        catalogue_path, _data = self._read_slice("gn-catalogue")
+        self.assertEqual(
+            get_translations_slice_path(RequestFactory().get("/catalogue/")), [f"/static/{catalogue_path}"]
+        )
+
+
+@override_settings(CACHES=TEST_CACHES, MAPSTORE_REQUEST_RULES_MAX_AGE=600)
+class RequestConfigurationCacheTestCase(GeoNodeBaseTestSupport):
+    def setUp(self):
+        from django.contrib.auth import get_user_model
+        from geonode_mapstore_client.handlers import BaseConfigurationRuleHandler
+        from geonode_mapstore_client.registry import RequestConfigurationRulesRegistry
+
+        cache.clear()
+        self.user = get_user_model().objects.create_user(username="rulesuser", password="testpass")
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+        RequestConfigurationRulesRegistry.REGISTRY = [BaseConfigurationRuleHandler]
+
+    def tearDown(self):
+        from geonode_mapstore_client.registry import RequestConfigurationRulesRegistry
+
+        RequestConfigurationRulesRegistry.REGISTRY = []
+
+    def test_rules_are_cached_until_the_token_expires(self):
+        from django.utils import timezone
+        from geonode.base.auth import get_or_create_token
+
+        token = get_or_create_token(self.user)
+        url = reverse("request-rules")
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertIn("private", response["Cache-Control"])
+        max_age = int(response["Cache-Control"].split("max-age=")[1].split(",")[0])
+        self.assertLessEqual(max_age, min(600, (token.expires - timezone.now()).total_seconds() + 1))
+
+        # a single read only token lookup, the rules come from the cache
+        with self.assertNumQueries(1):
+            cached_response = self.client.get(url)
+        self.assertEqual(cached_response.json(), response.json())
+
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=response["ETag"])
+        self.assertEqual(response.status_code, 304)
+
+    def test_server_timing_is_sent_only_with_debug(self):
+        url = reverse("request-rules")
+        self.assertNotIn("Server-Timing", self.client.get(url))
+        cache.clear()
+        with override_settings(DEBUG=True):
+            self.assertIn("BaseConfigurationRuleHandler;dur=", self.client.get(url)["Server-Timing"])
+
+    def test_registry_changes_invalidate_the_rules(self):
+        from geonode_mapstore_client.registry import (
+            RequestConfigurationRulesRegistry,
+            BaseRequestConfigurationRuleHandler,
+        )
+
+        class ExtraHandler(BaseRequestConfigurationRuleHandler):
+            def get_rules(self, request):
+                return [{"urlPattern": "http://extra.com/.*"}]
+
+        url = reverse("request-rules")
+        rules = self.client.get(url).json()["rules"]
+        RequestConfigurationRulesRegistry.REGISTRY.append(ExtraHandler)
+        self.assertEqual(self.client.get(url).json()["rules"], rules + [{"urlPattern": "http://extra.com/.*"}])
+
+
+@override_settings(REQUEST_CONFIGURATION_RULES_CONCURRENT=True, REQUEST_CONFIGURATION_RULES_TIMEOUT=0.5)
+class RequestConfigurationConcurrentRulesTestCase(TestCase):
+    def setUp(self):
+        from geonode_mapstore_client.registry import (
+            RequestConfigurationRulesRegistry,
+            BaseRequestConfigurationRuleHandler,
+        )
+
+        class FastHandler(BaseRequestConfigurationRuleHandler):
+            def get_rules(self, request):
+                time.sleep(0.1)
+                return [{"urlPattern": "fast"}]
+
+        class SlowHandler(BaseRequestConfigurationRuleHandler):
+            def get_rules(self, request):
+                time.sleep(2)
+                return [{"urlPattern": "slow"}]
+
+            def get_fallback_rules(self, request):
+                return [{"urlPattern": "fallback"}]
+
+        class FailingHandler(BaseRequestConfigurationRuleHandler):
+            def get_rules(self, request):
+                raise ValueError("remote service not available")
+
+        self.registry = RequestConfigurationRulesRegistry()
+        self.registry.REGISTRY = [SlowHandler, FastHandler, FailingHandler, FastHandler]
+        self.request = RequestFactory().get("/")
+        self.request.user = AnonymousUser()
+
+    def test_handlers_run_concurrently_within_the_timeout(self):
+        start = time.perf_counter()
+        result = self.registry.get_rules(self.request)
+        self.assertLess(time.perf_counter() - start, 1.5)
+        self.assertEqual(
+            result["rules"], [{"urlPattern": "fallback"}, {"urlPattern": "fast"}, {"urlPattern": "fast"}]
+        )
+        self.assertEqual(
+            [(name, status) for name, _duration, status in self.registry.timings],
+            [("SlowHandler", "timeout"), ("FastHandler", "ok"), ("FailingHandler", "error"), ("FastHandler", "ok")],
+        )
+        self.assertIn('SlowHandler;dur=', self.registry.get_server_timing())
+
+    def test_handlers_do_not_wait_for_busy_threads(self):
+        with mock.patch("geonode_mapstore_client.registry._acquire_slot", return_value=False):
+            start = time.perf_counter()
+            result = self.registry.get_rules(self.request)
+        self.assertLess(time.perf_counter() - start, 0.1)
+        self.assertEqual(result["rules"], [{"urlPattern": "fallback"}])
+        self.assertEqual({status for _name, _duration, status in self.registry.timings}, {"busy"})
+
+    def test_fallback_rules_are_not_cached(self):
+        from geonode_mapstore_client.registry import (
+            RequestConfigurationRulesRegistry,
+            BaseRequestConfigurationRuleHandler,
+        )
+
+        calls = []
+
+        class LateHandler(BaseRequestConfigurationRuleHandler):
+            def get_rules(self, request):
+                calls.append(request)
+                # only the first request times out
+                if len(calls) == 1:
+                    time.sleep(1)
+                return [{"urlPattern": "late"}]
+
+        RequestConfigurationRulesRegistry.REGISTRY = [LateHandler, BaseRequestConfigurationRuleHandler]
+        self.addCleanup(setattr, RequestConfigurationRulesRegistry, "REGISTRY", [])
+        cache.clear()
+        url = reverse("request-rules")
+        self.assertEqual(self.client.get(url).json()["rules"], [])
+        self.assertEqual(self.client.get(url).json()["rules"], [{"urlPattern": "late"}])
+        self.assertEqual(len(calls), 2)
+
+    def test_async_fallback_rules_are_not_cached(self):
+        import asyncio
+        from django.test import AsyncRequestFactory
+        from . import async_views
+        from geonode_mapstore_client.registry import (
+            RequestConfigurationRulesRegistry,
+            BaseRequestConfigurationRuleHandler,
+        )
+
+        class RemoteHandler(BaseRequestConfigurationRuleHandler):
+            def get_rules(self, request):
+                return [{"urlPattern": "remote"}]
+
+        RequestConfigurationRulesRegistry.REGISTRY = [RemoteHandler, BaseRequestConfigurationRuleHandler]
+        self.addCleanup(setattr, RequestConfigurationRulesRegistry, "REGISTRY", [])
+        cache.clear()
+
+        def get_rules():
+            request = AsyncRequestFactory().get("/")
+            request.user = AnonymousUser()
+            return json.loads(asyncio.run(async_views.request_rules(request)).content)["rules"]
+
+        with mock.patch("geonode_mapstore_client.registry._acquire_slot", return_value=False):
+            self.assertEqual(get_rules(), [])
+        self.assertEqual(get_rules(), [{"urlPattern": "remote"}])
+
+    def test_handlers_run_as_coroutines(self):
+        import asyncio
+
+        result = asyncio.run(self.registry.aget_rules(self.request))
+        self.assertEqual(
+            result["rules"], [{"urlPattern": "fallback"}, {"urlPattern": "fast"}, {"urlPattern": "fast"}]
+        )
+
+
+@override_settings(CACHES=TEST_CACHES)
+class AsyncViewsTestCase(TestCase):
+    def setUp(self):
+        cache.clear()
+        Extension.objects.create(name="AsyncExtension", active=True, is_map_extension=True, published=True)
+
+    async def _get_payloads(self, sync_view, async_view, **headers):
+        from asgiref.sync import sync_to_async
+        from django.test import AsyncRequestFactory
+
+        request = RequestFactory().get("/", **headers)
+        request.user = AnonymousUser()
+        sync_response = await sync_to_async(sync_view)(request)
+        await sync_to_async(sync_response.render)()
+        async_request = AsyncRequestFactory().get("/", **headers)
+        async_request.user = AnonymousUser()
+        return sync_response, await async_view(async_request)
+
+    async def test_async_extensions_match_the_sync_views(self):
+        from . import async_views
+
+        for sync_view, async_view in (
+            (views.ExtensionsView.as_view(), async_views.extensions),
+            (views.PluginsConfigView.as_view(), async_views.plugins_config),
+        ):
+            await cache.aclear()
+            sync_response, async_response = await self._get_payloads(sync_view, async_view)
+            self.assertEqual(async_response.status_code, 200)
+            self.assertEqual(json.loads(async_response.content), json.loads(sync_response.content))
+            self.assertIn("AsyncExtension", async_response.content.decode())
+            self.assertEqual(async_response["ETag"], sync_response["ETag"])
+
+            _sync_response, async_response = await self._get_payloads(
+                sync_view, async_view, HTTP_IF_NONE_MATCH=async_response["ETag"]
+            )
+            self.assertEqual(async_response.status_code, 304)
+
+    async def test_async_request_rules_match_the_sync_view(self):
+        from . import async_views
+        from geonode_mapstore_client.registry import (
+            RequestConfigurationRulesRegistry,
+            BaseRequestConfigurationRuleHandler,
+        )
+
+        class AsyncHandler(BaseRequestConfigurationRuleHandler):
+            async def aget_rules(self, request):
+                return [{"urlPattern": "async"}]
+
+            def get_rules(self, request):
+                return [{"urlPattern": "async"}]
+
+        RequestConfigurationRulesRegistry.REGISTRY = [AsyncHandler]
+        try:
+            sync_response, async_response = await self._get_payloads(
+                views.RequestConfigurationView.as_view(), async_views.request_rules
+            )
+        finally:
+            RequestConfigurationRulesRegistry.REGISTRY = []
+        self.assertEqual(json.loads(async_response.content), {"rules": [{"urlPattern": "async"}]})
+        self.assertEqual(async_response["ETag"], sync_response["ETag"])
+        self.assertIn("private", async_response["Cache-Control"])
+
+    async def test_async_handlers_run_in_order_without_the_concurrent_mode(self):
+        from geonode_mapstore_client.registry import (
+            RequestConfigurationRulesRegistry,
+            BaseRequestConfigurationRuleHandler,
+        )
+
+        class SyncHandler(BaseRequestConfigurationRuleHandler):
+            def get_rules(self, request):
+                return [{"urlPattern": "sync"}]
+
+        registry = RequestConfigurationRulesRegistry()
+        registry.REGISTRY = [SyncHandler, SyncHandler]
+        request = RequestFactory().get("/")
+        request.user = AnonymousUser()
+        # no thread of the pool is needed
+        with mock.patch("geonode_mapstore_client.registry._acquire_slot", return_value=False):
+            result = await registry.aget_rules(request)
+        self.assertEqual(result["rules"], [{"urlPattern": "sync"}, {"urlPattern": "sync"}])
+        self.assertTrue(registry.is_complete())
+
+    async def test_async_request_rules_use_the_drf_authenticators(self):
+        from rest_framework.authentication import BaseAuthentication
+        from rest_framework.exceptions import AuthenticationFailed
+        from . import async_views
+
+        class TokenAuthentication(BaseAuthentication):
+            def authenticate(self, request):
+                if request.META.get("HTTP_AUTHORIZATION"):
+                    raise AuthenticationFailed("Invalid token")
+                return None
+
+        with mock.patch.object(views.RequestConfigurationView, "authentication_classes", [TokenAuthentication]):
+            sync_response, async_response = await self._get_payloads(
+                views.RequestConfigurationView.as_view(), async_views.request_rules, HTTP_AUTHORIZATION="Bearer bad"
+            )
+        self.assertEqual(sync_response.status_code, 403)
+        self.assertEqual(async_response.status_code, sync_response.status_code)
+        self.assertEqual(json.loads(async_response.content), {"detail": "Invalid token"})
+
+
+@override_settings(STATIC_ROOT=TEST_STATIC_ROOT, MAPSTORE_EXTENSION_MAX_SIZE=1024 * 1024)
+class ExtensionExtractionTestCase(TestCase):
+    def setUp(self):
+        shutil.rmtree(TEST_STATIC_ROOT, ignore_errors=True)
+        os.makedirs(TEST_STATIC_ROOT)
+        self.addCleanup(shutil.rmtree, TEST_STATIC_ROOT, True)
+
+    def _write_zip(self, files, name="Ext.zip"):
+        zip_path = os.path.join(TEST_STATIC_ROOT, name)
+        with zipfile.ZipFile(zip_path, "w", zipfile.ZIP_DEFLATED) as zf:
+            for filename, content in files.items():
+                zf.writestr(filename, content)
+        return zip_path
+
+    def test_new_version_replaces_the_previous_one(self):
+        from .extensions import extract_extension, get_extension_path
+
+        target_path = get_extension_path("Ext")
+        # folder extracted in place by previous versions
+        os.makedirs(target_path)
+        with open(os.path.join(target_path, "old.js"), "w") as f:
+            f.write("old")
+
+        extract_extension(self._write_zip({"index.js": "v1", "index.json": "{}"}), "Ext")
+        extract_extension(self._write_zip({"index.js": "v2", "index.json": "{}"}), "Ext")
+        self.assertTrue(os.path.islink(target_path))
+        self.assertEqual(sorted(os.listdir(target_path)), ["index.js", "index.json"])
+        with open(os.path.join(target_path, "index.js")) as f:
+            self.assertEqual(f.read(), "v2")
+        # only the published version is kept
+        self.assertEqual(len(os.listdir(os.path.dirname(target_path))), 2)
+
+    def test_rejected_archives_keep_the_previous_version(self):
+        from .extensions import ExtensionExtractionError, extract_extension, get_extension_path
+
+        extract_extension(self._write_zip({"index.js": "v1", "index.json": "{}"}), "Ext")
+        for files in (
+            {"index.js": "v2", "../outside.js": "v2"},
+            {"index.js": "0" * 2 * 1024 * 1024},
+        ):
+            with self.assertRaises(ExtensionExtractionError):
+                extract_extension(self._write_zip(files), "Ext")
+        with open(os.path.join(get_extension_path("Ext"), "index.js")) as f:
+            self.assertEqual(f.read(), "v1")
+        self.assertFalse(os.path.exists(os.path.join(TEST_STATIC_ROOT, "mapstore", "outside.js")))
+
+    def test_validator_checks_the_limits(self):
+        zip_path = self._write_zip({"index.js": "0" * 512 * 1024, "index.json": "{}"})
+        with override_settings(MAPSTORE_EXTENSION_MAX_RATIO=10), open(zip_path, "rb") as f:
+            with self.assertRaises(ValidationError) as context:
+                validate_zip_file(f)
+        self.assertIn("compression ratio", str(context.exception))
+
+
+@override_settings(
+    CACHES=TEST_CACHES,
+    MEDIA_ROOT=TEST_MEDIA_ROOT,
+    STATIC_ROOT=TEST_STATIC_ROOT,
+    MAPSTORE_EXTENSION_JOBS_EXECUTOR="thread",
+)
+class ExtensionJobsTestCase(TestCase):
+    def setUp(self):
+        cache.clear()
+        for path in (TEST_MEDIA_ROOT, TEST_STATIC_ROOT):
+            shutil.rmtree(path, ignore_errors=True)
+            self.addCleanup(shutil.rmtree, path, True)
+
+    def _create_extension(self, content="console.log('hello');"):
+        zip_buffer = BytesIO()
+        with zipfile.ZipFile(zip_buffer, "w", zipfile.ZIP_DEFLATED) as zf:
+            zf.writestr("index.js", content)
+            zf.writestr("index.json", "{}")
+        uploaded_file = SimpleUploadedFile("JobExtension.zip", zip_buffer.getvalue(), content_type="application/zip")
+        return Extension.objects.create(uploaded_file=uploaded_file)
+
+    def test_extensions_are_published_once_ready(self):
+        from .extension_jobs import run_extension_job
+
+        with mock.patch("geonode_mapstore_client.extension_jobs._dispatch") as dispatch:
+            with self.captureOnCommitCallbacks(execute=True):
+                extension = self._create_extension()
+        dispatch.assert_called_once_with("thread", "install_extension", (extension.pk,))
+        extension.refresh_from_db()
+        self.assertEqual(extension.status, Extension.STATUS_PENDING)
+        self.assertNotIn("JobExtension", self.client.get(reverse("mapstore-extension")).json())
+
+        _executor, job_name, args = dispatch.call_args[0]
+        run_extension_job(job_name, *args)
+        extension.refresh_from_db()
+        self.assertEqual(extension.status, Extension.STATUS_READY)
+        self.assertGreater(extension.extracted_bytes, 0)
+        self.assertIsNotNone(extension.processing_duration)
+        self.assertIn("JobExtension", self.client.get(reverse("mapstore-extension")).json())
+
+    @override_settings(MAPSTORE_EXTENSION_JOBS_EXECUTOR="sync", MAPSTORE_EXTENSION_MAX_SIZE=1024)
+    def test_failed_extraction_is_recorded(self):
+        extension = self._create_extension(content="0" * 4096)
+        extension.refresh_from_db()
+        self.assertEqual(extension.status, Extension.STATUS_FAILED)
+        self.assertIn("maximum", extension.processing_error)
+        self.assertNotIn("JobExtension", self.client.get(reverse("mapstore-extension")).json())
+
+        # other changes do not extract the file again
+        extension.active = False
+        extension.save()
+        extension.refresh_from_db()
+        self.assertEqual(extension.status, Extension.STATUS_FAILED)
+
+    @override_settings(MAPSTORE_EXTENSION_JOBS_EXECUTOR="sync")
+    def test_failed_upload_keeps_the_published_version(self):
+        from .extensions import get_extension_path
+
+        extension = self._create_extension()
+        extension.refresh_from_db()
+        self.assertTrue(extension.published)
+
+        with override_settings(MAPSTORE_EXTENSION_MAX_SIZE=1024):
+            zip_buffer = BytesIO()
+            with zipfile.ZipFile(zip_buffer, "w", zipfile.ZIP_DEFLATED) as zf:
+                zf.writestr("index.js", "0" * 4096)
+            extension.uploaded_file = SimpleUploadedFile("JobExtension.zip", zip_buffer.getvalue())
+            extension.save()
+        extension.refresh_from_db()
+        self.assertEqual(extension.status, Extension.STATUS_FAILED)
+        self.assertTrue(extension.published)
+        self.assertIn("JobExtension", self.client.get(reverse("mapstore-extension")).json())
+        with open(os.path.join(get_extension_path("JobExtension"), "index.js")) as f:
+            self.assertEqual(f.read(), "console.log('hello');")
+
+    def test_jobs_are_submitted_once_and_requeued_when_stale(self):
+        from datetime import timedelta
+        from django.core.management import call_command
+        from django.utils import timezone
+
+        with mock.patch("geonode_mapstore_client.extension_jobs._dispatch") as dispatch:
+            with self.captureOnCommitCallbacks(execute=True):
+                extension = self._create_extension()
+                # saving a pending extension does not submit another job
+                extension.active = False
+                extension.save()
+            self.assertEqual(dispatch.call_count, 1)
+
+            with self.captureOnCommitCallbacks(execute=True):
+                call_command("requeue_extension_jobs", stdout=StringIO())
+            self.assertEqual(dispatch.call_count, 1)
+
+            # the job was lost
+            Extension.objects.filter(pk=extension.pk).update(updated_at=timezone.now() - timedelta(hours=1))
+            stdout = StringIO()
+            with self.captureOnCommitCallbacks(execute=True):
+                call_command("requeue_extension_jobs", stdout=stdout)
+        self.assertEqual(dispatch.call_count, 2)
+        dispatch.assert_called_with("thread", "install_extension", (extension.pk,))
+        self.assertIn("JobExtension", stdout.getvalue())
@@ -0,0 +1,212 @@
+"""
+Translations of the MapStore and GeoNode messages sliced by client app.
+
+Pages load the messages of both mapstore/ms-translations and mapstore/gn-translations,
+the full files, even if each app uses a part of them. build_translation_slices writes,
+for each app and language, a single file with the MapStore and GeoNode messages merged,
+keeping only the top level groups of messages referenced by the app: the ones with a
+name quoted in the app bundle, in the shared chunks, in the configuration files or in the templates.
+Apps without a bundle keep all the groups. Each app folder has the hash of its files
+in the name, the folders are listed in mapstore/translations/slices.json and
+resource_urls points the page at the folder of its app.
+"""
+import os
+import re
+import gzip
+import json
+import shutil
+import hashlib
+
+from django.conf import settings
+from django.templatetags.static import static
+
+from geonode_mapstore_client.config_loader import get_static_config_path, load_json_config
+from geonode_mapstore_client.static_manifest import HASH_LENGTH, _folder_hash
+
+TRANSLATIONS_APPS = ["gn-catalogue", "gn-map", "gn-geostory", "gn-dashboard", "gn-document"]
+# merged in order, the messages of the following folders override the previous ones
+TRANSLATIONS_SOURCES = ["ms-translations", "gn-translations"]
+SHARED_SOURCES_EXTENSIONS = (".chunk.js", ".json", ".html")
+SLICES_FOLDER = "translations"
+SLICES_NAME = "slices.json"
+# pages using a client app different from the catalogue one
+DEFAULT_TRANSLATIONS_APP_PATHS = [
+    (r"^/(maps|datasets)/[^/]+/embed", "gn-map"),
+    (r"^/geostories/[^/]+/embed", "gn-geostory"),
+    (r"^/dashboards/[^/]+/embed", "gn-dashboard"),
+    (r"^/documents/[^/]+/embed", "gn-document"),
+]
+DEFAULT_TRANSLATIONS_APP = "gn-catalogue"
+
+_LANGUAGE_FILE_RE = re.compile(r"^data\.(.+)\.json$")
+# quoted names, followed by the end of the string or by a dot, e.g. "gnviewer.save" or 'catalog'
+_QUOTED_NAME_RE = re.compile(r"""["'`]([A-Za-z_$][\w$-]*)(?=["'`.])""")
+
+
+def _merge(target, source):
+    for key, value in source.items():
+        if isinstance(value, dict) and isinstance(target.get(key), dict):
+            _merge(target[key], value)
+        else:
+            target[key] = value
+    return target
+
+
+def _read_json(path):
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _get_quoted_names(paths):
+    names = set()
+    for path in paths:
+        with open(path, "r", encoding="utf-8", errors="ignore") as f:
+            names.update(_QUOTED_NAME_RE.findall(f.read()))
+    return names
+
+
+def _get_shared_sources(static_root):
+    # chunks are loaded by every app, configurations and templates can contain message ids too
+    folders = [
+        os.path.join(static_root, "mapstore", "dist", "js"),
+        os.path.join(static_root, "mapstore", "configs"),
+        os.path.join(os.path.dirname(__file__), "templates"),
+    ]
+    sources = []
+    for folder in folders:
+        for root, dirs, files in os.walk(folder):
+            sources.extend(os.path.join(root, name) for name in files if name.endswith(SHARED_SOURCES_EXTENSIONS))
+    return sorted(sources)
+
+
+def get_app_groups(static_root, shared_names):
+    """Returns the names referenced by each app bundle, None for the apps without a bundle."""
+    groups = {}
+    for app in TRANSLATIONS_APPS:
+        bundle_path = os.path.join(static_root, "mapstore", "dist", "js", f"{app}.js")
+        groups[app] = shared_names | _get_quoted_names([bundle_path]) if os.path.isfile(bundle_path) else None
+    return groups
+
+
+def _get_sizes(contents):
+    # bytes loaded by the pages, as stored and with gzip
+    return {
+        "size": sum(len(content) for content in contents),
+        "compressed_size": sum(len(gzip.compress(content)) for content in contents),
+    }
+
+
+def _get_source_sizes(static_root):
+    """Returns the sizes of the translations files loaded by the pages without slices, for all the languages."""
+    contents = []
+    for source in TRANSLATIONS_SOURCES:
+        folder = os.path.join(static_root, "mapstore", source)
+        if os.path.isdir(folder):
+            for name in sorted(os.listdir(folder)):
+                if _LANGUAGE_FILE_RE.match(name):
+                    with open(os.path.join(folder, name), "rb") as f:
+                        contents.append(f.read())
+    return _get_sizes(contents)
+
+
+def _load_messages(static_root):
+    """Returns the merged MapStore and GeoNode translations by language."""
+    translations = {}
+    for source in TRANSLATIONS_SOURCES:
+        folder = os.path.join(static_root, "mapstore", source)
+        if not os.path.isdir(folder):
+            continue
+        for name in sorted(os.listdir(folder)):
+            match = _LANGUAGE_FILE_RE.match(name)
+            if not match:
+                continue
+            data = _read_json(os.path.join(folder, name))
+            language = translations.setdefault(match.group(1), {"locale": data.get("locale"), "messages": {}})
+            _merge(language["messages"], data.get("messages", {}))
+    return translations
+
+
+def _get_fragments_paths(static_root):
+    # html fragments loaded from the translations folder, e.g. the cookie policy
+    for source in TRANSLATIONS_SOURCES:
+        fragments_path = os.path.join(static_root, "mapstore", source, "fragments")
+        if os.path.isdir(fragments_path):
+            yield fragments_path
+
+
+def _write_slice(slices_root, app, files, static_root):
+    digest = hashlib.sha256()
+    for name, content in sorted(files.items()):
+        digest.update(name.encode("utf-8"))
+        digest.update(content)
+    # the fragments are copied in the slice, a changed fragment needs a new folder
+    for fragments_path in _get_fragments_paths(static_root):
+        _folder_hash(fragments_path, digest)
+    slice_path = os.path.join(slices_root, f"{app}.{digest.hexdigest()[:HASH_LENGTH]}")
+    if not os.path.exists(slice_path):
+        tmp_path = f"{slice_path}.tmp"
+        shutil.rmtree(tmp_path, ignore_errors=True)
+        os.makedirs(tmp_path)
+        for name, content in files.items():
+            with open(os.path.join(tmp_path, name), "wb") as f:
+                f.write(content)
+        for fragments_path in _get_fragments_paths(static_root):
+            shutil.copytree(fragments_path, os.path.join(tmp_path, "fragments"), dirs_exist_ok=True)
+        os.replace(tmp_path, slice_path)
+    return slice_path
+
+
+def build_translation_slices(static_root=None):
+    """
+    Writes the translations of each app and their list, returns by app the sizes in bytes of its files
+    and of the source files they replace, for all the languages
+    """
+    static_root = static_root or settings.STATIC_ROOT
+    translations = _load_messages(static_root)
+    app_groups = get_app_groups(static_root, _get_quoted_names(_get_shared_sources(static_root)))
+
+    slices_root = os.path.join(static_root, "mapstore", SLICES_FOLDER)
+    os.makedirs(slices_root, exist_ok=True)
+    slices = {}
+    sizes = {}
+    source_sizes = _get_source_sizes(static_root)
+    for app, groups in app_groups.items():
+        files = {}
+        for language, data in translations.items():
+            messages = data["messages"]
+            if groups is not None:
+                messages = {group: value for group, value in messages.items() if group in groups}
+            files[f"data.{language}.json"] = json.dumps(
+                {"locale": data["locale"], "messages": messages}, ensure_ascii=False, separators=(",", ":")
+            ).encode("utf-8")
+        slice_path = _write_slice(slices_root, app, files, static_root)
+        slices[app] = os.path.relpath(slice_path, static_root).replace(os.sep, "/")
+        sizes[app] = {
+            **_get_sizes(files.values()),
+            **{f"source_{key}": value for key, value in source_sizes.items()},
+        }
+
+    slices_path = os.path.join(slices_root, SLICES_NAME)
+    tmp_path = f"{slices_path}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(slices, f, indent=2)
+    os.replace(tmp_path, slices_path)
+    return sizes
+
+
+def get_translations_app(request):
+    """Returns the client app of the page requested."""
+    for pattern, app in getattr(settings, "MAPSTORE_TRANSLATIONS_APP_PATHS", DEFAULT_TRANSLATIONS_APP_PATHS):
+        # without the script prefix, as the patterns of the urls
+        if re.match(pattern, request.path_info):
+            return app
+    return DEFAULT_TRANSLATIONS_APP
+
+
+def get_translations_slice_path(request):
+    """Returns the TRANSLATIONS_PATH with the translations of the app of the page, None if not built."""
+    slices = load_json_config(get_static_config_path(SLICES_FOLDER, SLICES_NAME), {})
+    slice_path = slices.get(get_translations_app(request))
+    if not slice_path:
+        return None
+    return [static(slice_path)]
@@ -1,15 +1,46 @@
 import os
+import asyncio
+import hashlib
 import json
+import time
+import threading
 import zipfile
+from django.conf import settings
 from django.core.exceptions import ValidationError
 from geoserver.catalog import FailedRequestError
 from geonode.geoserver.helpers import gs_catalog
 from geonode.layers.models import Dataset
 from django.core.cache import cache
+from django.core.serializers.json import DjangoJSONEncoder
+from django.utils.html import format_html
+from django.utils.safestring import mark_safe
+from geonode_mapstore_client.extensions import ExtensionExtractionError, check_zip_limits
 
 MAPSTORE_PLUGINS_CACHE_KEY = "mapstore_plugins_config"
 MAPSTORE_EXTENSIONS_CACHE_KEY = "mapstore_extensions_index"
+MAPSTORE_EXTENSIONS_GENERATION_KEY = "mapstore_extensions_generation"
 MAPSTORE_EXTENSION_CACHE_TIMEOUT = 60 * 60 * 24 * 1  # 1 day
+MAPSTORE_EXTENSION_REBUILD_LOCK_TIMEOUT = 30  # seconds
+MAPSTORE_EXTENSION_REBUILD_WAIT = 0.05  # seconds
+MAPSTORE_EXTENSION_REBUILD_RETRIES = 20
+MAPSTORE_EXTENSION_HTTP_MAX_AGE = getattr(settings, "MAPSTORE_EXTENSION_HTTP_MAX_AGE", 60 * 5)  # 5 minutes
+MAPSTORE_LOCAL_CONFIG_CACHE_KEY = "mapstore_local_config"
+MAPSTORE_UPLOAD_LIMITS_CACHE_KEY = "mapstore_upload_limits"
+MAPSTORE_UPLOAD_LIMITS_CACHE_TIMEOUT = 60 * 60 * 24 * 1  # 1 day
+MAPSTORE_METADATA_CACHE_KEY = "mapstore_metadata_groups"
+MAPSTORE_METADATA_GENERATION_KEY = "mapstore_metadata_generation"
+# same escapes applied by the json_script filter
+JSON_SCRIPT_ESCAPES = {
+    ord(">"): "\\u003E",
+    ord("<"): "\\u003C",
+    ord("&"): "\\u0026",
+}
+MAPSTORE_METADATA_CACHE_TIMEOUT = getattr(
+    settings, "MAPSTORE_METADATA_CACHE_TIMEOUT", 60 * 60 * 24 * 1  # 1 day
+)
+
+_metadata_cache_stats = {"hits": 0, "misses": 0}
+_metadata_cache_stats_lock = threading.Lock()
 
 
 def set_default_style_to_open_in_visual_mode(instance, **kwargs):
@@ -46,11 +77,237 @@ def validate_zip_file(file):
         required_files = {'index.js', 'index.json'}
         if not required_files.issubset(filenames):
             raise ValidationError("The zip file must contain index.js and index.json at its root.")
+        try:
+            check_zip_limits(zip_ref)
+        except ExtensionExtractionError as e:
+            raise ValidationError(str(e))
     file.seek(0)
 
 
+def _new_generation():
+    # time based, so a generation lost by the cache never points to old entries
+    return int(time.time() * 1000)
+
+
+def get_extensions_generation():
+    """Returns the current generation of the MapStore Extension caches."""
+    generation = cache.get(MAPSTORE_EXTENSIONS_GENERATION_KEY)
+    if generation is None:
+        cache.add(MAPSTORE_EXTENSIONS_GENERATION_KEY, _new_generation(), timeout=None)
+        generation = cache.get(MAPSTORE_EXTENSIONS_GENERATION_KEY, _new_generation())
+    return generation
+
+
+def get_extension_cache(cache_key, build):
+    """
+    Returns the value stored for the current generation of the cache key.
+    On a miss only one worker calls build, the others serve the previous
+    generation (or wait briefly for the rebuild if there is none).
+    """
+    generation_key = f"{cache_key}_{get_extensions_generation()}"
+    previous_key = f"{cache_key}_previous"
+    value = cache.get(generation_key)
+    if value is not None:
+        return value
+
+    lock_key = f"{generation_key}_lock"
+    if cache.add(lock_key, True, timeout=MAPSTORE_EXTENSION_REBUILD_LOCK_TIMEOUT):
+        try:
+            value = build()
+            cache.set_many(
+                {generation_key: value, previous_key: value},
+                timeout=MAPSTORE_EXTENSION_CACHE_TIMEOUT,
+            )
+        finally:
+            cache.delete(lock_key)
+        return value
+
+    value = cache.get(previous_key)
+    if value is not None:
+        return value
+    for _ in range(MAPSTORE_EXTENSION_REBUILD_RETRIES):
+        time.sleep(MAPSTORE_EXTENSION_REBUILD_WAIT)
+        value = cache.get(generation_key)
+        if value is not None:
+            return value
+    return build()
+
+
+async def aget_extensions_generation():
+    """Async version of get_extensions_generation."""
+    generation = await cache.aget(MAPSTORE_EXTENSIONS_GENERATION_KEY)
+    if generation is None:
+        await cache.aadd(MAPSTORE_EXTENSIONS_GENERATION_KEY, _new_generation(), timeout=None)
+        generation = await cache.aget(MAPSTORE_EXTENSIONS_GENERATION_KEY, _new_generation())
+    return generation
+
+
+async def aget_extension_cache(cache_key, build):
+    """Async version of get_extension_cache, build is a coroutine function."""
+    generation_key = f"{cache_key}_{await aget_extensions_generation()}"
+    previous_key = f"{cache_key}_previous"
+    value = await cache.aget(generation_key)
+    if value is not None:
+        return value
+
+    lock_key = f"{generation_key}_lock"
+    if await cache.aadd(lock_key, True, timeout=MAPSTORE_EXTENSION_REBUILD_LOCK_TIMEOUT):
+        try:
+            value = await build()
+            await cache.aset_many(
+                {generation_key: value, previous_key: value},
+                timeout=MAPSTORE_EXTENSION_CACHE_TIMEOUT,
+            )
+        finally:
+            await cache.adelete(lock_key)
+        return value
+
+    value = await cache.aget(previous_key)
+    if value is not None:
+        return value
+    for _ in range(MAPSTORE_EXTENSION_REBUILD_RETRIES):
+        await asyncio.sleep(MAPSTORE_EXTENSION_REBUILD_WAIT)
+        value = await cache.aget(generation_key)
+        if value is not None:
+            return value
+    return await build()
+
+
 def clear_extension_caches():
-    """A helper function to clear all MapStore Extension caches."""
-    cache.delete(MAPSTORE_EXTENSIONS_CACHE_KEY)
-    cache.delete(MAPSTORE_PLUGINS_CACHE_KEY)
+    """
+    A helper function to clear all MapStore Extension caches.
+    The generation is bumped instead of deleting the keys so the next
+    request rebuilds the entries while the others serve the previous ones.
+    """
+    try:
+        cache.incr(MAPSTORE_EXTENSIONS_GENERATION_KEY)
+    except ValueError:
+        cache.set(MAPSTORE_EXTENSIONS_GENERATION_KEY, _new_generation(), timeout=None)
     print("MapStore extension caches cleared.")
+
+
+def _get_metadata_generation():
+    generation = cache.get(MAPSTORE_METADATA_GENERATION_KEY)
+    if generation is None:
+        cache.add(MAPSTORE_METADATA_GENERATION_KEY, _new_generation(), timeout=None)
+        generation = cache.get(MAPSTORE_METADATA_GENERATION_KEY, 0)
+    return generation
+
+
+def _get_metadata_cache_key(pk, lang, generation):
+    return f"{MAPSTORE_METADATA_CACHE_KEY}_{generation}_{pk}_{lang}"
+
+
+def _count_metadata_cache(outcome):
+    with _metadata_cache_stats_lock:
+        _metadata_cache_stats[outcome] += 1
+
+
+def get_cached_metadata_groups(resource, lang):
+    """
+    Returns the parsed metadata groups stored for the resource and language,
+    or None if missing or older than the resource last_updated value.
+    """
+    cached = cache.get(_get_metadata_cache_key(resource.pk, lang, _get_metadata_generation()))
+    if cached and cached.get("last_updated") == resource.last_updated:
+        _count_metadata_cache("hits")
+        return cached.get("metadata_groups")
+    _count_metadata_cache("misses")
+    return None
+
+
+def set_cached_metadata_groups(resource, lang, metadata_groups):
+    cache.set(
+        _get_metadata_cache_key(resource.pk, lang, _get_metadata_generation()),
+        {"last_updated": resource.last_updated, "metadata_groups": metadata_groups},
+        timeout=MAPSTORE_METADATA_CACHE_TIMEOUT,
+    )
+
+
+def _get_cache_languages():
+    languages = {code[:2] for code, _name in getattr(settings, "LANGUAGES", [])}
+    languages.add(settings.LANGUAGE_CODE[:2])
+    return languages
+
+
+def clear_metadata_cache(*pks):
+    """Removes the cached metadata groups of the resources for every language."""
+    generation = _get_metadata_generation()
+    languages = _get_cache_languages()
+    cache.delete_many([_get_metadata_cache_key(pk, lang, generation) for pk in pks for lang in languages])
+
+
+def clear_all_metadata_cache():
+    """Invalidates the cached metadata groups of all the resources, e.g. when the metadata schema changes."""
+    try:
+        cache.incr(MAPSTORE_METADATA_GENERATION_KEY)
+    except ValueError:
+        cache.set(MAPSTORE_METADATA_GENERATION_KEY, _new_generation(), timeout=None)
+
+
+def get_metadata_cache_stats():
+    """Returns the hit/miss counters of the metadata cache for the current process."""
+    with _metadata_cache_stats_lock:
+        return dict(_metadata_cache_stats)
+
+
+def reset_metadata_cache_stats():
+    with _metadata_cache_stats_lock:
+        for outcome in _metadata_cache_stats:
+            _metadata_cache_stats[outcome] = 0
+
+
+def _get_patch_rules_hash():
+    rules = getattr(settings, "MAPSTORE_PLUGINS_CONFIG_PATCH_RULES", [])
+    content = json.dumps(rules, sort_keys=True, default=str).encode("utf-8")
+    return hashlib.sha256(content).hexdigest()[:16]
+
+
+def get_local_config_cache_key(lang):
+    """
+    Returns the cache key of the patched localConfig.json, it changes with
+    the patch rules of the settings and with the version of the search services.
+    The full language code is used, the names of the search services are translated
+    and e.g. pt and pt-br have different translations.
+    """
+    from geonode_mapstore_client.templatetags.get_search_services import get_search_services_version
+
+    return f"{MAPSTORE_LOCAL_CONFIG_CACHE_KEY}_{_get_patch_rules_hash()}_{get_search_services_version()}_{lang}"
+
+
+def clear_local_config_cache():
+    """Removes the patched localConfig.json of every language."""
+    languages = {code.lower() for code, _name in getattr(settings, "LANGUAGES", [])}
+    languages.add(settings.LANGUAGE_CODE.lower())
+    cache.delete_many([get_local_config_cache_key(lang) for lang in languages])
+
+
+def get_search_services_patch_rules(services):
+    """
+    Returns the rules setting the search services in the Search plugin of the viewers,
+    the same rules are built on the client when localConfig.json is patched by the browser.
+    """
+    if not services:
+        return []
+    return [
+        {
+            "op": "replace",
+            "jsonpath": f"$.{key}..[?(@.name == 'Search')].cfg",
+            "value": {"searchOptions": {"services": services}},
+        }
+        for key in ["map_viewer", "dataset_viewer", "map_viewer_mobile", "dataset_viewer_mobile"]
+    ]
+
+
+def clear_upload_limits_cache():
+    cache.delete(MAPSTORE_UPLOAD_LIMITS_CACHE_KEY)
+
+
+def to_json_script(value):
+    """Serializes a value for a json script element, escaped as done by the json_script filter."""
+    return json.dumps(value, cls=DjangoJSONEncoder).translate(JSON_SCRIPT_ESCAPES)
+
+
+def render_json_script(json_content, element_id):
+    """Returns the json script element of a value serialized with to_json_script."""
+    return format_html('<script id="{}" type="application/json">{}</script>', element_id, mark_safe(json_content))
@@ -1,80 +1,270 @@
 from django.urls import reverse
-import os
+import re
 import json
+import gzip
+import hashlib
+from collections.abc import Mapping
+from functools import lru_cache
+from datetime import datetime
 from rest_framework.views import APIView
 from django.shortcuts import render
-from django.http import Http404, HttpResponseForbidden
+from django.http import (
+    Http404,
+    HttpResponse,
+    HttpResponseBadRequest,
+    HttpResponseForbidden,
+    JsonResponse,
+    StreamingHttpResponse,
+)
 from django.utils.translation.trans_real import get_language_from_request
 from django.utils.translation import gettext_lazy as _
 from django.core.exceptions import PermissionDenied
-from dateutil import parser
+from dateutil import parser, tz
 from django.conf import settings
 from django.templatetags.static import static
 from rest_framework.response import Response
 from django.core.cache import cache
-
-def _parse_value(value, schema):
-    schema_type = schema.get('type')
-    format = schema.get('format')
-    if schema_type == 'string' and format in ['date-time']:
-        if type(value) == str:
-            return parser.parse(value)
+from django.core.serializers.json import DjangoJSONEncoder
+from django.utils.cache import get_conditional_response, patch_cache_control, patch_vary_headers
+from django.utils.http import quote_etag
+from django.utils.translation import get_language
+from geonode_mapstore_client.static_compression import choose_encoding
+from geonode_mapstore_client.config_loader import (
+    get_file_signature,
+    get_static_config_path,
+    json_default,
+    load_json_config,
+    thaw,
+)
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+METADATA_LINKS_ATTR = "metadata_links"
+REQUEST_RULES_CACHE_KEY = "mapstore_request_rules"
+METADATA_EXPORT_CHUNK_SIZE = 100
+METADATA_EXPORT_CONTENT_TYPES = {
+    "ndjson": "application/x-ndjson",
+    "json": "application/json",
+}
+
+_DATE_TIME_RE = re.compile(
+    r"^(\d{4})-(\d{2})-(\d{2})"
+    r"(?:[T ](\d{2}):(\d{2})(?::(\d{2})(?:\.(\d{1,6}))?)?"
+    r"(Z|[+-]\d{2}(?::?\d{2})?)?)?$"
+)
+
+_OBJECT = "object"
+_ARRAY = "array"
+_DATE_TIME = "date-time"
+_ENUM = "enum"
+_VALUE = "value"
+_MISSING = object()
+# schema keywords read by the metadata page templates
+_RENDERED_SCHEMA_KEYS = ("type", "format", "title")
+
+# compiled schemas by language, with the schema and the metadata generation they were compiled from
+_compiled_schemas = {}
+
+
+def _parse_date_time(value):
+    """
+    Parses ISO 8601 strings without going through dateutil,
+    the result is the same returned by dateutil.parser.parse.
+    UTC offsets and other formats fall back to dateutil
+    because the returned tzinfo depends on the local timezone.
+    """
+    match = _DATE_TIME_RE.match(value)
+    if match and match.group(8) != "Z":
+        year, month, day, hour, minute, second, fraction, offset = match.groups()
+        try:
+            tzinfo = None
+            if offset:
+                sign = -1 if offset[0] == "-" else 1
+                digits = offset[1:].replace(":", "")
+                seconds = sign * (int(digits[:2]) * 3600 + int(digits[2:] or 0) * 60)
+                if seconds == 0:
+                    return parser.parse(value)
+                tzinfo = tz.tzoffset(None, seconds)
+            return datetime(
+                int(year),
+                int(month),
+                int(day),
+                int(hour or 0),
+                int(minute or 0),
+                int(second or 0),
+                int(fraction.ljust(6, "0")) if fraction else 0,
+                tzinfo=tzinfo,
+            )
+        except ValueError:
+            pass
+    return parser.parse(value)
+
+
+class _SchemaNode:
+    """
+    Parsing plan of a single schema node
+    """
+
+    __slots__ = ("schema", "kind", "properties", "items", "titles", "options")
+
+    def __init__(self, schema):
+        self.schema = schema
+        self.properties = None
+        self.items = None
+        self.titles = None
+        self.options = None
+        schema_type = schema.get("type")
+        if schema_type == "object":
+            self.kind = _OBJECT
+        elif schema_type == "array":
+            self.kind = _ARRAY
+        elif schema_type == "string" and schema.get("format") in ["date-time"]:
+            self.kind = _DATE_TIME
+        elif schema_type == "string" and "oneOf" in schema:
+            self.kind = _ENUM
+            self.options = schema.get("oneOf")
+            self.titles = {}
+            try:
+                for option in self.options:
+                    # the first matching option wins
+                    self.titles.setdefault(option.get("const"), option.get("title"))
+            except TypeError:
+                # unhashable const values, always use the linear lookup
+                self.titles = None
+        else:
+            self.kind = _VALUE
+
+    def get_title(self, value):
+        if self.titles is not None:
+            try:
+                title = self.titles.get(value, _MISSING)
+                return value if title is _MISSING else title
+            except TypeError:
+                pass
+        for option in self.options:
+            if option.get("const") == value:
+                return option.get("title")
         return value
-    if schema_type == 'string':
-        if 'oneOf' in schema:
-            for option in schema.get('oneOf'):
-                if option.get('const') == value:
-                    return option.get('title')
-    return value
-
-def _parse_schema_instance(instance, schema):
-    schema_type = schema.get('type')
+
+
+def _compile_schema(schema):
+    """
+    Converts a json schema into a tree of _SchemaNode, walking the schema only once
+    """
+    nodes = {}
+    root = nodes[id(schema)] = _SchemaNode(schema)
+    stack = [root]
+    while stack:
+        node = stack.pop()
+        if node.kind == _OBJECT:
+            node.properties = {}
+            for key, property_schema in (node.schema.get("properties") or {}).items():
+                if property_schema:
+                    node.properties[key] = _get_or_create_node(nodes, property_schema, stack)
+        elif node.kind == _ARRAY and node.schema.get("items"):
+            node.items = _get_or_create_node(nodes, node.schema.get("items"), stack)
+    return root
+
+
+def _get_or_create_node(nodes, schema, stack):
+    node = nodes.get(id(schema))
+    if node is None:
+        node = nodes[id(schema)] = _SchemaNode(schema)
+        stack.append(node)
+    return node
+
+
+def _get_compiled_schema(schema, lang, generation=None):
+    """
+    Returns the parsing plan of a schema, compiled once per language.
+    It is compiled again for a new schema object or a new metadata generation, bumped when the thesauri
+    of the schema change, the plan keeps the schema alive so its identity is not reused by another object.
+    """
+    from geonode_mapstore_client.utils import _get_metadata_generation
+
+    if generation is None:
+        generation = _get_metadata_generation()
+    compiled = _compiled_schemas.get(lang)
+    if compiled is None or compiled[0] is not schema or compiled[1] != generation:
+        compiled = (schema, generation, _compile_schema(schema))
+        _compiled_schemas[lang] = compiled
+    return compiled[2]
+
+
+def _parse_compiled_schema_instance(instance, root):
     metadata = {}
-    metadata['schema'] = schema
-    if schema_type == 'object':
-        metadata['value'] = {}
-        for key in instance:
-            property_schema = None
-            if key in schema.get('properties'):
-                property_schema = schema.get('properties')[key]
-            if instance[key] and property_schema:
-                metadata['value'][key] = _parse_schema_instance(instance[key], property_schema)
-        return metadata
-    if schema_type == 'array':
-        metadata['value'] = []
-        for entry in instance:
-            if schema.get('items'):
-                metadata['value'].append(
-                    _parse_schema_instance(entry, schema.get('items'))
-                )
-        return metadata
-    metadata['value'] = _parse_value(instance, schema)
+    stack = [(instance, root, metadata)]
+    while stack:
+        instance, node, entry = stack.pop()
+        entry["schema"] = node.schema
+        kind = node.kind
+        if kind is _OBJECT:
+            value = entry["value"] = {}
+            properties = node.properties
+            for key in instance:
+                property_node = properties.get(key)
+                if instance[key] and property_node is not None:
+                    value[key] = {}
+                    stack.append((instance[key], property_node, value[key]))
+        elif kind is _ARRAY:
+            value = entry["value"] = []
+            items = node.items
+            if items is not None:
+                for item in instance:
+                    value.append({})
+                    stack.append((item, items, value[-1]))
+        elif kind is _DATE_TIME:
+            entry["value"] = _parse_date_time(instance) if type(instance) == str else instance
+        elif kind is _ENUM:
+            entry["value"] = node.get_title(instance)
+        else:
+            entry["value"] = instance
     return metadata
 
-def metadata(request, pk, template="geonode-mapstore-client/metadata.html"):
 
-    from geonode.base.models import ResourceBase
-    from geonode.metadata.manager import metadata_manager
-    from geonode.utils import build_absolute_uri, resolve_object
-
-    try:
-        resource = resolve_object(
-            request,
-            ResourceBase,
-            {"pk": pk},
-            permission="base.view_resourcebase",
-            permission_msg=_("You are not allowed to view this resource."),
+def _parse_schema_instance(instance, schema, lang=None):
+    # schemas without a language share the None entry of the cache
+    return _parse_compiled_schema_instance(instance, _get_compiled_schema(schema, lang))
+
+def _get_metadata_queryset(queryset=None):
+    """
+    Returns the resources with the owner and the non html links needed by the metadata page
+    """
+    from django.db.models import Prefetch
+    from geonode.base.models import ResourceBase, Link
+
+    if queryset is None:
+        queryset = ResourceBase.objects.all()
+    return queryset.select_related("owner").prefetch_related(
+        Prefetch(
+            "link_set",
+            queryset=Link.objects.exclude(link_type="html"),
+            to_attr=METADATA_LINKS_ATTR,
         )
-    except PermissionDenied:
-        return HttpResponseForbidden(_("Not allowed"))
-    except Http404:
-        raise Http404(_("Not found"))
+    )
+
+def _get_metadata_schema(lang):
+    """
+    Returns the metadata schema of a language with its parsing plan
+    """
+    from geonode.metadata.manager import metadata_manager
 
-    lang = get_language_from_request(request)[:2]
     schema = metadata_manager.get_schema(lang)
+    return schema, _get_compiled_schema(schema, lang)
+
+
+def _build_metadata_groups(resource, lang, get_schema=_get_metadata_schema):
+
+    from geonode.metadata.manager import metadata_manager
+    from geonode.utils import build_absolute_uri
+
+    _schema, compiled_schema = get_schema(lang)
     schema_instance = metadata_manager.build_schema_instance(resource, lang)
 
-    full_metadata = _parse_schema_instance(schema_instance, schema)
+    full_metadata = _parse_compiled_schema_instance(schema_instance, compiled_schema)
     metadata = full_metadata['value']
     metadata_groups = {}
 
@@ -89,14 +279,15 @@ def metadata(request, pk, template="geonode-mapstore-client/metadata.html"):
                 metadata_groups[group] = { }
             metadata_groups[group][key] = property
 
+    owner = resource.owner
     metadata_groups["Responsible"] = {
-        "Name": resource.owner.name_long,
-        "Email": resource.owner.email,
-        "Position": resource.owner.position,
-        "Organization": resource.owner.organization,
-        "Location": resource.owner.location,
-        "Voice": resource.owner.voice,
-        "Fax": resource.owner.fax,
+        "Name": owner.name_long,
+        "Email": owner.email,
+        "Position": owner.position,
+        "Organization": owner.organization,
+        "Location": owner.location,
+        "Voice": owner.voice,
+        "Fax": owner.fax,
     }
 
     # adding information from the resource itself
@@ -110,17 +301,24 @@ def metadata(request, pk, template="geonode-mapstore-client/metadata.html"):
         "Extension Y1": resource.bbox_y1,
     }
 
+    # links are prefetched by _get_metadata_queryset, fallback to a query for other resources
+    links = getattr(resource, METADATA_LINKS_ATTR, None)
+    if links is None:
+        links = resource.link_set.exclude(link_type="html")
+    detail_url = build_absolute_uri(resource.detail_url)
+    metadata_url = build_absolute_uri(reverse("metadata", args=[resource.id]))
+
     metadata_groups["References"] = {
         **{
             "Link Online": {
                 "type": "link",
-                "url": build_absolute_uri(resource.detail_url),
-                "text": build_absolute_uri(resource.detail_url)
+                "url": detail_url,
+                "text": detail_url
             },
             "Metadata page": {
                 "type": "link",
-                "url": build_absolute_uri(reverse("metadata", args=[resource.id])),
-                "text": build_absolute_uri(reverse("metadata", args=[resource.id]))
+                "url": metadata_url,
+                "text": metadata_url
             },
         },
         **{
@@ -129,10 +327,82 @@ def metadata(request, pk, template="geonode-mapstore-client/metadata.html"):
                 "url": link.url,
                 "text": f"{resource.title}.{link.extension}"
             }
-            for link in resource.link_set.exclude(link_type="html")
+            for link in links
         },
     }
 
+    return metadata_groups
+
+def _compact_metadata_groups(metadata_groups):
+    """
+    Keeps only the schema keywords used to render the metadata page,
+    the cached groups do not carry the full json schema of every field.
+    """
+    summaries = {}
+
+    def compact(entry):
+        if isinstance(entry, dict):
+            if "schema" in entry and "value" in entry and isinstance(entry["schema"], dict):
+                schema = entry["schema"]
+                summary = summaries.get(id(schema))
+                if summary is None:
+                    summary = summaries[id(schema)] = {
+                        key: schema[key] for key in _RENDERED_SCHEMA_KEYS if key in schema
+                    }
+                return {**entry, "schema": summary, "value": compact(entry["value"])}
+            return {key: compact(value) for key, value in entry.items()}
+        if isinstance(entry, list):
+            return [compact(value) for value in entry]
+        return entry
+
+    return compact(metadata_groups)
+
+
+def _get_metadata_groups(resource, lang, get_schema=_get_metadata_schema):
+
+    from geonode_mapstore_client.utils import (
+        get_cached_metadata_groups,
+        set_cached_metadata_groups,
+    )
+
+    metadata_groups = get_cached_metadata_groups(resource, lang)
+    if metadata_groups is None:
+        metadata_groups = _compact_metadata_groups(_build_metadata_groups(resource, lang, get_schema))
+        set_cached_metadata_groups(resource, lang, metadata_groups)
+    return metadata_groups
+
+def _get_metadata_values(metadata):
+    """
+    Removes the schema information from the parsed metadata, keeping only the values
+    """
+    if isinstance(metadata, dict):
+        if "schema" in metadata and "value" in metadata:
+            return _get_metadata_values(metadata["value"])
+        return {key: _get_metadata_values(value) for key, value in metadata.items()}
+    if isinstance(metadata, list):
+        return [_get_metadata_values(value) for value in metadata]
+    return metadata
+
+def metadata(request, pk, template="geonode-mapstore-client/metadata.html"):
+
+    from geonode.utils import resolve_object
+
+    try:
+        resource = resolve_object(
+            request,
+            _get_metadata_queryset(),
+            {"pk": pk},
+            permission="base.view_resourcebase",
+            permission_msg=_("You are not allowed to view this resource."),
+        )
+    except PermissionDenied:
+        return HttpResponseForbidden(_("Not allowed"))
+    except Http404:
+        raise Http404(_("Not found"))
+
+    lang = get_language_from_request(request)[:2]
+    metadata_groups = _get_metadata_groups(resource, lang)
+
     return render(
         request,
         template,
@@ -142,109 +412,338 @@ def metadata(request, pk, template="geonode-mapstore-client/metadata.html"):
 def metadata_embed(request, pk):
     return metadata(request, pk, template="geonode-mapstore-client/metadata_embed.html")
 
+def _parse_pks(request):
+    pks = []
+    for value in request.GET.getlist("pk"):
+        pks.extend(pk.strip() for pk in value.split(",") if pk.strip())
+    if not all(pk.isdigit() for pk in pks):
+        raise ValueError(_("Invalid pk list"))
+    return pks
+
+def _stream_metadata(resources, lang, output_format):
+    encoder = DjangoJSONEncoder()
+    # the schema is read and compiled once for the whole export, at the first resource not in the cache
+    get_schema = lru_cache(maxsize=None)(_get_metadata_schema)
+    if output_format == "json":
+        yield '{"resources": ['
+    separator = ""
+    for resource in resources:
+        record = {
+            "pk": resource.pk,
+            "uuid": resource.uuid,
+            "title": resource.title,
+            "metadata": _get_metadata_values(_get_metadata_groups(resource, lang, get_schema)),
+        }
+        if output_format == "json":
+            yield separator + encoder.encode(record)
+            separator = ","
+        else:
+            yield encoder.encode(record) + "\n"
+    if output_format == "json":
+        yield "]}"
+
+def metadata_export(request):
+    """
+    Streams the metadata of many resources in a single response.
+    Resources are selected with the `pk` parameter (repeated or comma separated)
+    and/or the `resource_type` parameter, and only the ones visible to the user are returned.
+    The `format` parameter selects `ndjson` (default) or `json` output.
+    """
+    from geonode.base.models import ResourceBase
+    from geonode.security.utils import get_visible_resources
 
+    output_format = request.GET.get("format", "ndjson")
+    if output_format not in METADATA_EXPORT_CONTENT_TYPES:
+        return HttpResponseBadRequest(_("Unsupported format"))
+    try:
+        pks = _parse_pks(request)
+    except ValueError as e:
+        return HttpResponseBadRequest(str(e))
+
+    queryset = ResourceBase.objects.all()
+    if pks:
+        queryset = queryset.filter(pk__in=pks)
+    resource_types = request.GET.getlist("resource_type")
+    if resource_types:
+        queryset = queryset.filter(resource_type__in=resource_types)
+
+    resources = get_visible_resources(
+        queryset,
+        request.user,
+        admin_approval_required=settings.ADMIN_MODERATE_UPLOADS,
+        unpublished_not_visible=settings.RESOURCE_PUBLISHING,
+        private_groups_not_visibile=settings.GROUP_PRIVATE_RESOURCES,
+    )
+    resources = _get_metadata_queryset(resources).order_by("pk")
 
-class ExtensionsView(APIView):
-    permission_classes = []
+    lang = get_language_from_request(request)[:2]
+    return StreamingHttpResponse(
+        _stream_metadata(resources.iterator(chunk_size=METADATA_EXPORT_CHUNK_SIZE), lang, output_format),
+        content_type=METADATA_EXPORT_CONTENT_TYPES[output_format],
+    )
 
-    def get(self, request, *args, **kwargs):
-        from geonode_mapstore_client.models import Extension
-        from geonode_mapstore_client.utils import (
-            MAPSTORE_EXTENSIONS_CACHE_KEY,
-            MAPSTORE_EXTENSION_CACHE_TIMEOUT,
-        )
 
-        cached_data = cache.get(MAPSTORE_EXTENSIONS_CACHE_KEY)
-        if cached_data:
-            return Response(cached_data)
 
-        final_extensions = {}
-        legacy_file_path = os.path.join(
-            settings.STATIC_ROOT, "mapstore", "extensions", "index.json"
-        )
+class SearchServiceSearchView(APIView):
+    """
+    Runs the WFS query of a search service for the `q` text on the server,
+    returning the matching features as GeoJSON, with the credentials of the user.
+    Indexed search services are answered from their local index, once built,
+    which contains the features readable without credentials.
+    """
+
+    permission_classes = []
 
+    def get(self, request, pk, *args, **kwargs):
+        from geonode_mapstore_client.handlers import get_user_access_token
+        from geonode_mapstore_client.models import SearchService
+        from geonode_mapstore_client.search_index import get_search_index
+        from geonode_mapstore_client.search_proxy import SearchProxyError, forwards_credentials, search
+
+        text = request.GET.get("q", "")
+        if not text.strip():
+            return HttpResponseBadRequest(_("Missing search text"))
         try:
-            with open(legacy_file_path, "r") as f:
-                final_extensions = json.load(f)
-        except (FileNotFoundError, json.JSONDecodeError):
-            pass
+            service = SearchService.objects.get(pk=pk)
+        except SearchService.DoesNotExist:
+            raise Http404(_("Not found"))
+
+        index = get_search_index(service) if service.indexed else None
+        if index is not None:
+            return JsonResponse(index.search(text, service.maxFeatures))
+        access_token = None
+        if request.user.is_authenticated and forwards_credentials(service):
+            access_token = get_user_access_token(request).token
+        try:
+            result = search(service, text, access_token)
+        except SearchProxyError:
+            return HttpResponse(_("The search service is not available"), status=502)
+        return JsonResponse(result)
+
+
+def _build_cached_response(data):
+    """
+    Returns the cache entry of a json payload, serialized once, with its ETag
+    """
+    content = json.dumps(data, separators=(",", ":"), default=json_default).encode("utf-8")
+    return {
+        "content": content,
+        "etag": quote_etag(hashlib.sha256(content).hexdigest()),
+    }
 
-        active_extensions = Extension.objects.filter(active=True)
-        dynamic_extensions = {}
-        for ext in active_extensions:
-            dynamic_extensions[ext.name] = {
-                "bundle": f"{ext.name}/index.js",
-                "translations": f"{ext.name}/translations",
-                "assets": f"{ext.name}/assets",
-            }
 
-        final_extensions.update(dynamic_extensions)
+def _get_conditional_response(request, cached_response):
+    """
+    Returns a 304 response if the client copy is still valid, the full payload otherwise
+    """
+    from geonode_mapstore_client.utils import MAPSTORE_EXTENSION_HTTP_MAX_AGE
+
+    # no Last-Modified, the deletion of an extension would not move it forward
+    etag = cached_response["etag"]
+    response = get_conditional_response(request, etag=etag)
+    if response is None:
+        response = HttpResponse(cached_response["content"], content_type="application/json")
+    response["ETag"] = etag
+    patch_cache_control(response, public=True, max_age=MAPSTORE_EXTENSION_HTTP_MAX_AGE)
+    return response
+
+
+def _get_request_rules_cache_key(request, registry, token):
+    """
+    Returns the cache key of the rules of the request user, by user, expiration of the user token and handlers,
+    and the max age of the rules, clients can keep them privately until the token expires.
+    """
+    max_age = getattr(settings, "MAPSTORE_REQUEST_RULES_MAX_AGE", 300)  # seconds
+    if token is not None:
+        expires = int(token.expires.timestamp())
+        max_age = max(0, min(max_age, expires - int(datetime.now().timestamp())))
+        user_key = f"{request.user.pk}_{expires}"
+    else:
+        user_key = "anonymous"
+    return f"{REQUEST_RULES_CACHE_KEY}_{registry.get_generation()}_{user_key}", max_age
+
+
+def _build_request_rules_cache(rules):
+    content = json.dumps(rules, sort_keys=True, cls=DjangoJSONEncoder).encode("utf-8")
+    return {"rules": rules, "etag": quote_etag(hashlib.sha256(content).hexdigest())}
+
+
+def _get_request_rules_cache_timeout(registry, max_age):
+    # fallback rules of busy, late or failing handlers are used only for this request
+    return max_age if registry.is_complete() else 0
+
+
+def _get_request_rules_response(request, registry, cached_rules, max_age, response_class):
+    """
+    Returns a 304 response if the client copy of the rules is still valid, the rules otherwise
+    """
+    response = get_conditional_response(request, etag=cached_rules["etag"])
+    if response is None:
+        response = response_class(cached_rules["rules"])
+    # the handlers and their durations are exposed only while debugging
+    server_timing = registry.get_server_timing() if settings.DEBUG else ""
+    if server_timing:
+        response["Server-Timing"] = server_timing
+    response["ETag"] = cached_rules["etag"]
+    patch_cache_control(response, private=True, max_age=max_age)
+    return response
+
+
+def _get_extension_entry(extension):
+    return {
+        "bundle": f"{extension.name}/index.js",
+        "translations": f"{extension.name}/translations",
+        "assets": f"{extension.name}/assets",
+    }
+
 
-        cache.set(
-            MAPSTORE_EXTENSIONS_CACHE_KEY,
-            final_extensions,
-            timeout=MAPSTORE_EXTENSION_CACHE_TIMEOUT,
-        )
+def _compose_extensions(index, extensions):
+    final_extensions = dict(index)
+    for ext in extensions:
+        final_extensions[ext.name] = _get_extension_entry(ext)
+    return final_extensions
 
-        return Response(final_extensions)
 
+def _compose_plugins_config(config_data, map_extensions):
+    # the parsed config is shared and read only, extensions are added to a copy of the list
+    plugins = list(config_data.get("plugins", []))
+    existing_plugin_names = {p.get("name") for p in plugins if isinstance(p, Mapping)}
+    for ext in map_extensions:
+        if ext.name not in existing_plugin_names:
+            plugins.append({"name": ext.name, **_get_extension_entry(ext)})
+    return {"plugins": plugins}
 
-class PluginsConfigView(APIView):
+
+def _build_extensions_response():
+    from geonode_mapstore_client.models import Extension
+
+    index = load_json_config(get_static_config_path("extensions", "index.json"), {})
+    extensions = _compose_extensions(
+        index, Extension.objects.filter(active=True, published=True)
+    )
+    return _build_cached_response(extensions)
+
+
+def _build_plugins_config_response():
+    from geonode_mapstore_client.models import Extension
+
+    config_data = load_json_config(
+        get_static_config_path("configs", "pluginsConfig.json"), {"plugins": []}
+    )
+    plugins_config = _compose_plugins_config(
+        config_data, Extension.objects.filter(active=True, is_map_extension=True, published=True)
+    )
+    return _build_cached_response(plugins_config)
+
+
+class ExtensionsView(APIView):
     permission_classes = []
 
     def get(self, request, *args, **kwargs):
-        from geonode_mapstore_client.models import Extension
-        from geonode_mapstore_client.utils import (
-            MAPSTORE_PLUGINS_CACHE_KEY,
-            MAPSTORE_EXTENSION_CACHE_TIMEOUT,
-        )
+        from geonode_mapstore_client.utils import MAPSTORE_EXTENSIONS_CACHE_KEY, get_extension_cache
 
-        cached_data = cache.get(MAPSTORE_PLUGINS_CACHE_KEY)
-        if cached_data:
-            return Response(cached_data)
+        cached_response = get_extension_cache(MAPSTORE_EXTENSIONS_CACHE_KEY, _build_extensions_response)
+        return _get_conditional_response(request, cached_response)
 
-        base_config_path = os.path.join(
-            settings.STATIC_ROOT, "mapstore", "configs", "pluginsConfig.json"
-        )
 
-        config_data = {"plugins": []}
+class PluginsConfigView(APIView):
+    permission_classes = []
 
-        try:
-            with open(base_config_path, "r") as f:
-                config_data = json.load(f)
-        except (FileNotFoundError, json.JSONDecodeError):
-            pass
+    def get(self, request, *args, **kwargs):
+        from geonode_mapstore_client.utils import MAPSTORE_PLUGINS_CACHE_KEY, get_extension_cache
+
+        cached_response = get_extension_cache(MAPSTORE_PLUGINS_CACHE_KEY, _build_plugins_config_response)
+        return _get_conditional_response(request, cached_response)
+
+
+
+def _build_local_config_response():
+    from geonode_mapstore_client.patcher import apply_patch_rules
+    from geonode_mapstore_client.utils import get_search_services_patch_rules
+    from geonode_mapstore_client.templatetags.get_search_services import get_services_dict
+
+    path = get_static_config_path("configs", "localConfig.json")
+    local_config = thaw(load_json_config(path, {}))
+    rules = [
+        *get_search_services_patch_rules(get_services_dict()),
+        *getattr(settings, "MAPSTORE_PLUGINS_CONFIG_PATCH_RULES", []),
+    ]
+    if rules and "plugins" in local_config:
+        local_config["plugins"] = apply_patch_rules(local_config["plugins"], rules)
+
+    content = json.dumps(local_config, separators=(",", ":"), cls=DjangoJSONEncoder).encode("utf-8")
+    digest = hashlib.sha256(content).hexdigest()
+    variants = {None: content, "gzip": gzip.compress(content, compresslevel=9)}
+    if brotli is not None:
+        variants["br"] = brotli.compress(content)
+    return {
+        "signature": get_file_signature(path),
+        "variants": {
+            encoding: {
+                "content": variant,
+                "etag": quote_etag(f"{digest}-{encoding}" if encoding else digest),
+            }
+            for encoding, variant in variants.items()
+        },
+    }
 
-        plugins = config_data.get("plugins", [])
-        existing_plugin_names = {p.get("name") for p in plugins if isinstance(p, dict)}
 
-        map_extensions = Extension.objects.filter(active=True, is_map_extension=True)
+class LocalConfigView(APIView):
+    """
+    Returns localConfig.json with the plugins config patch rules and the search services already applied,
+    pre-compressed with gzip and brotli (if available)
+    """
 
-        for ext in map_extensions:
-            if ext.name not in existing_plugin_names:
-                plugins.append({
-                    "name": ext.name,
-                    "bundle": f"{ext.name}/index.js",
-                    "translations": f"{ext.name}/translations",
-                    "assets": f"{ext.name}/assets",
-                })
+    permission_classes = []
 
-        cache.set(
-            MAPSTORE_PLUGINS_CACHE_KEY,
-            config_data,
-            timeout=MAPSTORE_EXTENSION_CACHE_TIMEOUT,
+    def get(self, request, *args, **kwargs):
+        from geonode_mapstore_client.utils import (
+            MAPSTORE_EXTENSION_CACHE_TIMEOUT,
+            MAPSTORE_EXTENSION_HTTP_MAX_AGE,
+            get_local_config_cache_key,
         )
 
-        return Response({"plugins": plugins})
-
+        # search services names are translated
+        cache_key = get_local_config_cache_key(get_language())
+        cached_response = cache.get(cache_key)
+        signature = get_file_signature(get_static_config_path("configs", "localConfig.json"))
+        if not cached_response or cached_response["signature"] != signature:
+            cached_response = _build_local_config_response()
+            cache.set(cache_key, cached_response, timeout=MAPSTORE_EXTENSION_CACHE_TIMEOUT)
+
+        variants = cached_response["variants"]
+        encoding = choose_encoding(request, variants)
+        variant = variants[encoding]
+
+        response = get_conditional_response(request, etag=variant["etag"])
+        if response is None:
+            response = HttpResponse(variant["content"], content_type="application/json")
+            if encoding:
+                response["Content-Encoding"] = encoding
+        response["ETag"] = variant["etag"]
+        patch_vary_headers(response, ["Accept-Encoding"])
+        patch_cache_control(response, public=True, max_age=MAPSTORE_EXTENSION_HTTP_MAX_AGE)
+        return response
 
 
 class RequestConfigurationView(APIView):
     permission_classes = []
 
     def get(self, request, *args, **kwargs):
+        """
+        Returns the rules of the registered handlers, cached by user, expiration of the user token and handlers.
+        Clients can keep them privately until the token expires.
+        """
+        from geonode_mapstore_client.handlers import get_user_access_token
         from geonode_mapstore_client.registry import RequestConfigurationRulesRegistry
 
         registry = RequestConfigurationRulesRegistry()
-        rules = registry.get_rules(request)
-        return Response(rules)
+        token = get_user_access_token(request) if request.user.is_authenticated else None
+        cache_key, max_age = _get_request_rules_cache_key(request, registry, token)
+        cached_rules = cache.get(cache_key)
+        if cached_rules is None:
+            cached_rules = _build_request_rules_cache(registry.get_rules(request))
+            timeout = _get_request_rules_cache_timeout(registry, max_age)
+            if timeout:
+                cache.set(cache_key, cached_rules, timeout=timeout)
+        return _get_request_rules_response(request, registry, cached_rules, max_age, Response)
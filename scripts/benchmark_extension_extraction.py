@@ -0,0 +1,75 @@
+"""
+Measures the throughput of the extraction of an extension bundle, compared with zipfile extractall.
+
+Run it in a GeoNode project with the client installed, e.g.:
+
+    DJANGO_SETTINGS_MODULE=geonode.settings python scripts/benchmark_extension_extraction.py --size 100
+"""
+import os
+import time
+import shutil
+import zipfile
+import argparse
+import tempfile
+
+import django
+
+# a minified bundle, with a few binary assets
+SOURCE_LINE = b'function n(e){return e&&e.__esModule?e:{default:e}}var r=n(require("react"));'
+
+
+def _write_bundle(zip_path, size):
+    file_size = 512 * 1024
+    with zipfile.ZipFile(zip_path, "w", zipfile.ZIP_DEFLATED) as zf:
+        zf.writestr("index.json", '{"plugins": []}')
+        written = 0
+        position = 0
+        while written < size:
+            if position % 4 == 3:
+                zf.writestr(f"assets/img/{position}.png", os.urandom(file_size), zipfile.ZIP_STORED)
+            else:
+                content = (SOURCE_LINE + str(position).encode("utf-8")) * (file_size // len(SOURCE_LINE))
+                zf.writestr("index.js" if position == 0 else f"{position}.chunk.js", content)
+            written += file_size
+            position += 1
+
+
+def main():
+    from django.test.utils import override_settings
+    from geonode_mapstore_client.extensions import extract_extension
+
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--size", type=int, default=50, help="Uncompressed size of the bundle in MB")
+    parser.add_argument("--runs", type=int, default=3, help="Number of extractions, the best one is reported")
+    options = parser.parse_args()
+
+    size = options.size * 1024 * 1024
+    root = tempfile.mkdtemp()
+    try:
+        zip_path = os.path.join(root, "Benchmark.zip")
+        _write_bundle(zip_path, size)
+        static_root = os.path.join(root, "static")
+        timings = {"extract_extension": [], "extractall": []}
+        with override_settings(STATIC_ROOT=static_root, MAPSTORE_EXTENSION_MAX_SIZE=size * 2):
+            for run in range(options.runs):
+                start = time.perf_counter()
+                written = extract_extension(zip_path, "Benchmark")
+                timings["extract_extension"].append(time.perf_counter() - start)
+
+                target_path = os.path.join(root, f"extractall_{run}")
+                start = time.perf_counter()
+                with zipfile.ZipFile(zip_path, "r") as zip_ref:
+                    zip_ref.extractall(target_path)
+                timings["extractall"].append(time.perf_counter() - start)
+                shutil.rmtree(target_path)
+
+        print(f"Bundle of {written / 1024 / 1024:.1f} MB, {os.path.getsize(zip_path) / 1024 / 1024:.1f} MB compressed")
+        for name, values in timings.items():
+            print(f"{name}: {min(values):.3f} s, {written / 1024 / 1024 / min(values):.0f} MB/s")
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    django.setup()
+    main()
@@ -0,0 +1,78 @@
+"""
+Compares the requests per second of the sync and async versions of the json endpoints,
+with concurrent anonymous requests served from the cache.
+
+Run it in a GeoNode project with the client installed, e.g.:
+
+    DJANGO_SETTINGS_MODULE=geonode.settings python scripts/benchmark_json_endpoints.py reqrules
+"""
+import time
+import asyncio
+import argparse
+
+import django
+
+
+def get_endpoints():
+    from geonode_mapstore_client import async_views, views
+
+    return {
+        "extensions": ("/client/extensions", views.ExtensionsView.as_view(), async_views.extensions),
+        "pluginsconfig": ("/client/pluginsconfig", views.PluginsConfigView.as_view(), async_views.plugins_config),
+        "reqrules": ("/api/v2/reqrules", views.RequestConfigurationView.as_view(), async_views.request_rules),
+    }
+
+
+async def _run(view, path, requests, concurrency):
+    from asgiref.sync import sync_to_async
+    from django.contrib.auth.models import AnonymousUser
+    from django.test import AsyncRequestFactory
+
+    factory = AsyncRequestFactory()
+    # sync views run in the thread shared by the sync code, as under the ASGI handler
+    if not asyncio.iscoroutinefunction(view):
+        view = sync_to_async(view)
+    remaining = iter(range(requests))
+
+    async def worker():
+        for _ in remaining:
+            request = factory.get(path)
+            request.user = AnonymousUser()
+            response = await view(request)
+            if response.status_code != 200:
+                raise RuntimeError(f"{path} returned {response.status_code}")
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return requests / (time.perf_counter() - start)
+
+
+def main():
+    endpoints = get_endpoints()
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument(
+        "endpoints", nargs="*", help=f"Endpoints to measure among {', '.join(endpoints)}, all by default"
+    )
+    parser.add_argument("--requests", type=int, default=2000, help="Number of requests for each view")
+    parser.add_argument("--concurrency", type=int, default=200, help="Number of concurrent requests")
+    options = parser.parse_args()
+    unknown = set(options.endpoints) - set(endpoints)
+    if unknown:
+        parser.error(f"Unknown endpoints: {', '.join(sorted(unknown))}")
+
+    for name in options.endpoints or endpoints:
+        path, sync_view, async_view = endpoints[name]
+        results = {}
+        for mode, view in (("sync", sync_view), ("async", async_view)):
+            # the first request fills the cache
+            asyncio.run(_run(view, path, 1, 1))
+            results[mode] = asyncio.run(_run(view, path, options.requests, options.concurrency))
+        print(
+            f"{name}: sync {results['sync']:.0f} req/s, async {results['async']:.0f} req/s "
+            f"({results['async'] / results['sync']:.2f}x)"
+        )
+
+
+if __name__ == "__main__":
+    django.setup()
+    main()